@@ -0,0 +1,53 @@
+# benchmarks/__init__.py
+"""
+Benchmarks de los caminos calientes de la API.
+
+Se corren desde la carpeta BACKEND, por ejemplo:
+    python -m benchmarks.bench_pagination
+
+Usan una base propia (`BENCH_DB_NAME`) que se borra al terminar.
+
+La suite de carga (`benchmarks.datagen`, `benchmarks.load`, `benchmarks.report`)
+puede correr contra un mongod local o contra un reemplazo en memoria
+(`--backend memory`, requiere el paquete opcional `mongomock-motor`).
+"""
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+BENCH_MONGO_URL = os.getenv("BENCH_MONGO_URL", "mongodb://localhost:27017")
+BENCH_DB_NAME = os.getenv("BENCH_DB_NAME", "bench_db_profesionales")
+
+
+def open_bench_db(backend: str = "mongo"):
+    """Devuelve `(db, close)` para la base de benchmarks en el backend pedido."""
+    if backend == "memory":
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            raise SystemExit("El backend en memoria necesita `pip install mongomock-motor`")
+        client = AsyncMongoMockClient()
+    else:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(BENCH_MONGO_URL)
+    return client[BENCH_DB_NAME], client.close
+
+
+@contextmanager
+def timer(results: list):
+    """Agrega a `results` la duración (en segundos) del bloque."""
+    start = time.perf_counter()
+    yield
+    results.append(time.perf_counter() - start)
+
+
+def summarize(samples: list) -> str:
+    ordered = sorted(samples)
+    p50 = ordered[len(ordered) // 2]
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f"p50={p50 * 1000:.2f}ms p95={p95 * 1000:.2f}ms n={len(ordered)}"
@@ -0,0 +1,56 @@
+# benchmarks/bench_auth.py
+"""
+Microbenchmark de la dependencia `get_current_user` con y sin la caché de
+tokens verificados. La caché de principals queda caliente en ambos casos,
+así que lo que se mide es el costo de verificar la firma del JWT.
+
+    python -m benchmarks.bench_auth [iteraciones]
+"""
+import asyncio
+import sys
+import time
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from benchmarks import BENCH_DB_NAME, BENCH_MONGO_URL
+from schemas.user_schemas import UserIn
+from services import user_service
+from utils import auth_service
+
+
+async def run(db, token: str, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await auth_service.get_current_user(db=db, token=token)
+    return (time.perf_counter() - start) / iterations
+
+
+async def main(iterations: int):
+    mongo = AsyncIOMotorClient(BENCH_MONGO_URL)
+    db = mongo[BENCH_DB_NAME]
+    try:
+        user = await user_service.create_user(db, UserIn(
+            username="bench-auth", email="auth@bench.com", password="x",
+            firstName="Bench", lastName="Auth", role="client",
+        ))
+        token = auth_service.create_access_token({"user_id": str(user["_id"])})
+        await auth_service.get_current_user(db=db, token=token)  # calienta la caché de principals
+
+        maxsize = auth_service.token_cache.maxsize
+        auth_service.token_cache.maxsize = 0
+        auth_service.token_cache.clear()
+        without_cache = await run(db, token, iterations)
+
+        auth_service.token_cache.maxsize = maxsize
+        with_cache = await run(db, token, iterations)
+
+        print(f"sin caché de tokens: {without_cache * 1e6:.1f} µs por request")
+        print(f"con caché de tokens: {with_cache * 1e6:.1f} µs por request")
+        print(f"speedup: x{without_cache / with_cache:.1f}")
+    finally:
+        await mongo.drop_database(BENCH_DB_NAME)
+        mongo.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000))
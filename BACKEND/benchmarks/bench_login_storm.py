@@ -0,0 +1,70 @@
+# benchmarks/bench_login_storm.py
+"""
+Mide la latencia de un endpoint ajeno al login (GET /) antes y durante una
+tormenta de logins concurrentes. Con bcrypt fuera del event loop, la latencia
+de GET / debería mantenerse plana.
+
+    python -m benchmarks.bench_login_storm [logins_concurrentes]
+"""
+import asyncio
+import sys
+
+import httpx
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from benchmarks import BENCH_DB_NAME, BENCH_MONGO_URL, summarize, timer
+from database.databaseMongo import get_db
+from main import app
+from schemas.user_schemas import UserIn
+from services import user_service
+
+PROBES = 50
+PROBE_INTERVAL = 0.02
+
+
+async def probe_latency(client: httpx.AsyncClient) -> list:
+    samples = []
+    for _ in range(PROBES):
+        with timer(samples):
+            await client.get("/")
+        await asyncio.sleep(PROBE_INTERVAL)
+    return samples
+
+
+async def login_storm(client: httpx.AsyncClient, logins: int):
+    form = {"username": "storm", "password": "storm-password"}
+    responses = await asyncio.gather(*[client.post("/auth/token", data=form) for _ in range(logins)])
+    return sum(r.status_code == 200 for r in responses), sum(r.status_code == 503 for r in responses)
+
+
+async def main(logins: int):
+    mongo = AsyncIOMotorClient(BENCH_MONGO_URL)
+    db = mongo[BENCH_DB_NAME]
+
+    async def override_get_db():
+        return db
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        await user_service.create_user(db, UserIn(
+            username="storm", email="storm@bench.com", password="storm-password",
+            firstName="Storm", lastName="Bench", role="client",
+        ))
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            idle = await probe_latency(client)
+            storm_task = asyncio.create_task(login_storm(client, logins))
+            during = await probe_latency(client)
+            ok, busy = await storm_task
+
+        print(f"GET / sin carga        {summarize(idle)}")
+        print(f"GET / durante logins   {summarize(during)}")
+        print(f"logins: {ok} ok, {busy} rechazados con 503 (cola llena)")
+    finally:
+        app.dependency_overrides.clear()
+        await mongo.drop_database(BENCH_DB_NAME)
+        mongo.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200))
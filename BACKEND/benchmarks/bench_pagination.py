@@ -0,0 +1,74 @@
+# benchmarks/bench_pagination.py
+"""
+Compara el costo de pedir la página 1 y la página 10.000 de /jobs/all
+con `skip` y con cursor (keyset).
+
+    python -m benchmarks.bench_pagination [total_docs] [page_size]
+"""
+import asyncio
+import sys
+from datetime import datetime
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from benchmarks import BENCH_DB_NAME, BENCH_MONGO_URL, summarize, timer
+from services import job_service
+from utils.pagination import encode_cursor
+
+REPEAT = 30
+
+
+async def seed_jobs(db, total: int):
+    batch = []
+    for i in range(total):
+        batch.append({
+            "title": f"Trabajo {i}",
+            "description": "",
+            "category": "Bench",
+            "budget": 1.0,
+            "client_id": ObjectId(),
+            "professional_id": ObjectId(),
+            "status": "posted",
+            "created_at": datetime.utcnow(),
+        })
+        if len(batch) == 10_000:
+            await db["jobs"].insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await db["jobs"].insert_many(batch, ordered=False)
+
+
+async def main(total: int, page_size: int):
+    client = AsyncIOMotorClient(BENCH_MONGO_URL)
+    db = client[BENCH_DB_NAME]
+    try:
+        await seed_jobs(db, total)
+        deep_page = min(10_000, total // page_size - 1)
+        deep_skip = deep_page * page_size
+
+        # El cursor de la página profunda apunta al último documento de la página anterior
+        anchor = await db["jobs"].find({}, {"_id": 1}).sort("_id", 1).skip(deep_skip - 1).limit(1).to_list(length=1)
+        deep_cursor = encode_cursor(anchor[0])
+
+        scenarios = {
+            "skip página 1": dict(skip=0),
+            f"skip página {deep_page}": dict(skip=deep_skip),
+            "cursor página 1": dict(cursor=None),
+            f"cursor página {deep_page}": dict(cursor=deep_cursor),
+        }
+        for name, kwargs in scenarios.items():
+            samples = []
+            for _ in range(REPEAT):
+                with timer(samples):
+                    await job_service.get_jobs_page(db, page_size, **kwargs)
+            print(f"{name:<24} {summarize(samples)}")
+    finally:
+        await client.drop_database(BENCH_DB_NAME)
+        client.close()
+
+
+if __name__ == "__main__":
+    total_docs = int(sys.argv[1]) if len(sys.argv) > 1 else 220_000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    asyncio.run(main(total_docs, size))
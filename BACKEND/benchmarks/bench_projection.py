@@ -0,0 +1,83 @@
+# benchmarks/bench_projection.py
+"""
+Mide los bytes que viajan desde Mongo al leer con y sin la proyección derivada
+del esquema de respuesta: usuarios (get_current_user), páginas de trabajos
+completas y en modo tarjeta, y profesionales.
+
+    python -m benchmarks.bench_projection [total_docs]
+"""
+import asyncio
+import sys
+from datetime import datetime
+
+import bson
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from benchmarks import BENCH_DB_NAME, BENCH_MONGO_URL
+from services import job_service, professional_service, user_service
+from utils.security import hash_password
+
+PAGE_SIZE = 100
+
+
+async def seed(db, total: int):
+    password = hash_password("bench")
+    await db["users"].insert_many([
+        {"username": f"user{i}", "email": f"user{i}@bench.com", "first_name": "Bench", "last_name": str(i),
+         "role": "client", "password": password}
+        for i in range(total)
+    ])
+    await db["jobs"].insert_many([
+        {"title": f"Trabajo {i}", "description": "Descripción larga del trabajo. " * 60, "category": "Bench",
+         "budget": 1.0, "client_id": ObjectId(), "professional_id": ObjectId(), "status": "posted",
+         "created_at": datetime.utcnow()}
+        for i in range(total)
+    ])
+    await db["professionals"].insert_many([
+        {"user_id": ObjectId(), "headline": "Gasista matriculado", "bio": "Instalaciones y arreglos. " * 30,
+         "categories": ["Gas", "Plomería"], "city": "Mendoza", "avg_rating": 4.5, "total_reviews": 10,
+         "rating_sum": 45, "headline_tokens": ["gasista", "matriculado"], "categories_norm": ["gas", "plomeria"],
+         "category_tokens": ["gas", "plomeria"], "city_norm": "mendoza", "city_tokens": ["mendoza"],
+         "search_tokens": ["gasista", "matriculado", "gas", "plomeria", "mendoza"]}
+        for _ in range(total)
+    ])
+
+
+def size_of(docs) -> int:
+    return sum(len(bson.encode(doc)) for doc in docs)
+
+
+def report(name: str, before: int, after: int):
+    saved = 100 * (before - after) / before if before else 0
+    print(f"{name:<28} {before:>10} B -> {after:>10} B  (-{saved:.0f}%)")
+
+
+async def main(total: int):
+    client = AsyncIOMotorClient(BENCH_MONGO_URL)
+    db = client[BENCH_DB_NAME]
+    await client.drop_database(BENCH_DB_NAME)
+    try:
+        await seed(db, total)
+
+        user_ids = [str(u["_id"]) for u in await db["users"].find({}, {"_id": 1}).to_list(PAGE_SIZE)]
+        full_users = [await user_service.get_user_by_id(db, uid, projection=None) for uid in user_ids]
+        projected_users = [await user_service.get_user_by_id(db, uid) for uid in user_ids]
+        report(f"get_current_user x{len(user_ids)}", size_of(full_users), size_of(projected_users))
+
+        full_jobs, _ = await job_service.get_jobs_page(db, PAGE_SIZE, projection=None)
+        jobs, _ = await job_service.get_jobs_page(db, PAGE_SIZE)
+        cards, _ = await job_service.get_jobs_page(db, PAGE_SIZE, projection=job_service.JOB_CARD_PROJECTION)
+        report("/jobs/all", size_of(full_jobs), size_of(jobs))
+        report("/jobs/all?view=card", size_of(full_jobs), size_of(cards))
+
+        full_professionals, _ = await professional_service.get_professionals_page(db, PAGE_SIZE, projection=None)
+        professionals, _ = await professional_service.get_professionals_page(db, PAGE_SIZE)
+        report("/professionals/all", size_of(full_professionals), size_of(professionals))
+    finally:
+        await client.drop_database(BENCH_DB_NAME)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000))
@@ -0,0 +1,61 @@
+# benchmarks/bench_serialization.py
+"""
+Compara el costo de serializar una página de 100 trabajos: validando contra el
+`response_model` (lo que hace FastAPI) y con el convertidor precompilado de
+`utils.serialization`. No necesita Mongo.
+
+    python -m benchmarks.bench_serialization [page_size]
+"""
+import sys
+from datetime import datetime
+from typing import List
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from benchmarks import summarize, timer
+from schemas.job_schema import JobOut
+from utils.serialization import FastJSONResponse, serialize_many
+
+REPEAT = 500
+
+
+def make_jobs(total: int) -> list:
+    return [
+        {
+            "_id": ObjectId(),
+            "title": f"Trabajo {i}",
+            "description": "Descripción de prueba " * 5,
+            "category": "Bench",
+            "budget": 1000.0 + i,
+            "client_id": ObjectId(),
+            "professional_id": ObjectId(),
+            "status": "posted",
+            "created_at": datetime.utcnow(),
+        }
+        for i in range(total)
+    ]
+
+
+def main(page_size: int):
+    jobs = make_jobs(page_size)
+    # FastAPI valida contra el response_model, que exige los ids como str
+    jobs_as_strings = [{k: str(v) if isinstance(v, ObjectId) else v for k, v in job.items()} for job in jobs]
+    adapter = TypeAdapter(List[JobOut])
+
+    before, after = [], []
+    for _ in range(REPEAT):
+        with timer(before):
+            validated = adapter.validate_python(jobs_as_strings)
+            JSONResponse(jsonable_encoder(validated, by_alias=True))
+        with timer(after):
+            FastJSONResponse(serialize_many(JobOut, jobs))
+
+    print(f"response_model + JSONResponse: {summarize(before)}")
+    print(f"serialize_many + FastJSONResponse: {summarize(after)}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
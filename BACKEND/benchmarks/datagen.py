@@ -0,0 +1,177 @@
+# benchmarks/datagen.py
+"""
+Generador de datos sintéticos para los benchmarks.
+
+Crea usuarios, profesionales, trabajos y reseñas con la misma forma que
+producen los servicios (campos de búsqueda, ratings, estadísticas), en lotes
+de `insert_many`. Con la misma semilla genera siempre los mismos datos.
+
+Todos los usuarios comparten la contraseña BENCH_PASSWORD (se hashea una sola
+vez) y se llaman `bench_user_<n>`.
+
+    python -m benchmarks.datagen --users 1000000 --professionals 100000 \\
+        --jobs 2000000 --reviews 5000000
+
+Para el backend en memoria los datos se generan dentro del mismo proceso que
+los usa (ver `python -m benchmarks.load --backend memory`).
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from benchmarks import BENCH_DB_NAME, open_bench_db
+from database.indexes import ensure_indexes
+from schemas.job_schema import JobIn, JobStatus
+from schemas.professional_schema import GeoPoint, ProfessionalIn
+from services import admin_service, job_service, professional_service, ranking_service, review_service
+from utils.security import hash_password
+
+BENCH_PASSWORD = "bench-password"
+BATCH_SIZE = 10_000
+
+CATEGORIES = [
+    "Plomería", "Electricidad", "Gas", "Pintura", "Carpintería", "Albañilería",
+    "Jardinería", "Cerrajería", "Climatización", "Limpieza", "Mudanzas", "Herrería",
+]
+CITIES = [
+    "Buenos Aires", "Córdoba", "Rosario", "Mendoza", "La Plata", "Mar del Plata",
+    "San Miguel de Tucumán", "Salta", "Santa Fe", "Neuquén", None,
+]
+# (lat, lng) del centro de cada ciudad; los profesionales se reparten a unos 20 km alrededor
+CITY_COORDINATES = {
+    "Buenos Aires": (-34.6037, -58.3816), "Córdoba": (-31.4201, -64.1888), "Rosario": (-32.9442, -60.6505),
+    "Mendoza": (-32.8895, -68.8458), "La Plata": (-34.9205, -57.9536), "Mar del Plata": (-38.0055, -57.5426),
+    "San Miguel de Tucumán": (-26.8083, -65.2176), "Salta": (-24.7821, -65.4232), "Santa Fe": (-31.6107, -60.6973),
+    "Neuquén": (-38.9516, -68.0591),
+}
+HEADLINE_WORDS = ["matriculado", "urgencias", "24hs", "presupuesto", "sin cargo", "garantía", "experiencia"]
+COMMENTS = ["Excelente", "Muy prolijo", "Llegó tarde", "Recomendable", "Buen precio", ""]
+
+
+def username(n: int) -> str:
+    return f"bench_user_{n}"
+
+
+async def _insert_in_batches(db, collection: str, documents, total: int, label: str) -> list:
+    """Inserta los documentos del generador en lotes y devuelve los _id."""
+    ids = []
+    batch = []
+    started = time.perf_counter()
+    for document in documents:
+        document["_id"] = ObjectId()
+        batch.append(document)
+        if len(batch) == BATCH_SIZE:
+            await db[collection].insert_many(batch, ordered=False)
+            ids.extend(doc["_id"] for doc in batch)
+            batch = []
+            print(f"  {label}: {len(ids)}/{total} ({len(ids) / (time.perf_counter() - started):.0f}/s)")
+    if batch:
+        await db[collection].insert_many(batch, ordered=False)
+        ids.extend(doc["_id"] for doc in batch)
+    return ids
+
+
+def _users(rng: random.Random, total: int, professionals: int, password_hash: str):
+    for n in range(total):
+        yield {
+            "username": username(n),
+            "email": f"{username(n)}@bench.com",
+            "first_name": "Bench",
+            "last_name": str(n),
+            "role": "professional" if n < professionals else "client",
+            "password": password_hash,
+        }
+
+
+def _professionals(rng: random.Random, user_ids: list):
+    for user_id in user_ids:
+        categories = rng.sample(CATEGORIES, rng.randint(1, 3))
+        headline = f"{categories[0]} {' '.join(rng.sample(HEADLINE_WORDS, 2))}"
+        city = rng.choice(CITIES)
+        location = None
+        if city is not None:
+            lat, lng = CITY_COORDINATES[city]
+            location = GeoPoint(coordinates=(lng + rng.uniform(-0.2, 0.2), lat + rng.uniform(-0.2, 0.2)))
+        professional_in = ProfessionalIn(
+            headline=headline, bio="Trabajos a domicilio. " * rng.randint(1, 20),
+            categories=categories, city=city, service_location=location,
+            service_radius_km=rng.choice([None, 5, 10, 25, 50]),
+        )
+        yield professional_service._new_professional_document(professional_in, str(user_id))
+
+
+def _jobs(rng: random.Random, total: int, client_ids: list, professional_ids: list):
+    statuses = [status.value for status in JobStatus]
+    for n in range(total):
+        job_in = JobIn(
+            title=f"Trabajo de prueba {n}", description="Detalle del trabajo. " * rng.randint(1, 50),
+            category=rng.choice(CATEGORIES), budget=round(rng.uniform(1000, 500000), 2),
+            professional_id=str(rng.choice(professional_ids)),
+        )
+        job = job_service._new_job_document(job_in, str(rng.choice(client_ids)))
+        job["status"] = rng.choice(statuses)
+        yield job
+
+
+def _reviews(rng: random.Random, total: int, client_ids: list, professional_ids: list):
+    start = datetime.utcnow() - timedelta(days=730)
+    for _ in range(total):
+        yield {
+            "rating": rng.choices([1, 2, 3, 4, 5], weights=[1, 1, 2, 4, 6])[0],
+            "comment": rng.choice(COMMENTS),
+            "professional_id": rng.choice(professional_ids),
+            "client_id": rng.choice(client_ids),
+            "created_at": start + timedelta(minutes=rng.randint(0, 730 * 24 * 60)),
+        }
+
+
+async def generate(db, users: int, professionals: int, jobs: int, reviews: int, seed: int = 42) -> dict:
+    """Genera el dataset completo y deja índices, ratings y estadísticas consistentes."""
+    if professionals > users:
+        raise ValueError("No puede haber más profesionales que usuarios")
+    rng = random.Random(seed)
+    await ensure_indexes(db)
+
+    user_ids = await _insert_in_batches(db, "users", _users(rng, users, professionals, hash_password(BENCH_PASSWORD)), users, "users")
+    professional_user_ids, client_ids = user_ids[:professionals], user_ids[professionals:] or user_ids
+    professional_ids = await _insert_in_batches(
+        db, "professionals", _professionals(rng, professional_user_ids), professionals, "professionals"
+    )
+    if professional_ids:
+        await _insert_in_batches(db, "jobs", _jobs(rng, jobs, client_ids, professional_ids), jobs, "jobs")
+        await _insert_in_batches(db, "reviews", _reviews(rng, reviews, client_ids, professional_ids), reviews, "reviews")
+
+    # Ratings, tableros de ranking y estadísticas como si cada escritura hubiera pasado por los servicios
+    await review_service.reconcile_ratings(db)
+    await ranking_service.rebuild_leaderboards(db)
+    await admin_service.rebuild_dashboard_stats(db)
+    return {"users": users, "professionals": professionals, "jobs": jobs if professional_ids else 0,
+            "reviews": reviews if professional_ids else 0}
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--professionals", type=int, default=1_000)
+    parser.add_argument("--jobs", type=int, default=20_000)
+    parser.add_argument("--reviews", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=42)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera datos sintéticos para los benchmarks")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    async def _main():
+        db, close = open_bench_db("mongo")
+        try:
+            counts = await generate(db, args.users, args.professionals, args.jobs, args.reviews, args.seed)
+            print(f"Listo en {BENCH_DB_NAME}: {counts}")
+        finally:
+            close()
+
+    asyncio.run(_main())
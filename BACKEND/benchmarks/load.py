@@ -0,0 +1,217 @@
+# benchmarks/load.py
+"""
+Driver de carga en proceso: le pega a la app ASGI con `httpx.AsyncClient`
+(sin red ni uvicorn) y mide cada escenario de los caminos calientes.
+
+    python -m benchmarks.load [--backend mongo|memory] [--generate] \\
+        [--requests 500] [--concurrency 20] [--scenarios search,all] \\
+        [--output resultados.json] [--baseline benchmarks/baseline.json] [--save-baseline]
+
+Con `--generate` primero crea el dataset (ver `benchmarks.datagen`; acepta
+los mismos --users/--professionals/--jobs/--reviews). Sin `--generate` usa lo
+que ya haya en BENCH_DB_NAME.
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+from benchmarks import BENCH_DB_NAME, datagen, open_bench_db
+from benchmarks.report import check_against_baseline, format_table, save_results, summarize_scenario
+from database.databaseMongo import get_db
+from main import app
+
+SEARCH_TERMS = ["gasista", "electricidad matriculado", "plomeria urgencias", "pintura", "cerrajeria 24hs"]
+
+
+@dataclass
+class LoadContext:
+    """Datos que comparten los escenarios: credenciales e ids reales del dataset."""
+    auth_headers: Dict[str, str]
+    professional_ids: List[str]
+    user_count: int
+    rng: random.Random
+
+
+Scenario = Callable[[httpx.AsyncClient, LoadContext], Awaitable[httpx.Response]]
+
+
+async def auth_token(client: httpx.AsyncClient, ctx: LoadContext) -> httpx.Response:
+    user = datagen.username(ctx.rng.randrange(min(ctx.user_count, 1000)))
+    return await client.post("/auth/token", data={"username": user, "password": datagen.BENCH_PASSWORD})
+
+
+async def professionals_search(client: httpx.AsyncClient, ctx: LoadContext) -> httpx.Response:
+    params = {"text": ctx.rng.choice(SEARCH_TERMS), "limit": 20}
+    if ctx.rng.random() < 0.5:
+        params["city"] = ctx.rng.choice([c for c in datagen.CITIES if c])
+    return await client.get("/professionals/search", params=params, headers=ctx.auth_headers)
+
+
+async def professionals_near(client: httpx.AsyncClient, ctx: LoadContext) -> httpx.Response:
+    lat, lng = datagen.CITY_COORDINATES[ctx.rng.choice(list(datagen.CITY_COORDINATES))]
+    params = {"near": f"{lat + ctx.rng.uniform(-0.1, 0.1)},{lng + ctx.rng.uniform(-0.1, 0.1)}", "max_km": 15, "limit": 20}
+    if ctx.rng.random() < 0.5:
+        params["category"] = ctx.rng.choice(datagen.CATEGORIES)
+    return await client.get("/professionals/search", params=params, headers=ctx.auth_headers)
+
+
+async def professionals_all(client: httpx.AsyncClient, ctx: LoadContext) -> httpx.Response:
+    return await client.get("/professionals/all", params={"limit": 20}, headers=ctx.auth_headers)
+
+
+async def post_review(client: httpx.AsyncClient, ctx: LoadContext) -> httpx.Response:
+    body = {
+        "professional_id": ctx.rng.choice(ctx.professional_ids),
+        "rating": ctx.rng.randint(1, 5),
+        "comment": "Reseña de carga",
+    }
+    return await client.post("/reviews/", json=body, headers=ctx.auth_headers)
+
+
+async def professional_reviews(client: httpx.AsyncClient, ctx: LoadContext) -> httpx.Response:
+    params = {"sort": ctx.rng.choice(["recent", "best"]), "limit": 20}
+    return await client.get(f"/reviews/{ctx.rng.choice(ctx.professional_ids)}", params=params, headers=ctx.auth_headers)
+
+
+async def admin_stats(client: httpx.AsyncClient, ctx: LoadContext) -> httpx.Response:
+    return await client.get("/admin/stats")
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "auth_token": auth_token,
+    "professionals_search": professionals_search,
+    "professionals_near": professionals_near,
+    "professionals_all": professionals_all,
+    "post_review": post_review,
+    "professional_reviews": professional_reviews,
+    "admin_stats": admin_stats,
+}
+
+
+class ScenarioFailedError(Exception):
+    """Todas las llamadas del escenario fallaron: medirlo no tiene sentido."""
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, ctx: LoadContext, scenario: Scenario, requests: int, concurrency: int, warmup: int = 10
+) -> dict:
+    """
+    Corre `requests` llamadas con `concurrency` en vuelo. Las de warmup no se miden.
+    Si fallan todas, lanza ScenarioFailedError con el primer error visto.
+    """
+    for _ in range(warmup):
+        await scenario(client, ctx)
+
+    latencies: List[float] = []
+    errors = 0
+    first_error = None
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors, first_error
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                response = await scenario(client, ctx)
+                ok = response.status_code < 400
+                error = None if ok else f"HTTP {response.status_code}: {response.text[:200]}"
+            except Exception as exc:
+                ok = False
+                error = repr(exc)
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+                first_error = first_error or error
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    if errors and not latencies:
+        raise ScenarioFailedError(first_error)
+    return summarize_scenario(latencies, errors, time.perf_counter() - started)
+
+
+async def build_context(client: httpx.AsyncClient, db, seed: int) -> LoadContext:
+    professionals = await db["professionals"].find({}, {"_id": 1}).limit(1000).to_list(None)
+    if not professionals:
+        raise SystemExit(f"{BENCH_DB_NAME} no tiene profesionales: corré con --generate o usá benchmarks.datagen")
+    user_count = await db["users"].count_documents({})
+    # El último usuario es cliente (los primeros son los profesionales)
+    username = datagen.username(user_count - 1)
+    response = await client.post("/auth/token", data={"username": username, "password": datagen.BENCH_PASSWORD})
+    response.raise_for_status()
+    return LoadContext(
+        auth_headers={"Authorization": f"Bearer {response.json()['access_token']}"},
+        professional_ids=[str(p["_id"]) for p in professionals],
+        user_count=user_count,
+        rng=random.Random(seed),
+    )
+
+
+async def main(args) -> int:
+    db, close = open_bench_db(args.backend)
+
+    async def override_get_db():
+        return db
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        if args.generate:
+            await datagen.generate(db, args.users, args.professionals, args.jobs, args.reviews, args.seed)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            ctx = await build_context(client, db, args.seed)
+            results = {}
+            for name in args.scenarios:
+                try:
+                    results[name] = await run_scenario(client, ctx, SCENARIOS[name], args.requests, args.concurrency)
+                except ScenarioFailedError as exc:
+                    print(f"{name}: fallaron todas las llamadas ({exc})", file=sys.stderr)
+                    return 1
+                print(f"{name}: {results[name]['throughput_rps']:.1f} req/s")
+    finally:
+        app.dependency_overrides.clear()
+        if args.generate:
+            await db.client.drop_database(BENCH_DB_NAME)
+        close()
+
+    print(format_table(results))
+    meta = {"backend": args.backend, "requests": args.requests, "concurrency": args.concurrency}
+    if args.output:
+        save_results(args.output, results, meta)
+    if args.save_baseline:
+        save_results(args.baseline, results, meta)
+        print(f"Baseline guardado en {args.baseline}")
+        return 0
+    if args.baseline:
+        return check_against_baseline(results, args.baseline, args.tolerance)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carga en proceso sobre los caminos calientes de la API")
+    parser.add_argument("--backend", choices=["mongo", "memory"], default="mongo")
+    parser.add_argument("--generate", action="store_true", help="Genera el dataset antes de medir (y lo borra al final)")
+    datagen.add_arguments(parser)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--scenarios", type=lambda value: value.split(","), default=list(SCENARIOS))
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    parser.add_argument("--save-baseline", action="store_true", help="Guarda estos resultados como baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+    if args.save_baseline and not args.baseline:
+        parser.error("--save-baseline necesita --baseline")
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Escenarios desconocidos: {', '.join(sorted(unknown))}")
+
+    sys.exit(asyncio.run(main(args)))
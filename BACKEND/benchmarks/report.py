@@ -0,0 +1,107 @@
+# benchmarks/report.py
+"""
+Resultados de la suite de carga: resumen por escenario (throughput y
+p50/p95/p99), archivo JSON de baseline y chequeo de regresiones.
+
+    python -m benchmarks.report resultados.json --baseline benchmarks/baseline.json [--tolerance 0.2]
+
+Sale con código 1 si algún escenario empeoró más que la tolerancia.
+"""
+import argparse
+import json
+import platform
+import sys
+from datetime import datetime
+from typing import Dict, List
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Percentil por rango más cercano (samples en segundos, sin ordenar)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summarize_scenario(latencies: List[float], errors: int, elapsed: float) -> dict:
+    """Resumen de un escenario: `latencies` en segundos, `elapsed` es el tiempo de pared total."""
+    requests = len(latencies) + errors
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+def format_table(results: Dict[str, dict]) -> str:
+    header = f"{'escenario':<24} {'requests':>9} {'errores':>8} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    lines = [header, "-" * len(header)]
+    for name, r in results.items():
+        lines.append(
+            f"{name:<24} {r['requests']:>9} {r['errors']:>8} {r['throughput_rps']:>9.1f} "
+            f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f}"
+        )
+    return "\n".join(lines)
+
+
+def save_results(path: str, results: Dict[str, dict], meta: dict):
+    document = {
+        "created_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "meta": meta,
+        "scenarios": results,
+    }
+    with open(path, "w", encoding="utf-8") as output:
+        json.dump(document, output, indent=2, ensure_ascii=False)
+
+
+def load_results(path: str) -> Dict[str, dict]:
+    with open(path, encoding="utf-8") as source:
+        return json.load(source)["scenarios"]
+
+
+def find_regressions(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float = 0.2) -> List[str]:
+    """
+    Compara contra el baseline: es regresión si el p95 o el p99 crecen, o el
+    throughput cae, más que `tolerance` (0.2 = 20%), o si aparecen errores.
+    """
+    regressions = []
+    for name, base in baseline.items():
+        current = results.get(name)
+        if current is None:
+            continue
+        for metric in ("p95_ms", "p99_ms"):
+            if base[metric] and current[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {base[metric]:.2f} -> {current[metric]:.2f}")
+        if base["throughput_rps"] and current["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {base['throughput_rps']:.1f} -> {current['throughput_rps']:.1f} req/s")
+        if current["errors"] > base["errors"]:
+            regressions.append(f"{name}: errores {base['errors']} -> {current['errors']}")
+    return regressions
+
+
+def check_against_baseline(results: Dict[str, dict], baseline_path: str, tolerance: float) -> int:
+    """Imprime las regresiones contra el baseline y devuelve el código de salida."""
+    regressions = find_regressions(results, load_results(baseline_path), tolerance)
+    if regressions:
+        print(f"Regresiones contra {baseline_path} (tolerancia {tolerance:.0%}):")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print(f"Sin regresiones contra {baseline_path} (tolerancia {tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara resultados de carga contra un baseline")
+    parser.add_argument("results")
+    parser.add_argument("--baseline", required=True)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    current_results = load_results(args.results)
+    print(format_table(current_results))
+    sys.exit(check_against_baseline(current_results, args.baseline, args.tolerance))
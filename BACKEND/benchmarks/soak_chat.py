@@ -0,0 +1,157 @@
+# benchmarks/soak_chat.py
+"""
+Soak del chat por WebSocket: levanta la app con uvicorn en un puerto local,
+abre miles de sockets reales repartidos en salas (un trabajo por sala) y manda
+mensajes en todas las salas a la vez. Mide la latencia de punta a punta (envío
+-> recepción en cada socket de la sala) y verifica que no se pierda ninguno.
+
+    python -m benchmarks.soak_chat [--backend mongo|memory] [--sockets 2000] \\
+        [--per-room 10] [--messages 20] [--rate 5]
+
+Sale con código 1 si faltan entregas o el hub descartó conexiones por lentas.
+Con muchos sockets puede hacer falta subir el límite de archivos abiertos (ulimit -n).
+"""
+import argparse
+import asyncio
+import json
+import resource
+import sys
+import time
+from typing import List
+
+import uvicorn
+from bson import ObjectId
+from websockets.asyncio.client import connect
+
+from benchmarks import BENCH_DB_NAME, open_bench_db, summarize
+from database.databaseMongo import get_db
+from main import app
+from services.chat_service import chat_hub
+from utils.auth_service import create_access_token
+from utils.security import hash_password
+
+CONNECT_CONCURRENCY = 200
+
+
+def _raise_open_files_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+async def _seed(db, rooms: int) -> List[tuple]:
+    """Un cliente, un profesional y un trabajo por sala. Devuelve (job_id, token_cliente, token_profesional)."""
+    password = hash_password("soak-password")
+    users, professionals, jobs, seeded = [], [], [], []
+    for n in range(rooms):
+        client = {"_id": ObjectId(), "username": f"soak_client_{n}", "email": f"soak_client_{n}@bench.com",
+                  "first_name": "Soak", "last_name": str(n), "role": "client", "password": password}
+        pro_user = {"_id": ObjectId(), "username": f"soak_pro_{n}", "email": f"soak_pro_{n}@bench.com",
+                    "first_name": "Soak", "last_name": str(n), "role": "professional", "password": password}
+        professional = {"_id": ObjectId(), "user_id": pro_user["_id"], "headline": "Soak", "bio": "", "categories": []}
+        job = {"_id": ObjectId(), "client_id": client["_id"], "professional_id": professional["_id"],
+               "title": f"Trabajo soak {n}", "status": "accepted"}
+        users += [client, pro_user]
+        professionals.append(professional)
+        jobs.append(job)
+        seeded.append((
+            str(job["_id"]),
+            create_access_token({"user_id": str(client["_id"])}),
+            create_access_token({"user_id": str(pro_user["_id"])}),
+        ))
+    await db["users"].insert_many(users)
+    await db["professionals"].insert_many(professionals)
+    await db["jobs"].insert_many(jobs)
+    return seeded
+
+
+async def main(args) -> int:
+    _raise_open_files_limit()
+    db, close = open_bench_db(args.backend)
+
+    async def override_get_db():
+        return db
+
+    app.dependency_overrides[get_db] = override_get_db
+    rooms = max(1, args.sockets // args.per_room)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, lifespan="off", log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    sockets = []
+    readers = []
+    try:
+        seeded = await _seed(db, rooms)
+        while not server.started:
+            await asyncio.sleep(0.05)
+        port = server.servers[0].sockets[0].getsockname()[1]
+
+        latencies: List[float] = []
+        received = 0
+        all_received = asyncio.Event()
+        expected = rooms * args.per_room * args.messages
+
+        async def read(ws):
+            nonlocal received
+            async for raw in ws:
+                message = json.loads(raw)
+                latencies.append(time.perf_counter() - float(message["text"].split("|")[0]))
+                received += 1
+                if received == expected:
+                    all_received.set()
+
+        semaphore = asyncio.Semaphore(CONNECT_CONCURRENCY)
+
+        async def open_socket(job_id: str, token: str):
+            async with semaphore:
+                return await connect(f"ws://127.0.0.1:{port}/chat/jobs/{job_id}/ws?token={token}", max_queue=None)
+
+        started = time.perf_counter()
+        room_sockets = []
+        for job_id, client_token, pro_token in seeded:
+            tokens = [client_token if n % 2 == 0 else pro_token for n in range(args.per_room)]
+            room_sockets.append(asyncio.gather(*[open_socket(job_id, token) for token in tokens]))
+        room_sockets = await asyncio.gather(*room_sockets)
+        sockets = [ws for room in room_sockets for ws in room]
+        connect_seconds = time.perf_counter() - started
+        readers = [asyncio.create_task(read(ws)) for ws in sockets]
+        print(f"{len(sockets)} sockets en {rooms} salas abiertos en {connect_seconds:.2f}s")
+
+        async def talk(room: list):
+            # Los mensajes de la sala salen de sockets alternados (cliente y profesional)
+            for n in range(args.messages):
+                await room[n % len(room)].send(json.dumps({"text": f"{time.perf_counter()}|{n}"}))
+                await asyncio.sleep(1 / args.rate)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[talk(room) for room in room_sockets])
+        try:
+            await asyncio.wait_for(all_received.wait(), timeout=args.timeout)
+        except asyncio.TimeoutError:
+            pass
+        elapsed = time.perf_counter() - started
+    finally:
+        for task in readers:
+            task.cancel()
+        await asyncio.gather(*[ws.close() for ws in sockets], return_exceptions=True)
+        server.should_exit = True
+        await server_task
+        app.dependency_overrides.clear()
+        await db.client.drop_database(BENCH_DB_NAME)
+        close()
+
+    stats = chat_hub.stats()
+    print(f"entregas: {received}/{expected} en {elapsed:.2f}s ({received / elapsed:.0f}/s)")
+    if latencies:
+        print(f"latencia envío -> recepción: {summarize(latencies)}")
+    print(f"hub: {stats}")
+    return 0 if received == expected and stats["dropped_connections"] == 0 else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Soak del chat con miles de WebSockets locales")
+    parser.add_argument("--backend", choices=["mongo", "memory"], default="mongo")
+    parser.add_argument("--sockets", type=int, default=2000)
+    parser.add_argument("--per-room", type=int, default=10)
+    parser.add_argument("--messages", type=int, default=20, help="Mensajes por sala")
+    parser.add_argument("--rate", type=float, default=5, help="Mensajes por segundo en cada sala")
+    parser.add_argument("--timeout", type=float, default=30, help="Segundos de espera para las entregas pendientes")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
+from typing import Optional, Union
 
 class Settings(BaseSettings):
     DATABASE_URL: str = Field(alias="mongo_url")
@@ -8,6 +9,102 @@ class Settings(BaseSettings):
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
 
+    # Cliente de Mongo (None = default del driver). Ver database/databaseMongo.py
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 0
+    MONGO_MAX_IDLE_TIME_MS: Optional[int] = None
+    MONGO_MAX_CONNECTING: int = 2
+    MONGO_CONNECT_TIMEOUT_MS: Optional[int] = None
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: Optional[int] = None
+    MONGO_SOCKET_TIMEOUT_MS: Optional[int] = None
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: Optional[int] = None
+    MONGO_COMPRESSORS: Optional[str] = None   # por ejemplo "zstd,snappy,zlib"
+    MONGO_READ_PREFERENCE: str = "primary"
+    MONGO_READ_CONCERN: Optional[str] = None  # "local", "majority", ...
+    MONGO_WRITE_CONCERN_W: Optional[Union[int, str]] = None  # 1, "majority", ...
+    MONGO_WRITE_CONCERN_J: Optional[bool] = None
+    # Conexiones que se abren al arrancar, antes de aceptar tráfico (0 = sin warmup)
+    MONGO_WARMUP_CONNECTIONS: int = 10
+
+    # Hashing de contraseñas (bcrypt) fuera del event loop
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+
+    # Usuarios (ids de Mongo, separados por coma) que pueden usar las rutas de mantenimiento de /admin
+    ADMIN_USER_IDS: str = ""
+
+    # Caché por proceso de usuarios autenticados (get_current_user)
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+
+    # Caché de tokens JWT ya verificados (cada entrada vence, como mucho, con el `exp` del token)
+    TOKEN_CACHE_SIZE: int = 50000
+    TOKEN_CACHE_MAX_TTL_SECONDS: int = 300
+    TOKEN_CACHE_NEGATIVE_TTL_SECONDS: int = 5
+
+    # Caché de cuerpos de respuesta por (recurso, versión) para GET /professionals/{id} y /reviews/{id}
+    RESPONSE_CACHE_SIZE: int = 5000
+    RESPONSE_CACHE_TTL_SECONDS: int = 300
+
+    # Máximo de ítems por request en POST/PATCH /jobs/bulk
+    JOBS_BULK_MAX_ITEMS: int = 500
+
+    # Envío de emails (SMTP)
+    SMTP_HOST: str = "localhost"
+    SMTP_PORT: int = 25
+    SMTP_USERNAME: Optional[str] = None
+    SMTP_PASSWORD: Optional[str] = None
+    SMTP_STARTTLS: bool = False
+    SMTP_TIMEOUT_SECONDS: float = 10
+    EMAIL_FROM: str = "no-reply@marketplace.local"
+
+    # Worker del outbox de emails (colección `outbox`)
+    OUTBOX_WORKER_ENABLED: bool = True
+    OUTBOX_CONCURRENCY: int = 4
+    OUTBOX_BATCH_SIZE: int = 50
+    OUTBOX_MAX_ATTEMPTS: int = 5
+    OUTBOX_RETRY_BASE_SECONDS: float = 30
+    OUTBOX_RETRY_MAX_SECONDS: float = 3600
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 2
+    OUTBOX_LEASE_SECONDS: int = 300
+    OUTBOX_HOLD_SECONDS: int = 120  # retención del email de bienvenida hasta que el registro termine
+
+    # Ranking por categoría (ver services/ranking_service.py): prior del promedio bayesiano
+    # y tamaño de los tableros materializados (LEADERBOARD_SIZE servidos + un margen)
+    RANKING_PRIOR_MEAN: float = 4.0
+    RANKING_PRIOR_WEIGHT: float = 10
+    RANKING_MIN_REVIEWS: int = 1
+    LEADERBOARD_SIZE: int = 50
+    LEADERBOARD_BUFFER: int = 20
+
+    # Chat por trabajo (ver services/chat_service.py): franja y tamaño máximo de cada
+    # bucket de mensajes, y cola de envío por conexión antes de descartar al cliente lento
+    CHAT_BUCKET_SECONDS: int = 3600
+    CHAT_BUCKET_MAX_MESSAGES: int = 200
+    CHAT_SEND_QUEUE_SIZE: int = 256
+
+    # Búsqueda de profesionales: coincidencias que se leen para el total y los conteos
+    # por categoría y ciudad, y tokens de la consulta que cuentan para la relevancia
+    SEARCH_FACET_SCAN_LIMIT: int = 5000
+    SEARCH_MAX_QUERY_TOKENS: int = 4
+
+    # Idempotency-Key (ver utils/idempotency.py): cuánto se guardan las respuestas, la
+    # caché en memoria de este proceso, cuánto espera un duplicado concurrente y a partir
+    # de cuándo una ejecución "en curso" se considera abandonada
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 3600
+    IDEMPOTENCY_CACHE_SIZE: int = 10000
+    IDEMPOTENCY_CACHE_TTL_SECONDS: int = 600
+    IDEMPOTENCY_WAIT_SECONDS: float = 10
+    IDEMPOTENCY_LOCK_SECONDS: int = 60
+
+    # Estadísticas del dashboard: después de cuánto una escritura "en curso" se da por
+    # abandonada (su proceso murió) y deja de frenar la reconstrucción
+    STATS_PENDING_WRITE_SECONDS: int = 30
+
+    # Cada cuántos segundos se reconcilian los ratings contra `reviews` (0 = desactivado)
+    RATING_RECONCILE_INTERVAL_SECONDS: int = 0
+
     # Le decimos a Pydantic que lea las variables del archivo .env
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
@@ -1,25 +1,181 @@
 # database/databaseMongo.py
-import os
-from motor.motor_asyncio import AsyncIOMotorClient
-from dotenv import load_dotenv
+"""
+Cliente de Mongo compartido por toda la app.
 
-# Cargamos las variables de entorno
-load_dotenv()
+El cliente se crea y se cierra en el lifespan de `main.py` (`connect` / `close`),
+con el pool, la compresión, los timeouts y los read/write concerns definidos en
+`core.config.Settings`. `warmup` abre conexiones antes de aceptar tráfico para
+que los primeros requests de un worker recién levantado no paguen el handshake.
 
-MONGO_URL = os.getenv("MONGO_URL")
-MONGO_DATABASE = os.getenv("MONGO_DATABASE")
+`pool_monitor` escucha los eventos del pool y alimenta `/health/db`.
 
-if not MONGO_URL or not MONGO_DATABASE:
-    raise ValueError("MONGO_URL y MONGO_DATABASE deben estar definidos en el .env")
+Los scripts de línea de comandos usan el mismo ciclo:
+    db = connect()
+    ...
+    close()
+"""
+import asyncio
+import threading
+from collections import deque
+from typing import Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import monitoring
+from pymongo.read_concern import ReadConcern
+from pymongo.write_concern import WriteConcern
+
+from core.config import settings
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Conexiones abiertas, en uso y esperando, y tiempos de checkout del pool."""
+
+    def __init__(self, samples: int = 1000):
+        self._lock = threading.Lock()
+        self.open_connections = 0
+        self.checked_out = 0
+        self.waiting = 0
+        self.checkout_failures = 0
+        self.checkout_waits = deque(maxlen=samples)  # segundos
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections -= 1
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self.waiting += 1
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.waiting -= 1
+            self.checkout_failures += 1
+            self.checkout_waits.append(event.duration)
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.waiting -= 1
+            self.checked_out += 1
+            self.checkout_waits.append(event.duration)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            waits = sorted(self.checkout_waits)
+            checked_out = self.checked_out
+            stats = {
+                "max_pool_size": settings.MONGO_MAX_POOL_SIZE,
+                "open_connections": self.open_connections,
+                "checked_out": checked_out,
+                "waiting": self.waiting,
+                "checkout_failures": self.checkout_failures,
+            }
+        stats["saturation"] = checked_out / settings.MONGO_MAX_POOL_SIZE if settings.MONGO_MAX_POOL_SIZE else 0.0
+        stats["checkout_wait_ms"] = {
+            "count": len(waits),
+            "p50": waits[len(waits) // 2] * 1000 if waits else None,
+            "p95": waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000 if waits else None,
+            "max": waits[-1] * 1000 if waits else None,
+        }
+        return stats
+
+
+pool_monitor = PoolMonitor()
+client: Optional[AsyncIOMotorClient] = None
+database: Optional[AsyncIOMotorDatabase] = None
+
+
+def client_options() -> dict:
+    """Opciones del cliente a partir de Settings (las que quedan en None usan el default del driver)."""
+    options = {
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": settings.MONGO_MAX_IDLE_TIME_MS,
+        "maxConnecting": settings.MONGO_MAX_CONNECTING,
+        "connectTimeoutMS": settings.MONGO_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "socketTimeoutMS": settings.MONGO_SOCKET_TIMEOUT_MS,
+        "waitQueueTimeoutMS": settings.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "readPreference": settings.MONGO_READ_PREFERENCE,
+    }
+    if settings.MONGO_COMPRESSORS:
+        options["compressors"] = settings.MONGO_COMPRESSORS
+    return {key: value for key, value in options.items() if value is not None}
+
+
+def _write_concern() -> Optional[WriteConcern]:
+    if settings.MONGO_WRITE_CONCERN_W is None and settings.MONGO_WRITE_CONCERN_J is None:
+        return None
+    w = settings.MONGO_WRITE_CONCERN_W
+    if isinstance(w, str) and w.isdigit():
+        w = int(w)
+    return WriteConcern(w=w, j=settings.MONGO_WRITE_CONCERN_J)
+
+
+def connect(event_listeners: Optional[list] = None) -> AsyncIOMotorDatabase:
+    """Crea el cliente (si no existe) y devuelve la base configurada."""
+    global client, database
+    if database is not None:
+        return database
+    client = AsyncIOMotorClient(
+        settings.DATABASE_URL,
+        event_listeners=[pool_monitor, *(event_listeners or [])],
+        **client_options(),
+    )
+    database = client.get_database(
+        settings.DB_NAME,
+        read_concern=ReadConcern(settings.MONGO_READ_CONCERN) if settings.MONGO_READ_CONCERN else None,
+        write_concern=_write_concern(),
+    )
+    return database
+
+
+def close():
+    global client, database
+    if client is not None:
+        client.close()
+    client = None
+    database = None
+
+
+async def warmup(connections: Optional[int] = None) -> int:
+    """
+    Abre hasta `connections` conexiones con pings concurrentes (selección de
+    servidor, handshake y autenticación quedan hechos). Devuelve las conexiones abiertas.
+    """
+    connections = settings.MONGO_WARMUP_CONNECTIONS if connections is None else connections
+    if client is None or connections <= 0:
+        return pool_monitor.open_connections
+    await asyncio.gather(*[client.admin.command("ping") for _ in range(connections)])
+    return pool_monitor.open_connections
 
-# --- Creamos el cliente y la conexión a la base de datos ---
-client = AsyncIOMotorClient(MONGO_URL)
-database = client[MONGO_DATABASE]
 
-# --- ¡¡ACÁ ESTÁ LA FUNCIÓN QUE FALTABA!! ---
-# Esta es la función que FastAPI usa como dependencia para "inyectar" la DB
 async def get_db():
     """
     Dependencia de FastAPI para obtener la instancia de la base de datos.
     """
-    return database
\ No newline at end of file
+    if database is None:
+        raise RuntimeError("El cliente de Mongo no está inicializado: se crea en el lifespan de la app")
+    return database
@@ -0,0 +1,154 @@
+# database/indexes.py
+"""
+Registro declarativo de los índices que necesitan las consultas de los servicios.
+
+Cada colección lista sus índices como `IndexModel`. `ensure_indexes` los crea al
+arrancar la app (ver el lifespan de `main.py`) y `check_indexes` informa qué
+índices faltan o no se están usando.
+
+Uso desde la línea de comandos:
+    python -m database.indexes            # crea los índices faltantes
+    python -m database.indexes --check    # solo reporta, no modifica nada
+"""
+from typing import Dict, List
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from core.config import settings
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        # get_user_by_email (/users/register) y get_user_by_username (/auth/token)
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+    ],
+    "professionals": [
+        # get_professional_by_user_id
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+        # search_professionals: texto, categoría, ciudad o sin filtro, en el orden de la
+        # página (calificación y _id), así el $limit corta sin ordenar en memoria
+        IndexModel(
+            [("search_tokens", ASCENDING), ("avg_rating", DESCENDING), ("_id", ASCENDING)],
+            name="search_tokens_avg_rating_id",
+        ),
+        IndexModel(
+            [("categories_norm", ASCENDING), ("avg_rating", DESCENDING), ("_id", ASCENDING)],
+            name="categories_norm_avg_rating_id",
+        ),
+        IndexModel([("city_norm", ASCENDING), ("avg_rating", DESCENDING), ("_id", ASCENDING)], name="city_norm_avg_rating_id"),
+        IndexModel([("avg_rating", DESCENDING), ("_id", ASCENDING)], name="avg_rating_id"),
+        # ranking_service.rebuild_category: el top de una categoría por puntaje bayesiano
+        IndexModel(
+            [("categories_norm", ASCENDING), ("bayes_score", DESCENDING), ("_id", ASCENDING)],
+            name="categories_norm_bayes_score",
+        ),
+        # search_professionals con `near`: $geoNear más los filtros de categoría y calificación.
+        # Los 2dsphere son dispersos: los profesionales sin ubicación no ocupan lugar.
+        IndexModel(
+            [("service_location", "2dsphere"), ("categories_norm", ASCENDING), ("avg_rating", DESCENDING)],
+            name="service_location_2dsphere",
+        ),
+    ],
+    "reviews": [
+        # get_reviews_for_professional (un índice por orden, el _id desempata el keyset)
+        # y el $match de reconcile_ratings
+        IndexModel(
+            [("professional_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="professional_id_created_at_id",
+        ),
+        IndexModel(
+            [("professional_id", ASCENDING), ("rating", DESCENDING), ("_id", DESCENDING)],
+            name="professional_id_rating_id",
+        ),
+    ],
+    "chat_buckets": [
+        # El upsert de chat_service.post_message busca el bucket abierto de la franja y
+        # get_history recorre las franjas desde la del cursor hacia atrás
+        IndexModel([("job_id", ASCENDING), ("bucket", DESCENDING)], name="job_id_bucket"),
+    ],
+    "idempotency_keys": [
+        # Las respuestas guardadas por utils/idempotency.py vencen solas
+        IndexModel([("created_at", ASCENDING)], name="created_at_ttl", expireAfterSeconds=settings.IDEMPOTENCY_TTL_SECONDS),
+    ],
+    "jobs": [
+        IndexModel([("client_id", ASCENDING)], name="client_id"),
+        IndexModel([("professional_id", ASCENDING)], name="professional_id"),
+        IndexModel([("status", ASCENDING)], name="status"),
+    ],
+    "payments": [
+        IndexModel([("job_id", ASCENDING)], name="job_id"),
+    ],
+    "outbox": [
+        # claim_batch: mensajes listos para enviar y los reclamados por un worker
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="status_next_attempt_at"),
+        IndexModel([("claim_id", ASCENDING)], name="claim_id", sparse=True),
+        # Los enviados se borran solos a los 7 días
+        IndexModel([("sent_at", ASCENDING)], name="sent_at_ttl", expireAfterSeconds=7 * 24 * 3600),
+    ],
+}
+
+
+def _key_of(spec) -> tuple:
+    """Normaliza la clave de un índice a una tupla comparable de (campo, dirección)."""
+    return tuple((field, direction) for field, direction in spec)
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> Dict[str, List[str]]:
+    """Crea (si no existen) todos los índices del registro. Devuelve los nombres por colección."""
+    created = {}
+    for collection, models in INDEXES.items():
+        created[collection] = await db[collection].create_indexes(models)
+    return created
+
+
+async def check_indexes(db: AsyncIOMotorDatabase) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Compara el registro contra la base de datos sin modificar nada.
+
+    Para cada colección devuelve:
+      - "missing": índices declarados que no existen en la base.
+      - "unused": índices existentes (salvo `_id_`) sin operaciones según `$indexStats`
+        desde el último reinicio del mongod.
+    """
+    report = {}
+    for collection, models in INDEXES.items():
+        existing = await db[collection].index_information()
+        existing_keys = {_key_of(info["key"]) for info in existing.values()}
+        missing = [
+            model.document["name"]
+            for model in models
+            if _key_of(model.document["key"].items()) not in existing_keys
+        ]
+
+        unused = []
+        if existing:
+            stats = await db[collection].aggregate([{"$indexStats": {}}]).to_list(length=None)
+            unused = [
+                stat["name"] for stat in stats
+                if stat["name"] != "_id_" and stat["accesses"]["ops"] == 0
+            ]
+
+        report[collection] = {"missing": missing, "unused": sorted(unused)}
+    return report
+
+
+if __name__ == "__main__":
+    import asyncio
+    import sys
+
+    from database import databaseMongo
+
+    async def _main(check_only: bool):
+        database = databaseMongo.connect()
+        if check_only:
+            report = await check_indexes(database)
+            for collection, result in report.items():
+                print(f"{collection}: faltantes={result['missing']} sin uso={result['unused']}")
+        else:
+            created = await ensure_indexes(database)
+            for collection, names in created.items():
+                print(f"{collection}: {names}")
+        databaseMongo.close()
+
+    asyncio.run(_main("--check" in sys.argv))
@@ -1,18 +1,55 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse, PlainTextResponse
 from routers import (
     auth_router, 
     users_router, 
     professionals_router, 
     jobs_router, 
     reviews_router, 
-    admin_router
+    admin_router,
+    exports_router,
+    health_router,
+    chat_router,
+    payments_router
 )
 from fastapi.middleware.cors import CORSMiddleware
+from core.config import settings
+from database import databaseMongo
+from database.indexes import ensure_indexes
+from services import outbox_service, review_service
+from utils.idempotency import REPLAYED_HEADER
+from utils.metrics import MetricsMiddleware, mongo_command_metrics, render_metrics
+from utils.pagination import NEXT_CURSOR_HEADER
+from utils.security import PasswordHasherBusyError
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Cliente de Mongo con el pool configurado; lo calentamos y creamos los índices antes de aceptar tráfico
+    database = databaseMongo.connect(event_listeners=[mongo_command_metrics])
+    await databaseMongo.warmup()
+    await ensure_indexes(database)
+
+    background_tasks = []
+    if settings.RATING_RECONCILE_INTERVAL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(
+            review_service.reconcile_ratings_periodically(database, settings.RATING_RECONCILE_INTERVAL_SECONDS)
+        ))
+    if settings.OUTBOX_WORKER_ENABLED:
+        background_tasks.append(asyncio.create_task(outbox_service.run_outbox_worker(database)))
+    yield
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    databaseMongo.close()
 
 app = FastAPI(
     title="Marketplace API",
     description="API para conectar clientes con profesionales de servicios.",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 origins = [
     "http://localhost:5173", # Si usás Vite para React
@@ -25,7 +62,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", REPLAYED_HEADER],
 )
+# Latencia, tamaño de respuesta y comandos de Mongo por ruta (ver /metrics)
+app.add_middleware(MetricsMiddleware)
+
+@app.exception_handler(PasswordHasherBusyError)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusyError):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Servidor ocupado, reintentá en unos segundos"},
+        headers={"Retry-After": "1"},
+    )
+
 # Incluimos los routers a la aplicación principal
 app.include_router(auth_router.router)
 app.include_router(users_router.router)
@@ -33,7 +82,16 @@ app.include_router(professionals_router.router)
 app.include_router(jobs_router.router)
 app.include_router(reviews_router.router)
 app.include_router(admin_router.router)
+app.include_router(exports_router.router)
+app.include_router(health_router.router)
+app.include_router(chat_router.router)
+app.include_router(payments_router.router)
 
 @app.get("/")
 def read_root():
-    return {"status": "Marketplace API está funcionando correctamente!"}
\ No newline at end of file
+    return {"status": "Marketplace API está funcionando correctamente!"}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Métricas de este proceso en formato de texto de Prometheus."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
\ No newline at end of file
@@ -1,25 +1,76 @@
 # routers/admin_router.py
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from database.databaseMongo import get_db
 from schemas.dashboard_schema import DashboardStats
-from services import admin_service
+from services import admin_service, chat_service, outbox_service, professional_service, ranking_service, review_service
+from utils.auth_service import require_admin
+from utils.cache import cache_stats
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
+# Reconstrucciones sobre colecciones enteras y datos internos del proceso: solo
+# administradores. GET /admin/stats sigue siendo público, como antes.
+_ADMIN_ONLY = [Depends(require_admin)]
 
 @router.get("/stats", response_model=DashboardStats)
-async def get_dashboard_stats(db: AsyncIOMotorDatabase = Depends(get_db)):
-    total_users = await admin_service.get_total_users(db)
-    total_professionals = await admin_service.get_total_professionals(db)
-    total_jobs = await admin_service.get_total_jobs(db)
-    jobs_by_state = await admin_service.get_jobs_by_state(db)
-    professionals_by_category = await admin_service.get_professionals_by_category(db)
-    
-    return DashboardStats(
-        total_users=total_users,
-        total_professionals=total_professionals,
-        total_jobs=total_jobs,
-        jobs_by_state=jobs_by_state,
-        professionals_by_category=professionals_by_category,
-    )
\ No newline at end of file
+async def get_dashboard_stats(
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    max_staleness: Optional[int] = Query(
+        None, ge=0,
+        description="Segundos máximos desde la última reconstrucción; si se superan, se recalcula (0 = siempre)"
+    )
+):
+    stats = await admin_service.get_dashboard_stats(db, max_staleness=max_staleness)
+    return DashboardStats(**stats)
+
+@router.post("/stats/rebuild", response_model=DashboardStats, dependencies=_ADMIN_ONLY)
+async def rebuild_dashboard_stats(db: AsyncIOMotorDatabase = Depends(get_db)):
+    """Recalcula las estadísticas materializadas desde las colecciones."""
+    stats = await admin_service.rebuild_dashboard_stats(db)
+    return DashboardStats(**admin_service.format_dashboard_stats(stats))
+
+@router.post("/maintenance/reindex-search", dependencies=_ADMIN_ONLY)
+async def reindex_professional_search(db: AsyncIOMotorDatabase = Depends(get_db)):
+    """Completa los campos de búsqueda de profesionales creados antes de existir el buscador."""
+    updated = await professional_service.reindex_search_fields(db)
+    return {"updated": updated}
+
+
+@router.post("/maintenance/reconcile-ratings", dependencies=_ADMIN_ONLY)
+async def reconcile_professional_ratings(db: AsyncIOMotorDatabase = Depends(get_db)):
+    """
+    Recalcula los ratings desde `reviews` y corrige los profesionales desviados. Si
+    corrigió alguno, reconstruye también los tableros de ranking.
+    """
+    fixed = await review_service.reconcile_ratings(db)
+    leaderboards = await ranking_service.rebuild_leaderboards(db) if fixed else 0
+    return {"fixed": fixed, "leaderboards": leaderboards}
+
+
+@router.post("/maintenance/rebuild-leaderboards", dependencies=_ADMIN_ONLY)
+async def rebuild_leaderboards(db: AsyncIOMotorDatabase = Depends(get_db)):
+    """
+    Recalcula `bayes_score` de todos los profesionales y reescribe los tableros de
+    /professionals/top. Hay que correrlo una vez sobre datos previos al ranking
+    (también con `python -m services.ranking_service`).
+    """
+    written = await ranking_service.rebuild_leaderboards(db)
+    return {"leaderboards": written}
+
+
+@router.get("/caches", dependencies=_ADMIN_ONLY)
+async def get_cache_stats():
+    """Tamaño, hits, misses y hit ratio de las cachés en memoria de este proceso."""
+    return cache_stats()
+
+@router.get("/outbox", dependencies=_ADMIN_ONLY)
+async def get_outbox_stats(db: AsyncIOMotorDatabase = Depends(get_db)):
+    """Profundidad del outbox de emails por estado y latencia de envío de este proceso."""
+    return await outbox_service.outbox_stats(db)
+
+@router.get("/chat", dependencies=_ADMIN_ONLY)
+async def get_chat_stats():
+    """Salas y conexiones de chat abiertas en este proceso, mensajes repartidos y clientes lentos descartados."""
+    return chat_service.chat_hub.stats()
@@ -7,7 +7,7 @@ from database.databaseMongo import get_db
 from schemas.token_schema import Token
 from services import user_service
 from utils.auth_service import create_access_token
-from utils.security import verify_password
+from utils.security import verify_and_update_password_async
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
@@ -16,13 +16,19 @@ async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(), 
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
-    user = await user_service.get_user_by_username(db, form_data.username)
-    if not user or not verify_password(form_data.password, user["password"]):
+    user = await user_service.get_user_by_username(db, form_data.username, projection=user_service.LOGIN_PROJECTION)
+    is_valid, new_hash = (False, None)
+    if user:
+        is_valid, new_hash = await verify_and_update_password_async(form_data.password, user["password"])
+    if not is_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        # Cambió BCRYPT_ROUNDS: aprovechamos que tenemos la contraseña en claro para rehashear
+        await user_service.update_password_hash(db, user["_id"], new_hash)
     # Corregido para usar user_id en el token
     access_token = create_access_token(data={"user_id": str(user["_id"])})
     return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
@@ -0,0 +1,113 @@
+# routers/chat_router.py
+import asyncio
+import json
+from typing import List, Optional
+
+from bson import ObjectId
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, status
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import ValidationError
+
+from database.databaseMongo import get_db
+from schemas.chat_schema import ChatMessageIn, ChatMessageOut
+from schemas.user_schemas import UserOut
+from services import chat_service
+from services.chat_service import SlowConsumerError, Subscriber, chat_hub
+from utils.auth_service import get_current_user, get_user_from_token
+from utils.pagination import NEXT_CURSOR_HEADER, InvalidCursorError
+from utils.serialization import FastJSONResponse, serialize_many
+
+router = APIRouter(prefix="/chat", tags=["Chat"])
+
+async def _require_participant(db: AsyncIOMotorDatabase, job_id: str, user_id: str):
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ID de trabajo inválido")
+    participants = await chat_service.get_participants(db, job_id)
+    if participants is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Trabajo no encontrado")
+    if user_id not in participants:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No participás de este trabajo")
+
+@router.get("/jobs/{job_id}/messages", response_model=List[ChatMessageOut])
+async def get_chat_history(
+    job_id: str,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_user: UserOut = Depends(get_current_user),
+    limit: int = Query(50, ge=1, le=200, description="Máximo de mensajes por página"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco devuelto en el header X-Next-Cursor")
+):
+    """
+    Historial del chat del trabajo, del mensaje más nuevo al más viejo.
+    Si hay más, el header `X-Next-Cursor` trae el cursor de la página siguiente.
+    """
+    await _require_participant(db, job_id, current_user.id)
+    try:
+        messages, next_cursor = await chat_service.get_history(db, job_id, limit, cursor=cursor)
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return FastJSONResponse(serialize_many(ChatMessageOut, messages), headers=headers)
+
+def _error_payload(detail: str) -> bytes:
+    return json.dumps({"error": detail}).encode()
+
+async def _send_loop(websocket: WebSocket, subscriber: Subscriber):
+    """Único escritor del socket: vacía la cola de la conexión en orden."""
+    while True:
+        payload = await subscriber.next_payload()
+        await websocket.send_text(payload.decode())
+
+async def _receive_loop(websocket: WebSocket, db: AsyncIOMotorDatabase, job_id: str, user_id: str, subscriber: Subscriber):
+    while True:
+        raw = await websocket.receive_text()
+        try:
+            message_in = ChatMessageIn(**json.loads(raw))
+        except (ValueError, TypeError):
+            subscriber.offer(_error_payload("Se esperaba {\"text\": \"...\"}"))
+            continue
+        # La escritura marca el ritmo: un cliente que manda de más espera a Mongo
+        message = await chat_service.post_message(db, job_id, user_id, message_in)
+        chat_hub.publish(job_id, message)
+
+@router.websocket("/jobs/{job_id}/ws")
+async def chat_socket(
+    websocket: WebSocket,
+    job_id: str,
+    token: Optional[str] = Query(None),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """
+    Chat en vivo del trabajo. El JWT va en `?token=` (los navegadores no mandan
+    headers en el handshake) o en `Authorization: Bearer`. Cada mensaje entrante
+    es `{"text": "..."}`; se guarda y se reparte a todos los sockets del trabajo,
+    incluido el que lo envió.
+    """
+    if token is None:
+        scheme, _, credentials = websocket.headers.get("authorization", "").partition(" ")
+        token = credentials if scheme.lower() == "bearer" else None
+    try:
+        if not token:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+        user = await get_user_from_token(db, token)
+        await _require_participant(db, job_id, user.id)
+    except (HTTPException, ValidationError):
+        # Token inválido, usuario que no participa o documento de usuario inconsistente:
+        # el handshake se rechaza con 1008 en lugar de cortar el socket con un error
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    subscriber = Subscriber(user.id)
+    chat_hub.subscribe(job_id, subscriber)
+    sender = asyncio.create_task(_send_loop(websocket, subscriber))
+    receiver = asyncio.create_task(_receive_loop(websocket, db, job_id, user.id, subscriber))
+    try:
+        done, _ = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+        if sender in done and isinstance(sender.exception(), SlowConsumerError):
+            # El cliente no leía: se cierra y recupera lo perdido desde el historial
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+    finally:
+        chat_hub.unsubscribe(job_id, subscriber)
+        for task in (sender, receiver):
+            task.cancel()
+        await asyncio.gather(sender, receiver, return_exceptions=True)
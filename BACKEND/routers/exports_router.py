@@ -0,0 +1,113 @@
+# routers/exports_router.py
+from datetime import datetime
+from typing import Literal, Optional
+
+from bson import ObjectId
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from database.databaseMongo import get_db
+from schemas.job_schema import JobStatus
+from services import export_service
+from utils.auth_service import get_current_user
+from utils.text import normalize_text
+
+router = APIRouter(
+    prefix="/exports",
+    tags=["Exports"],
+    dependencies=[Depends(get_current_user)]
+)
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+ExportFormat = Literal["ndjson", "csv"]
+
+
+def _object_id(value: Optional[str], name: str) -> Optional[ObjectId]:
+    if value is None:
+        return None
+    if not ObjectId.is_valid(value):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"{name} inválido")
+    return ObjectId(value)
+
+
+def _created_range(created_from: Optional[datetime], created_to: Optional[datetime]) -> dict:
+    created = {}
+    if created_from:
+        created["$gte"] = created_from
+    if created_to:
+        created["$lt"] = created_to
+    return {"created_at": created} if created else {}
+
+
+def _streaming_response(db, collection: str, query: dict, export_format: str, resume_after: Optional[str]):
+    stream = export_service.export_stream(
+        db, collection, query, export_format, resume_after=_object_id(resume_after, "resume_after")
+    )
+    filename = f"{collection}-{datetime.utcnow():%Y%m%d%H%M%S}.{export_format}"
+    return StreamingResponse(
+        stream,
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/jobs")
+async def export_jobs(
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    format: ExportFormat = Query("ndjson"),
+    status_filter: Optional[JobStatus] = Query(None, alias="status"),
+    category: Optional[str] = Query(None),
+    client_id: Optional[str] = Query(None),
+    professional_id: Optional[str] = Query(None),
+    created_from: Optional[datetime] = Query(None),
+    created_to: Optional[datetime] = Query(None),
+    resume_after: Optional[str] = Query(None, description="_id de la última fila recibida, para retomar")
+):
+    """Exporta trabajos en NDJSON o CSV, en streaming y ordenados por _id."""
+    query = _created_range(created_from, created_to)
+    if status_filter:
+        query["status"] = status_filter.value
+    if category:
+        query["category"] = category
+    if client_id:
+        query["client_id"] = _object_id(client_id, "client_id")
+    if professional_id:
+        query["professional_id"] = _object_id(professional_id, "professional_id")
+    return _streaming_response(db, "jobs", query, format, resume_after)
+
+
+@router.get("/professionals")
+async def export_professionals(
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    format: ExportFormat = Query("ndjson"),
+    category: Optional[str] = Query(None),
+    city: Optional[str] = Query(None),
+    min_rating: Optional[float] = Query(None, ge=0, le=5),
+    resume_after: Optional[str] = Query(None, description="_id de la última fila recibida, para retomar")
+):
+    """Exporta profesionales en NDJSON o CSV, en streaming y ordenados por _id."""
+    query = {}
+    if category:
+        query["categories_norm"] = normalize_text(category)
+    if city:
+        query["city_norm"] = normalize_text(city)
+    if min_rating is not None:
+        query["avg_rating"] = {"$gte": min_rating}
+    return _streaming_response(db, "professionals", query, format, resume_after)
+
+
+@router.get("/reviews")
+async def export_reviews(
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    format: ExportFormat = Query("ndjson"),
+    professional_id: Optional[str] = Query(None),
+    created_from: Optional[datetime] = Query(None),
+    created_to: Optional[datetime] = Query(None),
+    resume_after: Optional[str] = Query(None, description="_id de la última fila recibida, para retomar")
+):
+    """Exporta reseñas en NDJSON o CSV, en streaming y ordenadas por _id."""
+    query = _created_range(created_from, created_to)
+    if professional_id:
+        query["professional_id"] = _object_id(professional_id, "professional_id")
+    return _streaming_response(db, "reviews", query, format, resume_after)
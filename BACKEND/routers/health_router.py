@@ -0,0 +1,29 @@
+# routers/health_router.py
+import time
+
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import JSONResponse
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import PyMongoError
+
+from database.databaseMongo import get_db, pool_monitor
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+@router.get("/db")
+async def database_health(db: AsyncIOMotorDatabase = Depends(get_db)):
+    """
+    Estado de la conexión a Mongo: latencia de un ping y uso del pool de este
+    proceso (conexiones abiertas, en uso, esperando y tiempo de checkout).
+    `saturation` cerca de 1 o `waiting` > 0 indican que el pool quedó chico.
+    """
+    pool = pool_monitor.snapshot()
+    started = time.perf_counter()
+    try:
+        await db.command("ping")
+    except PyMongoError as exc:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "unavailable", "error": str(exc), "pool": pool},
+        )
+    return {"status": "ok", "ping_ms": (time.perf_counter() - started) * 1000, "pool": pool}
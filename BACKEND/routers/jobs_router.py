@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from typing import List
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, status, Query, Request
+from typing import List, Literal, Optional, Union
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
 
 from schemas import job_schema
+from schemas.user_schemas import UserOut
+from core.config import settings
 from database.databaseMongo import get_db
+from services import job_service, professional_service
+from utils import idempotency
 from utils.auth_service import get_current_user
+from utils.pagination import NEXT_CURSOR_HEADER, InvalidCursorError
+from utils.serialization import FastJSONResponse, serialize, serialize_many
 
 router = APIRouter(
     prefix="/jobs",
@@ -14,31 +20,111 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=job_schema.JobOut, status_code=status.HTTP_201_CREATED)
-async def create_job(job_data: job_schema.JobIn, db: AsyncIOMotorDatabase = Depends(get_db)):
-    job_doc = job_data.model_dump()
-    result = await db.jobs.insert_one(job_doc)
-    created_job = await db.jobs.find_one({"_id": result.inserted_id})
-    return created_job
+async def create_job(
+    job_data: job_schema.JobIn,
+    request: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_user: UserOut = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias=idempotency.IDEMPOTENCY_HEADER)
+):
+    """
+    Crea un trabajo. Con `Idempotency-Key`, un reintento devuelve el trabajo ya
+    creado en lugar de insertar otro (ver utils/idempotency.py).
+    """
+    async def execute():
+        # Pasamos por el servicio: completa client_id, estado y fecha, y mantiene las estadísticas
+        created_job = await job_service.create_job(db, job_data, current_user.id)
+        return FastJSONResponse(serialize(job_schema.JobOut, created_job), status_code=status.HTTP_201_CREATED)
+
+    return await idempotency.run(request, db, idempotency_key, current_user.id, execute)
+
+# El tope del lote se valida al parsear el cuerpo: la validación corta en el primer
+# ítem de más, sin validar el resto (422 si el lote está vacío o es demasiado grande)
+def _bulk_body():
+    return Body(..., min_length=1, max_length=settings.JOBS_BULK_MAX_ITEMS)
+
+@router.post("/bulk", response_model=job_schema.BulkJobResult)
+async def create_jobs_bulk(
+    jobs_data: List[job_schema.JobIn] = _bulk_body(),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_user: UserOut = Depends(get_current_user)
+):
+    """
+    Crea un lote de trabajos en un solo round trip (`insert_many` desordenado).
+    Devuelve el resultado de cada ítem en el mismo orden del lote.
+    """
+    return await job_service.create_jobs_bulk(db, jobs_data, current_user.id)
+
+@router.patch("/bulk", response_model=job_schema.BulkJobResult)
+async def update_jobs_bulk(
+    updates: List[job_schema.JobBulkUpdateItem] = _bulk_body(),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_user: UserOut = Depends(get_current_user)
+):
+    """
+    Actualiza un lote de trabajos propios (como cliente) en un solo `bulk_write`
+    desordenado. Devuelve el resultado de cada ítem: los ids que no existen o que
+    son de otro cliente vuelven con error.
+    """
+    return await job_service.update_jobs_bulk(db, updates, current_user.id)
 
 # --- ENDPOINT MEJORADO ---
-@router.get("/all", response_model=List[job_schema.JobOut])
+@router.get("/all", response_model=Union[List[job_schema.JobOut], List[job_schema.JobCard]])
 async def get_all_jobs(
     db: AsyncIOMotorDatabase = Depends(get_db),
-    skip: int = Query(0, ge=0, description="Número de trabajos a saltear"),
-    limit: int = Query(20, ge=1, le=100, description="Máximo de trabajos por página")
+    view: Literal["full", "card"] = Query("full", description="`card` devuelve los trabajos sin la descripción"),
+    skip: int = Query(0, ge=0, description="Número de trabajos a saltear (se ignora si viene `cursor`)"),
+    limit: int = Query(20, ge=1, le=100, description="Máximo de trabajos por página"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco devuelto en el header X-Next-Cursor")
 ):
     """
     Obtiene una lista paginada de todos los trabajos.
+    Si hay más resultados, el header `X-Next-Cursor` trae el cursor de la página siguiente.
     """
-    jobs_cursor = db.jobs.find().skip(skip).limit(limit)
-    jobs_list = await jobs_cursor.to_list(length=limit)
-    return jobs_list
+    model, projection = (
+        (job_schema.JobCard, job_service.JOB_CARD_PROJECTION) if view == "card"
+        else (job_schema.JobOut, job_service.JOB_PROJECTION)
+    )
+    try:
+        jobs_list, next_cursor = await job_service.get_jobs_page(db, limit, cursor=cursor, skip=skip, projection=projection)
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    # Salida confiable de la base: se convierte sin revalidar cada documento
+    return FastJSONResponse(serialize_many(model, jobs_list), headers=headers)
 
 @router.get("/{job_id}", response_model=job_schema.JobOut)
 async def get_job_by_id(job_id: str, db: AsyncIOMotorDatabase = Depends(get_db)):
     if not ObjectId.is_valid(job_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ID de trabajo inválido")
-    job = await db.jobs.find_one({"_id": ObjectId(job_id)})
+    job = await job_service.get_job_by_id(db, job_id)
     if job:
-        return job
-    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Trabajo no encontrado")
\ No newline at end of file
+        return FastJSONResponse(serialize(job_schema.JobOut, job))
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Trabajo no encontrado")
+
+@router.post("/{job_id}/{action}", response_model=job_schema.JobOut)
+async def transition_job(
+    job_id: str,
+    action: job_schema.JobTransition,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_user: UserOut = Depends(get_current_user)
+):
+    """
+    Cambia el estado del trabajo: `accept`, `start` y `complete` las hace el
+    profesional; `cancel`, el cliente o el profesional antes de que empiece.
+    404 si el trabajo no existe o no le corresponde al usuario, 409 si su estado
+    actual no admite la acción.
+    """
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ID de trabajo inválido")
+    professional_id = None
+    if current_user.role == "professional":
+        professional = await professional_service.get_professional_by_user_id(db, current_user.id, projection={"_id": 1})
+        professional_id = str(professional["_id"]) if professional else None
+    try:
+        job = await job_service.transition_job(db, job_id, action, current_user.id, professional_id)
+    except job_service.InvalidTransitionError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Trabajo no encontrado")
+    return FastJSONResponse(serialize(job_schema.JobOut, job))
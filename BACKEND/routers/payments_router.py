@@ -0,0 +1,60 @@
+# routers/payments_router.py
+from typing import Optional
+
+from bson import ObjectId
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from database.databaseMongo import get_db
+from schemas.payment_schema import PaymentIn, PaymentOut
+from schemas.user_schemas import UserOut
+from services import job_service, payment_service
+from utils import idempotency
+from utils.auth_service import get_current_user
+from utils.serialization import FastJSONResponse, serialize
+
+router = APIRouter(prefix="/payments", tags=["Payments"])
+
+@router.post("/", response_model=PaymentOut, status_code=status.HTTP_201_CREATED)
+async def create_payment(
+    payment_in: PaymentIn,
+    request: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_user: UserOut = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias=idempotency.IDEMPOTENCY_HEADER)
+):
+    """
+    Registra el pago de un trabajo por parte de su cliente. A diferencia del resto
+    de los POST, `Idempotency-Key` es obligatorio: un pago no se puede repetir.
+    """
+    if idempotency_key is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Falta el header {idempotency.IDEMPOTENCY_HEADER}",
+        )
+    if not ObjectId.is_valid(payment_in.job_id):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ID de trabajo inválido")
+
+    async def execute():
+        job = await job_service.get_job_by_id(db, payment_in.job_id)
+        if job is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Trabajo no encontrado")
+        if str(job["client_id"]) != current_user.id:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Solo el cliente del trabajo puede pagarlo")
+        payment = await payment_service.create_payment(db, payment_in, current_user.id)
+        return FastJSONResponse(serialize(PaymentOut, payment), status_code=status.HTTP_201_CREATED)
+
+    return await idempotency.run(request, db, idempotency_key, current_user.id, execute)
+
+@router.get("/{payment_id}", response_model=PaymentOut)
+async def get_payment(
+    payment_id: str,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_user: UserOut = Depends(get_current_user)
+):
+    if not ObjectId.is_valid(payment_id):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ID de pago inválido")
+    payment = await payment_service.get_payment(db, payment_id)
+    if payment is None or str(payment["payer_id"]) != current_user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Pago no encontrado")
+    return FastJSONResponse(serialize(PaymentOut, payment))
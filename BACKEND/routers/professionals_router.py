@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from typing import List, Optional, Tuple
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
 
 from schemas import professional_schema
+from core.config import settings
 from database.databaseMongo import get_db
+from services import professional_service, ranking_service
+from utils import http_cache
 from utils.auth_service import get_current_user
+from utils.pagination import NEXT_CURSOR_HEADER, InvalidCursorError
+from utils.serialization import FastJSONResponse, serialize, serialize_many
+from utils.text import normalize_text
 
 router = APIRouter(
     prefix="/professionals",
@@ -16,49 +22,97 @@ router = APIRouter(
 @router.get("/all", response_model=List[professional_schema.ProfessionalOut])
 async def get_all_professionals(
     db: AsyncIOMotorDatabase = Depends(get_db),
-    skip: int = Query(0, ge=0, description="Número de profesionales a saltear"),
-    limit: int = Query(20, ge=1, le=100, description="Máximo de profesionales por página")
+    skip: int = Query(0, ge=0, description="Número de profesionales a saltear (se ignora si viene `cursor`)"),
+    limit: int = Query(20, ge=1, le=100, description="Máximo de profesionales por página"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco devuelto en el header X-Next-Cursor")
 ):
     """
     Obtiene una lista paginada de todos los profesionales.
+    Si hay más resultados, el header `X-Next-Cursor` trae el cursor de la página siguiente.
     """
-    professionals_cursor = db.professionals.find().skip(skip).limit(limit)
-    professionals_list = await professionals_cursor.to_list(length=limit)
-    return professionals_list
+    try:
+        professionals_list, next_cursor = await professional_service.get_professionals_page(db, limit, cursor=cursor, skip=skip)
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    # Salida confiable de la base: se convierte sin revalidar cada documento
+    return FastJSONResponse(serialize_many(professional_schema.ProfessionalOut, professionals_list), headers=headers)
 
-@router.get("/search", response_model=List[professional_schema.ProfessionalOut])
+def _parse_point(value: str) -> Tuple[float, float]:
+    try:
+        lat, lng = (float(part) for part in value.split(","))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="`near` debe tener la forma 'lat,lng'")
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Coordenadas de `near` fuera de rango")
+    return lat, lng
+
+@router.get("/search", response_model=professional_schema.ProfessionalSearchResult)
 async def search_professionals_with_filters(
     db: AsyncIOMotorDatabase = Depends(get_db),
+    q: Optional[str] = Query(None, description="Texto libre sobre título, categorías y ciudad"),
     profession: Optional[str] = Query(None, description="Filtrar por profesión (ej: Plomero)"),
+    category: Optional[str] = Query(None, description="Categoría exacta, sin importar acentos (ej: Plomería)"),
     city: Optional[str] = Query(None, description="Filtrar por ciudad (ej: Mendoza)"),
     min_rating: Optional[float] = Query(None, ge=0, le=5, description="Filtrar por calificación mínima (0 a 5)"),
+    near: Optional[str] = Query(None, description="Punto de búsqueda como 'lat,lng' (ej: -32.89,-68.84)"),
+    max_km: float = Query(professional_service.DEFAULT_NEAR_MAX_KM, gt=0, le=500, description="Distancia máxima a `near` en km"),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100)
 ):
     """
     Busca profesionales aplicando filtros avanzados y paginación.
+    Ordena por relevancia y calificación, e incluye conteos por categoría y ciudad.
+    Con `near` ordena por distancia y cada resultado trae `distance_km`.
     """
-    search_query = {}
-    if profession:
-        search_query["profession"] = {"$regex": profession, "$options": "i"}
-    if city:
-        search_query["city"] = {"$regex": city, "$options": "i"}
-    if min_rating is not None:
-        search_query["rating"] = {"$gte": min_rating}
+    text = " ".join(part for part in (q, profession) if part)
+    point = _parse_point(near) if near else None
+    search_result = await professional_service.search_professionals(
+        db, text=text, category=category, city=city, min_rating=min_rating, skip=skip, limit=limit,
+        near=point, max_km=max_km
+    )
 
-    professionals_cursor = db.professionals.find(search_query).skip(skip).limit(limit)
-    professionals_list = await professionals_cursor.to_list(length=limit)
-    
-    if not professionals_list:
+    if not search_result["results"]:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No se encontraron profesionales con esos filtros")
-        
-    return professionals_list
+
+    search_result["results"] = serialize_many(professional_schema.ProfessionalSearchHit, search_result["results"])
+    return FastJSONResponse(search_result)
+
+@router.get("/top", response_model=professional_schema.Leaderboard)
+async def get_top_professionals(
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    category: str = Query(..., min_length=1, description="Categoría, sin importar mayúsculas ni acentos (ej: Electricidad)"),
+    limit: int = Query(10, ge=1, le=settings.LEADERBOARD_SIZE)
+):
+    """
+    Mejores profesionales de la categoría según el promedio bayesiano de sus reseñas.
+    Sale de un tablero precalculado: una sola lectura, sin importar cuántos profesionales haya.
+    """
+    category_norm = normalize_text(category)
+    entries = await ranking_service.get_leaderboard(db, category_norm, limit)
+    for rank, entry in enumerate(entries, start=1):
+        entry["rank"] = rank
+    return FastJSONResponse({
+        "category": category_norm,
+        "entries": serialize_many(professional_schema.LeaderboardEntry, entries),
+    })
 
 @router.get("/{professional_id}", response_model=professional_schema.ProfessionalOut)
-async def get_professional_by_id(professional_id: str, db: AsyncIOMotorDatabase = Depends(get_db)):
+async def get_professional_by_id(professional_id: str, request: Request, db: AsyncIOMotorDatabase = Depends(get_db)):
+    """
+    Devuelve el profesional con un ETag por versión. Con `If-None-Match` vigente
+    responde 304 sin leer el documento completo.
+    """
     if not ObjectId.is_valid(professional_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ID de profesional inválido")
-    professional = await db.professionals.find_one({"_id": ObjectId(professional_id)})
-    if professional:
-        return professional
-    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profesional no encontrado")
\ No newline at end of file
+    version = await professional_service.get_professional_version(db, professional_id)
+    if version is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profesional no encontrado")
+
+    async def load_content():
+        professional = await professional_service.get_professional_by_id(db, professional_id)
+        if professional is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profesional no encontrado")
+        return serialize(professional_schema.ProfessionalOut, professional)
+
+    return await http_cache.conditional_json_response(request, "professional", professional_id, version, load_content)
\ No newline at end of file
@@ -1,34 +1,77 @@
 # routers/reviews_router.py
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from bson import ObjectId
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query, Request
+from typing import List, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from database.databaseMongo import get_db
-from schemas.review_schema import ReviewIn, ReviewOut
+from schemas.review_schema import ReviewIn, ReviewOut, ReviewSort
 from schemas.user_schemas import UserOut
 from services import review_service, professional_service
+from utils import http_cache, idempotency
 from utils.auth_service import get_current_user
+from utils.pagination import NEXT_CURSOR_HEADER, InvalidCursorError
+from utils.serialization import FastJSONResponse, serialize, serialize_many
 
 router = APIRouter(prefix="/reviews", tags=["Reviews"])
 
 @router.post("/", response_model=ReviewOut, status_code=status.HTTP_201_CREATED)
 async def add_review(
     review_in: ReviewIn, 
+    request: Request,
     db: AsyncIOMotorDatabase = Depends(get_db), 
-    current_user: UserOut = Depends(get_current_user)
+    current_user: UserOut = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias=idempotency.IDEMPOTENCY_HEADER)
 ):
-    # Verificar que el profesional exista
-    professional = await professional_service.get_professional_by_id(db, review_in.professional_id)
-    if not professional:
-        raise HTTPException(status_code=404, detail="Professional not found")
+    """
+    Agrega una reseña. Con `Idempotency-Key`, un reintento repite la respuesta
+    guardada sin volver a contar la reseña en el rating del profesional.
+    """
+    async def execute():
+        # Verificar que el profesional exista
+        professional = await professional_service.get_professional_by_id(db, review_in.professional_id, projection={"_id": 1})
+        if not professional:
+            raise HTTPException(status_code=404, detail="Professional not found")
 
-    new_review = await review_service.add_review(db, review_in, str(current_user.id))
-    return ReviewOut(**new_review)
+        new_review = await review_service.add_review(db, review_in, str(current_user.id))
+        return FastJSONResponse(serialize(ReviewOut, new_review), status_code=status.HTTP_201_CREATED)
+
+    return await idempotency.run(request, db, idempotency_key, str(current_user.id), execute)
 
 @router.get("/{professional_id}", response_model=List[ReviewOut])
 async def get_reviews_for_professional(
     professional_id: str, 
-    db: AsyncIOMotorDatabase = Depends(get_db)
+    request: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    sort: ReviewSort = Query(ReviewSort.RECENT, description="recent, oldest, best o worst"),
+    limit: int = Query(20, ge=1, le=100, description="Máximo de reseñas por página"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco devuelto en el header X-Next-Cursor")
 ):
-    reviews = await review_service.get_reviews_for_professional(db, professional_id)
-    return [ReviewOut(**review) for review in reviews]
\ No newline at end of file
+    """
+    Reseñas del profesional paginadas por cursor, con un ETag por la versión del
+    profesional (add_review la incrementa) y por página. Con `If-None-Match` vigente
+    responde 304 sin leer las reseñas. Si hay más, el header `X-Next-Cursor` trae el
+    cursor de la página siguiente.
+    """
+    if not ObjectId.is_valid(professional_id):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ID de profesional inválido")
+
+    async def load_content():
+        try:
+            reviews, next_cursor = await review_service.get_reviews_for_professional(
+                db, professional_id, limit, cursor=cursor, sort=sort
+            )
+        except InvalidCursorError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+        headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+        return serialize_many(ReviewOut, reviews), headers
+
+    version = await professional_service.get_professional_version(db, professional_id)
+    if version is None:
+        # Sin profesional no hay versión: se responde sin ETag ni caché
+        content, headers = await load_content()
+        return FastJSONResponse(content, headers=headers)
+    variant = f"{sort.value}:{limit}:{cursor or ''}"
+    return await http_cache.conditional_json_response(
+        request, "reviews", professional_id, version, load_content, variant=variant
+    )
\ No newline at end of file
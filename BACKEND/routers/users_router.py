@@ -1,25 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 
 from schemas import user_schemas
 from database.databaseMongo import get_db
-from utils.security import hash_password
+from services import outbox_service, user_service
+from utils import idempotency
 from utils.auth_service import get_current_user # Para proteger rutas de usuario
+from utils.serialization import FastJSONResponse, serialize
 
-# Simulación de un servicio de envío de emails
-def send_welcome_email(email: str, name: str):
-    """
-    Simula el envío de un correo electrónico de bienvenida.
-    En un proyecto real, esta función estaría en 'utils/email_service.py'
-    y usaría una librería como 'fastapi-mail'.
-    """
-    print("--- TAREA EN SEGUNDO PLANO INICIADA ---")
-    print(f"Enviando email de bienvenida a {name} a la dirección {email}...")
-    # Simula un tiempo de envío
-    import time
-    time.sleep(3) 
-    print(f"--- EMAIL ENVIADO a {email} ---")
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/users",
@@ -29,26 +23,48 @@ router = APIRouter(
 @router.post("/register", response_model=user_schemas.UserOut, status_code=status.HTTP_201_CREATED)
 async def register_user(
     user_in: user_schemas.UserIn, 
-    background_tasks: BackgroundTasks, # Inyectamos las tareas de fondo
-    db: AsyncIOMotorDatabase = Depends(get_db)
+    request: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias=idempotency.IDEMPOTENCY_HEADER)
 ):
     """
-    Registra un nuevo usuario en la base de datos.
+    Registra un nuevo usuario en la base de datos. Con `Idempotency-Key`, un
+    reintento recibe la misma respuesta sin volver a hashear la contraseña.
     """
-    existing_user = await db.users.find_one({"email": user_in.email})
-    if existing_user:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="El email ya está registrado")
-
-    user_doc = user_in.model_dump()
-    user_doc["password"] = hash_password(user_doc["password"])
-    
-    result = await db.users.insert_one(user_doc)
-    created_user = await db.users.find_one({"_id": result.inserted_id})
-
-    # Agregamos la tarea a la cola para que se ejecute en segundo plano
-    background_tasks.add_task(send_welcome_email, created_user["email"], created_user["first_name"])
-    
-    return created_user
+    async def execute():
+        existing_user = await user_service.get_user_by_email(db, user_in.email, projection={"_id": 1})
+        if existing_user:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="El email ya está registrado")
+
+        # Primero el email (retenido) y después el usuario: si el insert del usuario
+        # falla no queda una cuenta sin bienvenida, y el reintento vuelve a empezar
+        user_id = ObjectId()
+        message_id = await outbox_service.enqueue_welcome_email(
+            db, {**user_in.model_dump(include={"email", "first_name", "username"}), "_id": user_id}, held=True
+        )
+        try:
+            # create_user devuelve el documento insertado, sin volver a leerlo
+            created_user = await user_service.create_user(db, user_in, user_id=user_id)
+        except DuplicateKeyError:
+            await outbox_service.cancel_email(db, message_id)
+            # Otro registro con el mismo email o username ganó la carrera (índices únicos)
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="El email o el username ya están registrados")
+        except Exception:
+            # Si la cancelación también falla, el worker descarta el email al no encontrar el usuario
+            await outbox_service.cancel_email(db, message_id)
+            raise
+
+        try:
+            await outbox_service.release_email(db, message_id)
+        except Exception:
+            # El usuario ya existe: el email sale igual cuando vence la retención
+            logger.warning("No se pudo liberar el email de bienvenida %s", message_id, exc_info=True)
+
+        # El serializador solo incluye los campos de UserOut (nunca el hash de la contraseña)
+        return FastJSONResponse(serialize(user_schemas.UserOut, created_user), status_code=status.HTTP_201_CREATED)
+
+    # Sin usuario todavía: la clave queda atada al cuerpo (email y datos del registro)
+    return await idempotency.run(request, db, idempotency_key, "anonymous", execute)
 
 # Endpoint de ejemplo para ver los datos del usuario logueado
 @router.get("/me", response_model=user_schemas.UserOut)
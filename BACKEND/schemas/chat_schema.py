@@ -0,0 +1,16 @@
+# schemas/chat_schema.py
+from pydantic import BaseModel, constr, Field
+from datetime import datetime
+
+class ChatMessageIn(BaseModel):
+    text: constr(min_length=1, max_length=2000)
+
+class ChatMessageOut(BaseModel):
+    id: str = Field(..., alias="_id")
+    job_id: str
+    sender_id: str
+    text: str
+    sent_at: datetime
+
+    class Config:
+        from_attributes = True
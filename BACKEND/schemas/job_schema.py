@@ -2,7 +2,7 @@
 from pydantic import BaseModel, constr, Field
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 
 class JobStatus(str, Enum):
     POSTED = "posted"
@@ -11,6 +11,13 @@ class JobStatus(str, Enum):
     COMPLETED = "completed"
     CANCELLED = "cancelled"
 
+class JobTransition(str, Enum):
+    """Acciones de POST /jobs/{id}/{acción}; la tabla está en job_service.JOB_TRANSITIONS."""
+    ACCEPT = "accept"
+    START = "start"
+    COMPLETE = "complete"
+    CANCEL = "cancel"
+
 class JobBase(BaseModel):
     title: constr(min_length=5, max_length=100)
     description: constr(max_length=2000)
@@ -36,3 +43,41 @@ class JobOut(JobBase):
 
     class Config:
         from_attributes = True
+
+class JobCard(BaseModel):
+    """Versión liviana de JobOut para listados: sin la descripción."""
+    id: str = Field(..., alias="_id")
+    title: str
+    category: str
+    budget: float
+    client_id: str
+    professional_id: str
+    status: JobStatus
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class JobBulkUpdateItem(BaseModel):
+    """Ítem de PATCH /jobs/bulk. El estado no se edita acá: va por POST /jobs/{id}/{acción}."""
+    id: str
+    title: Optional[constr(min_length=5, max_length=100)] = None
+    description: Optional[constr(max_length=2000)] = None
+    category: Optional[str] = None
+    budget: Optional[float] = None
+
+    class Config:
+        extra = "forbid"
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    ok: bool
+    error: Optional[str] = None
+
+class BulkJobResult(BaseModel):
+    ok_count: int
+    error_count: int
+    matched_count: Optional[int] = None
+    modified_count: Optional[int] = None
+    items: List[BulkItemResult]
@@ -0,0 +1,26 @@
+# schemas/payment_schema.py
+from pydantic import BaseModel, constr, Field
+from datetime import datetime
+from enum import Enum
+
+class PaymentStatus(str, Enum):
+    PENDING = "pending"
+    PAID = "paid"
+    FAILED = "failed"
+
+class PaymentIn(BaseModel):
+    job_id: str
+    amount: float = Field(..., gt=0)
+    currency: constr(min_length=3, max_length=3) = "ARS"
+
+class PaymentOut(BaseModel):
+    id: str = Field(..., alias="_id")
+    job_id: str
+    payer_id: str
+    amount: float
+    currency: str
+    status: PaymentStatus
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -1,6 +1,6 @@
 # schemas/professional_schema.py
-from pydantic import BaseModel, constr, Field
-from typing import List, Optional
+from pydantic import BaseModel, confloat, constr, Field
+from typing import Dict, List, Literal, Optional, Tuple
 from enum import Enum
 
 class VerificationStatus(str, Enum):
@@ -9,10 +9,19 @@ class VerificationStatus(str, Enum):
     VERIFIED = "verified"
     REJECTED = "rejected"
 
+class GeoPoint(BaseModel):
+    """Punto GeoJSON: `coordinates` es [longitud, latitud]."""
+    type: Literal["Point"] = "Point"
+    coordinates: Tuple[confloat(ge=-180, le=180), confloat(ge=-90, le=90)]
+
 class ProfessionalBase(BaseModel):
     headline: constr(max_length=100)
     bio: constr(max_length=1000)
     categories: List[str] = Field(default_factory=list)
+    city: Optional[constr(max_length=100)] = None
+    # Desde dónde trabaja y hasta qué distancia se mueve (opcionales)
+    service_location: Optional[GeoPoint] = None
+    service_radius_km: Optional[confloat(gt=0, le=500)] = None
 
 class ProfessionalIn(ProfessionalBase):
     pass
@@ -21,14 +30,52 @@ class ProfessionalUpdate(BaseModel):
     headline: Optional[constr(max_length=100)] = None
     bio: Optional[constr(max_length=1000)] = None
     categories: Optional[List[str]] = None
+    city: Optional[constr(max_length=100)] = None
+    service_location: Optional[GeoPoint] = None
+    service_radius_km: Optional[confloat(gt=0, le=500)] = None
 
 class ProfessionalOut(ProfessionalBase):
     id: str = Field(..., alias="_id")
     user_id: str
     avg_rating: float = 0.0
     total_reviews: int = 0
+    # Cantidad de reseñas por estrellas ("1" a "5"), mantenida por add_review
+    rating_histogram: Dict[str, int] = Field(default_factory=dict)
     verification_status: VerificationStatus = VerificationStatus.NOT_SUBMITTED
     document_urls: Optional[List[str]] = Field(default_factory=list)
 
     class Config:
         from_attributes = True
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+class SearchFacets(BaseModel):
+    categories: List[FacetCount] = Field(default_factory=list)
+    cities: List[FacetCount] = Field(default_factory=list)
+
+class ProfessionalSearchHit(ProfessionalOut):
+    # Solo en búsquedas por cercanía (`near`)
+    distance_km: Optional[float] = None
+
+class ProfessionalSearchResult(BaseModel):
+    total: int
+    # True si hay más coincidencias que SEARCH_FACET_SCAN_LIMIT: total y facetas son una cota
+    total_capped: bool = False
+    results: List[ProfessionalSearchHit]
+    facets: SearchFacets
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    professional_id: str
+    headline: str
+    city: Optional[str] = None
+    avg_rating: float = 0.0
+    total_reviews: int = 0
+    # Promedio bayesiano: el criterio del ranking (ver services/ranking_service.py)
+    bayes_score: float
+
+class Leaderboard(BaseModel):
+    category: str
+    entries: List[LeaderboardEntry]
@@ -2,6 +2,13 @@
 from pydantic import BaseModel, constr, conint, Field
 from datetime import datetime
 from typing import Optional
+from enum import Enum
+
+class ReviewSort(str, Enum):
+    RECENT = "recent"
+    OLDEST = "oldest"
+    BEST = "best"
+    WORST = "worst"
 
 class ReviewBase(BaseModel):
     rating: conint(ge=1, le=5)
@@ -1,14 +1,40 @@
 # services/admin_service.py
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, Optional
+from urllib.parse import unquote
+
+from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
+
+from core.config import settings
+
+# Estadísticas del dashboard materializadas en un único documento, mantenido con $inc
+# por las escrituras de user_service, professional_service y job_service. Cada una
+# corre dentro de `pending_stats_write`, que deja una marca en `pending` mientras la
+# escritura está en curso para que `rebuild_dashboard_stats` no cuente a medias.
+STATS_COLLECTION = "stats"
+DASHBOARD_STATS_ID = "dashboard"
+
+
+def _encode_key(key) -> str:
+    """Las claves de los mapas no pueden tener '.' ni empezar con '$' en Mongo."""
+    return str(key).replace("%", "%25").replace(".", "%2E").replace("$", "%24")
+
+def _decode_key(key: str) -> str:
+    return unquote(key)
+
 
 async def get_total_users(db: AsyncIOMotorDatabase) -> int:
-    return await db["users"].count_documents({})
+    return await db["users"].estimated_document_count()
 
 async def get_total_professionals(db: AsyncIOMotorDatabase) -> int:
-    return await db["professionals"].count_documents({})
+    return await db["professionals"].estimated_document_count()
 
 async def get_total_jobs(db: AsyncIOMotorDatabase) -> int:
-    return await db["jobs"].count_documents({})
+    return await db["jobs"].estimated_document_count()
 
 async def get_jobs_by_state(db: AsyncIOMotorDatabase) -> list:
     pipeline = [
@@ -19,7 +45,219 @@ async def get_jobs_by_state(db: AsyncIOMotorDatabase) -> list:
 
 async def get_professionals_by_category(db: AsyncIOMotorDatabase) -> list:
     pipeline = [
-        {"$group": {"_id": "$categories", "count": {"$sum": 1}}} # Corregido a 'categories' que es una lista
+        {"$unwind": "$categories"},
+        {"$group": {"_id": "$categories", "count": {"$sum": 1}}}
     ]
     cursor = db["professionals"].aggregate(pipeline)
-    return await cursor.to_list(length=None)
\ No newline at end of file
+    return await cursor.to_list(length=None)
+
+
+async def compute_live_stats(db: AsyncIOMotorDatabase) -> dict:
+    """
+    Calcula las estadísticas desde las colecciones: los totales con
+    `estimated_document_count` y los agrupados en un solo `$facet`, todo en paralelo.
+    """
+    breakdown_pipeline = [
+        {"$project": {"status": 1, "_kind": {"$literal": "job"}}},
+        {"$unionWith": {"coll": "professionals", "pipeline": [
+            {"$project": {"categories": 1, "_kind": {"$literal": "professional"}}}
+        ]}},
+        {"$facet": {
+            "jobs_by_state": [
+                {"$match": {"_kind": "job"}},
+                {"$group": {"_id": "$status", "count": {"$sum": 1}}},
+            ],
+            "professionals_by_category": [
+                {"$match": {"_kind": "professional"}},
+                {"$unwind": "$categories"},
+                {"$group": {"_id": "$categories", "count": {"$sum": 1}}},
+            ],
+        }},
+    ]
+    total_users, total_professionals, total_jobs, breakdown = await asyncio.gather(
+        get_total_users(db),
+        get_total_professionals(db),
+        get_total_jobs(db),
+        db["jobs"].aggregate(breakdown_pipeline).to_list(length=1),
+    )
+    facet = breakdown[0] if breakdown else {"jobs_by_state": [], "professionals_by_category": []}
+    return {
+        "total_users": total_users,
+        "total_professionals": total_professionals,
+        "total_jobs": total_jobs,
+        "jobs_by_state": {_encode_key(i["_id"]): i["count"] for i in facet["jobs_by_state"]},
+        "professionals_by_category": {_encode_key(i["_id"]): i["count"] for i in facet["professionals_by_category"]},
+    }
+
+
+async def rebuild_dashboard_stats(db: AsyncIOMotorDatabase, attempts: int = 3) -> dict:
+    """
+    Reemplaza el documento materializado con los valores reales (corrige desvíos).
+
+    Una escritura en curso ya puede estar en las colecciones sin que su $inc haya
+    llegado: contar entonces la sumaría dos veces. Por eso solo se cuenta si no hay
+    marcas vigentes en `pending`, y el reemplazo solo se aplica si `generation` (que
+    sube al empezar y al terminar cada escritura) no cambió mientras se contaba. Si
+    no, se espera y se vuelve a intentar (hasta `attempts` veces); si no se logra, el
+    documento queda como estaba, sin `rebuilt_at` nuevo, y se devuelve el conteo.
+    Las marcas más viejas que STATS_PENDING_WRITE_SECONDS son de procesos que
+    murieron: se ignoran y el reemplazo las borra.
+    """
+    collection = db[STATS_COLLECTION]
+    stats = None
+    for attempt in range(attempts):
+        if attempt:
+            await asyncio.sleep(0.05 * 2 ** attempt)
+        current = await collection.find_one({"_id": DASHBOARD_STATS_ID}, {"generation": 1, "pending": 1})
+        generation = (current or {}).get("generation", 0)
+        abandoned_before = datetime.utcnow() - timedelta(seconds=settings.STATS_PENDING_WRITE_SECONDS)
+        if any(started > abandoned_before for started in ((current or {}).get("pending") or {}).values()):
+            continue
+        stats = await compute_live_stats(db)
+        stats["rebuilt_at"] = datetime.utcnow()
+        stats["generation"] = generation + 1
+        # generation 0 también cubre el documento sin el campo (o que todavía no existe)
+        expected = generation if generation else {"$in": [0, None]}
+        try:
+            result = await collection.replace_one({"_id": DASHBOARD_STATS_ID, "generation": expected}, stats, upsert=True)
+        except DuplicateKeyError:
+            continue  # Un $inc creó el documento mientras tanto
+        if result.matched_count or result.upserted_id is not None:
+            break
+    if stats is None:
+        # Siempre hubo escrituras en curso: se devuelve el conteo sin guardarlo
+        stats = await compute_live_stats(db)
+    stats["_id"] = DASHBOARD_STATS_ID
+    return stats
+
+
+async def record_stats_delta(
+    db: AsyncIOMotorDatabase,
+    users: int = 0,
+    professionals: int = 0,
+    jobs: int = 0,
+    jobs_by_state: Optional[Dict[str, int]] = None,
+    professionals_by_category: Optional[Dict[str, int]] = None,
+    pending: Optional[str] = None,
+) -> None:
+    """
+    Aplica un delta a las estadísticas materializadas con un único $inc. Con
+    `pending` borra en el mismo update la marca de `pending_stats_write`.
+    """
+    inc = {}
+    if users:
+        inc["total_users"] = users
+    if professionals:
+        inc["total_professionals"] = professionals
+    if jobs:
+        inc["total_jobs"] = jobs
+    for state, delta in (jobs_by_state or {}).items():
+        if delta:
+            inc[f"jobs_by_state.{_encode_key(state)}"] = delta
+    for category, delta in (professionals_by_category or {}).items():
+        if delta:
+            inc[f"professionals_by_category.{_encode_key(category)}"] = delta
+    if not inc and pending is None:
+        return
+    inc["generation"] = 1
+    update = {"$inc": inc}
+    if pending is not None:
+        update["$unset"] = {f"pending.{pending}": ""}
+    await db[STATS_COLLECTION].update_one({"_id": DASHBOARD_STATS_ID}, update, upsert=True)
+
+
+class PendingStatsWrite:
+    """Escritura en curso abierta con `pending_stats_write`."""
+
+    def __init__(self, db: AsyncIOMotorDatabase, token: Optional[str]):
+        self.db = db
+        self.token = token
+        self.recorded = False
+
+    async def record(self, **delta) -> None:
+        """Aplica el delta de la escritura y cierra la marca en un solo update."""
+        await record_stats_delta(self.db, pending=self.token, **delta)
+        self.recorded = True
+
+
+@asynccontextmanager
+async def pending_stats_write(db: AsyncIOMotorDatabase, tracked: bool = True) -> AsyncIterator[PendingStatsWrite]:
+    """
+    Envuelve una escritura que mueve las estadísticas: antes de escribir deja una
+    marca en `pending` (y sube `generation`) y `record` la cierra junto con el delta.
+    Si la escritura falla o no hay delta que registrar, la marca se cierra al salir.
+    Con `tracked=False` (la escritura no toca nada que se cuente) no agrega round trips.
+
+        async with admin_service.pending_stats_write(db) as stats:
+            await db["users"].insert_one(user)
+            await stats.record(users=1)
+    """
+    if not tracked:
+        yield PendingStatsWrite(db, None)
+        return
+    token = str(ObjectId())
+    await db[STATS_COLLECTION].update_one(
+        {"_id": DASHBOARD_STATS_ID},
+        {"$set": {f"pending.{token}": datetime.utcnow()}, "$inc": {"generation": 1}},
+        upsert=True,
+    )
+    write = PendingStatsWrite(db, token)
+    try:
+        yield write
+    finally:
+        if not write.recorded:
+            await record_stats_delta(db, pending=token)
+
+
+async def mark_dashboard_stats_stale(db: AsyncIOMotorDatabase) -> None:
+    """
+    Para escrituras masivas donde no conocemos los valores anteriores: la próxima
+    lectura de `get_dashboard_stats` reconstruye el documento desde las colecciones.
+    """
+    await db[STATS_COLLECTION].update_one({"_id": DASHBOARD_STATS_ID}, {"$unset": {"rebuilt_at": ""}})
+
+
+def category_delta(old_categories, new_categories) -> Dict[str, int]:
+    """Delta por categoría al pasar de `old_categories` a `new_categories`."""
+    delta: Dict[str, int] = {}
+    for category in old_categories or []:
+        delta[category] = delta.get(category, 0) - 1
+    for category in new_categories or []:
+        delta[category] = delta.get(category, 0) + 1
+    return {k: v for k, v in delta.items() if v}
+
+
+def _as_aggregation_list(counts: dict) -> list:
+    return [
+        {"_id": _decode_key(key), "count": count}
+        for key, count in sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        if count
+    ]
+
+
+async def get_dashboard_stats(db: AsyncIOMotorDatabase, max_staleness: Optional[int] = None) -> dict:
+    """
+    Devuelve las estadísticas materializadas (una sola lectura).
+
+    Se reconstruyen desde las colecciones si todavía no existen o si la última
+    reconstrucción es más vieja que `max_staleness` segundos (0 fuerza el recálculo).
+    """
+    stats = await db[STATS_COLLECTION].find_one({"_id": DASHBOARD_STATS_ID})
+    needs_rebuild = stats is None or "rebuilt_at" not in stats
+    if not needs_rebuild and max_staleness is not None:
+        age = (datetime.utcnow() - stats["rebuilt_at"]).total_seconds()
+        needs_rebuild = age >= max_staleness
+    if needs_rebuild:
+        stats = await rebuild_dashboard_stats(db)
+    return format_dashboard_stats(stats)
+
+
+def format_dashboard_stats(stats: dict) -> dict:
+    """Convierte el documento materializado al formato de `DashboardStats`."""
+    return {
+        "total_users": stats.get("total_users", 0),
+        "total_professionals": stats.get("total_professionals", 0),
+        "total_jobs": stats.get("total_jobs", 0),
+        "jobs_by_state": _as_aggregation_list(stats.get("jobs_by_state", {})),
+        "professionals_by_category": _as_aggregation_list(stats.get("professionals_by_category", {})),
+    }
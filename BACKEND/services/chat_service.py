@@ -0,0 +1,209 @@
+# services/chat_service.py
+"""
+Chat por trabajo entre el cliente y el profesional.
+
+Almacenamiento: los mensajes no van uno por documento sino agrupados en
+`chat_buckets`, un documento por trabajo y franja de CHAT_BUCKET_SECONDS con
+hasta CHAT_BUCKET_MAX_MESSAGES mensajes en `messages`. Cada mensaje es un `$push`
+con upsert sobre el bucket abierto: una escritura, y una entrada de índice por
+bucket en lugar de una por mensaje. Cuando el bucket se llena, el filtro
+`count < máximo` deja de coincidir y el upsert abre otro para la misma franja.
+
+El historial se pagina por keyset sobre el `_id` de los mensajes (ObjectId,
+ordenado por tiempo). La franja de cada mensaje sale del timestamp de su `_id`, así
+que el cursor acota también la franja: se recorren los buckets del trabajo desde
+la franja del cursor hacia atrás con el índice (job_id, bucket) y se descartan los
+mensajes no anteriores al cursor. Cada página lee solo los buckets que necesita.
+
+Distribución: `chat_hub` reparte cada mensaje a los sockets conectados del mismo
+trabajo dentro de este proceso (ver `ChatHub`). Con varios workers cada uno
+reparte a sus propias conexiones; el historial es la fuente de verdad.
+"""
+import asyncio
+import calendar
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from core.config import settings
+from utils.pagination import InvalidCursorError, decode_cursor, encode_cursor
+from utils.serialization import FastJSONResponse, serialize
+from schemas.chat_schema import ChatMessageIn, ChatMessageOut
+
+BUCKETS_COLLECTION = "chat_buckets"
+
+
+def bucket_start(moment: datetime) -> datetime:
+    """Inicio de la franja de CHAT_BUCKET_SECONDS a la que pertenece `moment`."""
+    seconds = settings.CHAT_BUCKET_SECONDS
+    epoch = calendar.timegm(moment.utctimetuple())
+    return datetime.utcfromtimestamp(epoch - epoch % seconds)
+
+
+async def get_participants(db: AsyncIOMotorDatabase, job_id: str) -> Optional[Set[str]]:
+    """
+    Ids de usuario que pueden leer y escribir en el chat del trabajo: el cliente y
+    el usuario del profesional. None si el trabajo no existe.
+    """
+    job = await db["jobs"].find_one({"_id": ObjectId(job_id)}, {"client_id": 1, "professional_id": 1})
+    if job is None:
+        return None
+    participants = {str(job["client_id"])}
+    professional = await db["professionals"].find_one({"_id": job["professional_id"]}, {"user_id": 1})
+    if professional is not None:
+        participants.add(str(professional["user_id"]))
+    return participants
+
+
+async def post_message(db: AsyncIOMotorDatabase, job_id: str, sender_id: str, message_in: ChatMessageIn) -> dict:
+    """Guarda el mensaje en el bucket abierto del trabajo (una sola escritura) y lo devuelve."""
+    message = {
+        "_id": ObjectId(),
+        "sender_id": ObjectId(sender_id),
+        "text": message_in.text,
+        "sent_at": datetime.utcnow(),
+    }
+    job_oid = ObjectId(job_id)
+    await db[BUCKETS_COLLECTION].update_one(
+        {
+            "job_id": job_oid,
+            # Por el _id y no por sent_at: el cursor del historial deriva la franja del _id
+            "bucket": bucket_start(message["_id"].generation_time),
+            "count": {"$lt": settings.CHAT_BUCKET_MAX_MESSAGES},
+        },
+        {
+            "$push": {"messages": message},
+            "$inc": {"count": 1},
+        },
+        upsert=True,
+    )
+    return {**message, "job_id": job_oid}
+
+
+async def get_history(
+    db: AsyncIOMotorDatabase, job_id: str, limit: int = 50, cursor: Optional[str] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Mensajes del trabajo del más nuevo al más viejo, `limit` por página. El cursor
+    es el del último mensaje devuelto. Devuelve (mensajes, próximo cursor).
+    """
+    job_oid = ObjectId(job_id)
+    before = decode_cursor(cursor)[1] if cursor else None
+    if cursor and not isinstance(before, ObjectId):
+        # El cursor se decodificó pero no es de un mensaje (por ejemplo, armado a mano)
+        raise InvalidCursorError("Cursor de paginación inválido")
+    query = {"job_id": job_oid}
+    if before is not None:
+        # Ningún mensaje anterior al cursor está en una franja posterior a la suya
+        query["bucket"] = {"$lte": bucket_start(before.generation_time)}
+
+    messages: List[dict] = []
+    current_bucket = None
+    buckets = db[BUCKETS_COLLECTION].find(query, {"messages": 1, "bucket": 1}).sort("bucket", -1).batch_size(4)
+    async for bucket in buckets:
+        # Una franja puede tener varios buckets (se llenó el primero): se lee completa.
+        # Al pasar a una franja más vieja, si la página ya está llena, se corta.
+        if bucket["bucket"] != current_bucket:
+            if len(messages) > limit:
+                break
+            current_bucket = bucket["bucket"]
+        messages.extend(m for m in bucket["messages"] if before is None or m["_id"] < before)
+    messages.sort(key=lambda m: m["_id"], reverse=True)
+
+    next_cursor = None
+    if len(messages) > limit:
+        messages = messages[:limit]
+        next_cursor = encode_cursor(messages[-1])
+    for message in messages:
+        message["job_id"] = job_oid
+    return messages, next_cursor
+
+
+class SlowConsumerError(Exception):
+    """La cola de envío de una conexión se llenó: el cliente no lee al ritmo del chat."""
+
+
+class Subscriber:
+    """Una conexión suscripta a un trabajo, con su propia cola de envío acotada."""
+
+    def __init__(self, user_id: str, queue_size: Optional[int] = None):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size or settings.CHAT_SEND_QUEUE_SIZE)
+        self.dropped = False
+
+    def offer(self, payload: bytes) -> bool:
+        """Encola sin esperar. Si la cola está llena descarta la conexión."""
+        if self.dropped:
+            return False
+        try:
+            self.queue.put_nowait(payload)
+            return True
+        except asyncio.QueueFull:
+            self.dropped = True
+            # Se vacía la cola y se deja la marca de cierre: el que envía la ve enseguida
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            return False
+
+    async def next_payload(self) -> bytes:
+        """Siguiente mensaje a enviar; SlowConsumerError si la conexión quedó descartada."""
+        payload = await self.queue.get()
+        if payload is None:
+            raise SlowConsumerError()
+        return payload
+
+
+class ChatHub:
+    """
+    Pub/sub en proceso: job_id -> conexiones suscriptas.
+
+    `publish` serializa el mensaje una vez y lo ofrece a cada suscriptor sin
+    esperar a nadie: un cliente lento no frena al resto. Si su cola se llena se lo
+    descarta (el router cierra el socket y el cliente recupera lo perdido con el historial).
+    """
+
+    def __init__(self):
+        self._rooms: Dict[str, Set[Subscriber]] = {}
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def subscribe(self, job_id: str, subscriber: Subscriber) -> None:
+        self._rooms.setdefault(job_id, set()).add(subscriber)
+
+    def unsubscribe(self, job_id: str, subscriber: Subscriber) -> None:
+        room = self._rooms.get(job_id)
+        if room is None:
+            return
+        room.discard(subscriber)
+        if not room:
+            del self._rooms[job_id]
+
+    def publish(self, job_id: str, message: dict) -> int:
+        """Reparte el mensaje a los suscriptores del trabajo. Devuelve a cuántos llegó a la cola."""
+        payload = FastJSONResponse(serialize(ChatMessageOut, message)).body
+        self.published += 1
+        delivered = 0
+        for subscriber in list(self._rooms.get(job_id, ())):
+            if subscriber.offer(payload):
+                delivered += 1
+            else:
+                self.dropped += 1
+                self.unsubscribe(job_id, subscriber)
+        self.delivered += delivered
+        return delivered
+
+    def stats(self) -> dict:
+        return {
+            "rooms": len(self._rooms),
+            "connections": sum(len(room) for room in self._rooms.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped_connections": self.dropped,
+        }
+
+
+chat_hub = ChatHub()
@@ -0,0 +1,113 @@
+# services/export_service.py
+"""
+Exportaciones en streaming (NDJSON o CSV) para BI y backups nocturnos.
+
+Los documentos se leen del cursor de Motor en lotes y se escriben en chunks a
+medida que llegan, así que la memoria no depende del tamaño de la exportación.
+Todo se ordena por `_id`: el `_id` de la última fila recibida sirve como token
+para retomar una exportación cortada (`resume_after`).
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from enum import Enum
+from typing import AsyncIterator, Dict, List, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+EXPORT_BATCH_SIZE = 1000
+
+# Columnas exportadas por colección (también se usan como proyección)
+EXPORT_FIELDS: Dict[str, List[str]] = {
+    "jobs": ["_id", "title", "description", "category", "budget", "client_id", "professional_id", "status", "created_at"],
+    "professionals": ["_id", "user_id", "headline", "bio", "categories", "city", "avg_rating", "total_reviews", "verification_status"],
+    "reviews": ["_id", "professional_id", "client_id", "rating", "comment", "created_at"],
+}
+
+
+def _to_jsonable(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, list):
+        return [_to_jsonable(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _to_jsonable(v) for k, v in value.items()}
+    return value
+
+
+def _to_csv_cell(value):
+    value = _to_jsonable(value)
+    if isinstance(value, list):
+        return "|".join(str(v) for v in value)
+    if value is None:
+        return ""
+    return value
+
+
+async def iter_documents(
+    db: AsyncIOMotorDatabase,
+    collection: str,
+    query: dict,
+    resume_after: Optional[ObjectId] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> AsyncIterator[List[dict]]:
+    """Itera los documentos de la colección en lotes de `batch_size`, ordenados por _id."""
+    if resume_after is not None:
+        query = {"$and": [query, {"_id": {"$gt": resume_after}}]} if query else {"_id": {"$gt": resume_after}}
+    projection = {field: 1 for field in EXPORT_FIELDS[collection]}
+    cursor = db[collection].find(query, projection).sort("_id", 1).batch_size(batch_size)
+
+    batch = []
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def stream_ndjson(batches: AsyncIterator[List[dict]], fields: List[str]) -> AsyncIterator[bytes]:
+    async for batch in batches:
+        lines = [
+            json.dumps({field: _to_jsonable(doc.get(field)) for field in fields}, ensure_ascii=False)
+            for doc in batch
+        ]
+        yield ("\n".join(lines) + "\n").encode()
+
+
+async def stream_csv(batches: AsyncIterator[List[dict]], fields: List[str], include_header: bool = True) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if include_header:
+        writer.writerow(fields)
+    async for batch in batches:
+        for doc in batch:
+            writer.writerow([_to_csv_cell(doc.get(field)) for field in fields])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def export_stream(
+    db: AsyncIOMotorDatabase,
+    collection: str,
+    query: dict,
+    export_format: str,
+    resume_after: Optional[ObjectId] = None,
+) -> AsyncIterator[bytes]:
+    """Generador de bytes listo para un `StreamingResponse`."""
+    fields = EXPORT_FIELDS[collection]
+    batches = iter_documents(db, collection, query, resume_after=resume_after)
+    if export_format == "csv":
+        # Al retomar no repetimos el encabezado, para poder concatenar los archivos
+        return stream_csv(batches, fields, include_header=resume_after is None)
+    return stream_ndjson(batches, fields)
@@ -1,42 +1,248 @@
 # services/job_service.py
-from typing import List, Optional
+from typing import FrozenSet, List, NamedTuple, Optional, Tuple
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
 from datetime import datetime
 
-from schemas.job_schema import JobIn, JobUpdate, JobStatus
+from services import admin_service
+from schemas.job_schema import JobIn, JobUpdate, JobStatus, JobTransition, JobBulkUpdateItem, JobOut, JobCard
+from utils.pagination import fetch_page
+from utils.serialization import projection_for
 
-async def create_job(db: AsyncIOMotorDatabase, job_in: JobIn, user_id: str) -> dict:
+# Las lecturas traen solo lo que usa la respuesta; los listados en modo tarjeta, sin la descripción
+JOB_PROJECTION = projection_for(JobOut)
+JOB_CARD_PROJECTION = projection_for(JobCard)
+
+CLIENT = "client"
+PROFESSIONAL = "professional"
+
+class Transition(NamedTuple):
+    sources: Tuple[JobStatus, ...]
+    target: JobStatus
+    actors: FrozenSet[str]
+
+# Máquina de estados: posted -> accepted -> in_progress -> completed, y cancelled
+# mientras el trabajo no empezó. `actors` dice quién puede disparar cada acción.
+JOB_TRANSITIONS = {
+    JobTransition.ACCEPT: Transition((JobStatus.POSTED,), JobStatus.ACCEPTED, frozenset({PROFESSIONAL})),
+    JobTransition.START: Transition((JobStatus.ACCEPTED,), JobStatus.IN_PROGRESS, frozenset({PROFESSIONAL})),
+    JobTransition.COMPLETE: Transition((JobStatus.IN_PROGRESS,), JobStatus.COMPLETED, frozenset({PROFESSIONAL})),
+    JobTransition.CANCEL: Transition(
+        (JobStatus.POSTED, JobStatus.ACCEPTED), JobStatus.CANCELLED, frozenset({CLIENT, PROFESSIONAL})
+    ),
+}
+
+class InvalidTransitionError(Exception):
+    """El trabajo existe, pero su estado actual no admite la transición pedida."""
+
+    def __init__(self, transition: JobTransition, current_status: str):
+        self.transition = transition
+        self.current_status = current_status
+        super().__init__(f"No se puede aplicar '{transition.value}' a un trabajo en estado '{current_status}'")
+
+def _new_job_document(job_in: JobIn, user_id: str) -> dict:
     job_dict = job_in.model_dump()
     job_dict["client_id"] = ObjectId(user_id)
     job_dict["professional_id"] = ObjectId(job_in.professional_id)
     job_dict["created_at"] = datetime.utcnow()
     job_dict["status"] = JobStatus.POSTED.value
-    
-    result = await db["jobs"].insert_one(job_dict)
-    created_job = await db["jobs"].find_one({"_id": result.inserted_id})
-    return created_job
+    return job_dict
+
+def _job_update_data(job_update: JobUpdate) -> dict:
+    update_data = {k: v for k, v in job_update.model_dump(exclude_unset=True).items() if v is not None}
+    if 'status' in update_data and isinstance(update_data['status'], JobStatus):
+        update_data['status'] = update_data['status'].value
+    return update_data
+
+def _write_errors_by_index(exc: BulkWriteError) -> dict:
+    return {error["index"]: error.get("errmsg", "Error de escritura") for error in exc.details.get("writeErrors", [])}
+
+async def create_job(db: AsyncIOMotorDatabase, job_in: JobIn, user_id: str) -> dict:
+    job_dict = _new_job_document(job_in, user_id)
+
+    async with admin_service.pending_stats_write(db) as stats:
+        result = await db["jobs"].insert_one(job_dict)
+        await stats.record(jobs=1, jobs_by_state={job_dict["status"]: 1})
+    # Devolvemos lo que insertamos: releerlo sería un segundo round trip
+    job_dict["_id"] = result.inserted_id
+    return job_dict
 
 async def get_all_jobs(db: AsyncIOMotorDatabase) -> List[dict]:
-    jobs_cursor = db["jobs"].find()
+    jobs_cursor = db["jobs"].find({}, JOB_PROJECTION)
     return await jobs_cursor.to_list(length=None)
 
-async def get_job_by_id(db: AsyncIOMotorDatabase, job_id: str) -> Optional[dict]:
-    return await db["jobs"].find_one({"_id": ObjectId(job_id)})
+async def get_jobs_page(
+    db: AsyncIOMotorDatabase, limit: int, cursor: Optional[str] = None, skip: int = 0,
+    projection: Optional[dict] = JOB_PROJECTION
+) -> Tuple[List[dict], Optional[str]]:
+    """Página de trabajos ordenada por _id. Con `cursor` usa keyset; si no, `skip`."""
+    return await fetch_page(db["jobs"], {}, limit, cursor=cursor, skip=skip, projection=projection)
+
+async def get_job_by_id(db: AsyncIOMotorDatabase, job_id: str, projection: Optional[dict] = JOB_PROJECTION) -> Optional[dict]:
+    return await db["jobs"].find_one({"_id": ObjectId(job_id)}, projection)
 
 async def update_job(db: AsyncIOMotorDatabase, job_id: str, job_update: JobUpdate) -> Optional[dict]:
-    update_data = {k: v for k, v in job_update.model_dump(exclude_unset=True).items() if v is not None}
+    update_data = _job_update_data(job_update)
     if not update_data:
         return None
-    if 'status' in update_data and isinstance(update_data['status'], JobStatus):
-        update_data['status'] = update_data['status'].value
 
-    await db["jobs"].update_one(
-        {"_id": ObjectId(job_id)},
-        {"$set": update_data}
-    )
-    return await db["jobs"].find_one({"_id": ObjectId(job_id)})
+    # Una sola escritura: con el documento anterior (BEFORE) armamos el nuevo en memoria
+    # y obtenemos el estado previo para el delta de estadísticas.
+    async with admin_service.pending_stats_write(db, tracked='status' in update_data) as stats:
+        before = await db["jobs"].find_one_and_update(
+            {"_id": ObjectId(job_id)},
+            {"$set": update_data},
+            return_document=ReturnDocument.BEFORE
+        )
+        if before is None:
+            return None
+        if 'status' in update_data and before.get("status") != update_data["status"]:
+            await stats.record(jobs_by_state={before.get("status"): -1, update_data["status"]: 1})
+    return {**before, **update_data}
+
+def _actor_filter(transition: Transition, user_id: str, professional_id: Optional[str]) -> Optional[dict]:
+    """Condición sobre el trabajo para que el usuario pueda disparar la transición."""
+    clauses = []
+    if CLIENT in transition.actors:
+        clauses.append({"client_id": ObjectId(user_id)})
+    if PROFESSIONAL in transition.actors and professional_id is not None:
+        clauses.append({"professional_id": ObjectId(professional_id)})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+async def transition_job(
+    db: AsyncIOMotorDatabase, job_id: str, action: JobTransition, user_id: str,
+    professional_id: Optional[str] = None
+) -> Optional[dict]:
+    """
+    Aplica `action` según JOB_TRANSITIONS en un solo `find_one_and_update`.
+
+    El actor va en el filtro: si el trabajo no existe o el usuario no participa
+    con el rol que pide la acción, devuelve None. El estado esperado va en la
+    actualización (pipeline con `$cond`): el documento anterior (BEFORE) dice si
+    la transición se aplicó o si el estado no la admitía (InvalidTransitionError),
+    sin una segunda lectura y sin carreras entre la lectura y la escritura.
+    `professional_id` es el perfil profesional del usuario, si tiene.
+    """
+    transition = JOB_TRANSITIONS[action]
+    actor = _actor_filter(transition, user_id, professional_id)
+    if actor is None:
+        return None
+
+    sources = [status.value for status in transition.sources]
+    async with admin_service.pending_stats_write(db) as stats:
+        before = await db["jobs"].find_one_and_update(
+            {"_id": ObjectId(job_id), **actor},
+            [{"$set": {"status": {"$cond": [{"$in": ["$status", sources]}, transition.target.value, "$status"]}}}],
+            projection=JOB_PROJECTION,
+            return_document=ReturnDocument.BEFORE
+        )
+        if before is None:
+            return None
+        if before.get("status") not in sources:
+            raise InvalidTransitionError(action, before.get("status"))
+
+        await stats.record(jobs_by_state={before["status"]: -1, transition.target.value: 1})
+    return {**before, "status": transition.target.value}
 
 async def delete_job(db: AsyncIOMotorDatabase, job_id: str) -> bool:
-    result = await db["jobs"].delete_one({"_id": ObjectId(job_id)})
-    return result.deleted_count > 0
\ No newline at end of file
+    async with admin_service.pending_stats_write(db) as stats:
+        deleted = await db["jobs"].find_one_and_delete({"_id": ObjectId(job_id)}, projection={"status": 1})
+        if deleted is None:
+            return False
+        await stats.record(jobs=-1, jobs_by_state={deleted.get("status"): -1})
+    return True
+
+async def create_jobs_bulk(db: AsyncIOMotorDatabase, jobs_in: List[JobIn], user_id: str) -> dict:
+    """
+    Inserta un lote de trabajos con un único `insert_many` desordenado.
+    Los _id se generan acá para poder informar el resultado de cada ítem.
+    """
+    items = [None] * len(jobs_in)
+    docs, doc_positions = [], []
+    for index, job_in in enumerate(jobs_in):
+        if not ObjectId.is_valid(job_in.professional_id):
+            items[index] = {"index": index, "ok": False, "error": "professional_id inválido"}
+            continue
+        job_dict = _new_job_document(job_in, user_id)
+        job_dict["_id"] = ObjectId()
+        docs.append(job_dict)
+        doc_positions.append(index)
+
+    write_errors = {}
+    async with admin_service.pending_stats_write(db, tracked=bool(docs)) as stats:
+        if docs:
+            try:
+                await db["jobs"].insert_many(docs, ordered=False)
+            except BulkWriteError as exc:
+                write_errors = _write_errors_by_index(exc)
+            inserted = len(docs) - len(write_errors)
+            await stats.record(jobs=inserted, jobs_by_state={JobStatus.POSTED.value: inserted})
+
+    for doc_index, (index, doc) in enumerate(zip(doc_positions, docs)):
+        if doc_index in write_errors:
+            items[index] = {"index": index, "ok": False, "error": write_errors[doc_index]}
+        else:
+            items[index] = {"index": index, "id": str(doc["_id"]), "ok": True}
+
+    inserted = len(docs) - len(write_errors)
+    return {"ok_count": inserted, "error_count": len(jobs_in) - inserted, "items": items}
+
+async def update_jobs_bulk(db: AsyncIOMotorDatabase, updates: List[JobBulkUpdateItem], client_id: str) -> dict:
+    """
+    Aplica un lote de actualizaciones sobre trabajos de `client_id` con un único
+    `bulk_write` desordenado.
+
+    `bulk_write` solo devuelve totales: si encontró menos documentos que operaciones,
+    una lectura por `_id $in` dice cuáles no existían (o eran de otro cliente) y esos
+    ítems vuelven con error.
+    """
+    items = [None] * len(updates)
+    ops, op_positions = [], []
+    for index, item in enumerate(updates):
+        if not ObjectId.is_valid(item.id):
+            items[index] = {"index": index, "id": item.id, "ok": False, "error": "ID de trabajo inválido"}
+            continue
+        update_data = _job_update_data(item)
+        update_data.pop("id", None)
+        if not update_data:
+            items[index] = {"index": index, "id": item.id, "ok": False, "error": "No hay campos para actualizar"}
+            continue
+        ops.append(UpdateOne({"_id": ObjectId(item.id), "client_id": ObjectId(client_id)}, {"$set": update_data}))
+        op_positions.append(index)
+
+    matched = modified = 0
+    write_errors = {}
+    if ops:
+        try:
+            result = await db["jobs"].bulk_write(ops, ordered=False)
+            matched, modified = result.matched_count, result.modified_count
+        except BulkWriteError as exc:
+            write_errors = _write_errors_by_index(exc)
+            matched, modified = exc.details.get("nMatched", 0), exc.details.get("nModified", 0)
+
+    found = None
+    if ops and matched < len(ops) - len(write_errors):
+        ids = [ObjectId(updates[index].id) for index in op_positions]
+        cursor = db["jobs"].find({"_id": {"$in": ids}, "client_id": ObjectId(client_id)}, {"_id": 1})
+        found = {str(job["_id"]) async for job in cursor}
+
+    for op_index, index in enumerate(op_positions):
+        if op_index in write_errors:
+            items[index] = {"index": index, "id": updates[index].id, "ok": False, "error": write_errors[op_index]}
+        elif found is not None and str(ObjectId(updates[index].id)) not in found:
+            items[index] = {"index": index, "id": updates[index].id, "ok": False, "error": "Trabajo no encontrado"}
+        else:
+            items[index] = {"index": index, "id": updates[index].id, "ok": True}
+
+    ok_count = sum(1 for item in items if item["ok"])
+    return {
+        "ok_count": ok_count,
+        "error_count": len(updates) - ok_count,
+        "matched_count": matched,
+        "modified_count": modified,
+        "items": items,
+    }
@@ -0,0 +1,287 @@
+# services/outbox_service.py
+"""
+Outbox de emails transaccionales persistido en Mongo.
+
+Los endpoints solo encolan (`enqueue_email`, un insert) y un worker asyncio
+(`run_outbox_worker`, arrancado en el lifespan de `main.py`) drena la colección:
+
+- reclama lotes de hasta OUTBOX_BATCH_SIZE mensajes con un `claim_id` propio,
+  así varios procesos pueden drenar la misma colección sin enviar dos veces;
+- los envía por SMTP en un pool de OUTBOX_CONCURRENCY threads, una conexión por
+  grupo de mensajes;
+- los fallidos se reintentan con backoff exponencial y, al llegar a
+  OUTBOX_MAX_ATTEMPTS, quedan como `dead` con el último error (dead letter).
+
+Un mensaje reclamado cuyo worker murió vuelve a estar disponible cuando vence su
+lease (`next_attempt_at`), así que la entrega es "al menos una vez".
+
+Un email puede encolarse "retenido" (`hold_seconds`) y atado a un `user_id` antes
+de que exista ese usuario: el registro encola primero, crea el usuario y recién
+ahí lo libera (`release_email`). Si el registro falla lo cancela
+(`cancel_email`), y si hasta eso falla el worker lo descarta al ver que el
+usuario no existe. Si la liberación falla, el email sale igual al vencer la retención.
+
+Estados: pending -> sending -> sent | pending (reintento) | dead
+"""
+import asyncio
+import logging
+import math
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+from core.config import settings
+from utils import email_service
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_COLLECTION = "outbox"
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+DEAD = "dead"
+
+# Pool propio para smtplib (bloqueante): no compite con el threadpool compartido de Starlette
+_smtp_executor = ThreadPoolExecutor(
+    max_workers=settings.OUTBOX_CONCURRENCY,
+    thread_name_prefix="outbox-smtp",
+)
+# Latencias de envío recientes (segundos, por mensaje enviado), para `outbox_stats`
+_send_latencies = deque(maxlen=1000)
+_wakeup: Optional[asyncio.Event] = None
+
+
+def _wakeup_event() -> asyncio.Event:
+    global _wakeup
+    if _wakeup is None:
+        _wakeup = asyncio.Event()
+    return _wakeup
+
+
+async def enqueue_email(
+    db: AsyncIOMotorDatabase,
+    to: str,
+    subject: str,
+    body: str,
+    kind: str = "generic",
+    user_id: Optional[ObjectId] = None,
+    hold_seconds: float = 0,
+) -> ObjectId:
+    """
+    Encola un email. Es un único insert: el envío lo hace el worker. Con
+    `hold_seconds` no sale antes de ese plazo salvo que se libere con `release_email`;
+    con `user_id` se descarta si ese usuario no existe al momento de enviarlo.
+    """
+    now = datetime.utcnow()
+    message = {
+        "kind": kind,
+        "to": to,
+        "subject": subject,
+        "body": body,
+        "status": PENDING,
+        "attempts": 0,
+        "next_attempt_at": now + timedelta(seconds=hold_seconds),
+        "created_at": now,
+    }
+    if user_id is not None:
+        message["user_id"] = user_id
+    result = await db[OUTBOX_COLLECTION].insert_one(message)
+    if not hold_seconds:
+        # Despierta al worker de este proceso para no esperar al próximo poll
+        _wakeup_event().set()
+    return result.inserted_id
+
+
+async def enqueue_welcome_email(db: AsyncIOMotorDatabase, user: dict, held: bool = False) -> ObjectId:
+    """
+    Encola el email de bienvenida. Con `held=True` (registro) se encola retenido y
+    atado a `user["_id"]`, antes de insertar el usuario.
+    """
+    name = user.get("first_name") or user.get("username", "")
+    body = (
+        f"Hola {name},\n\n"
+        "Gracias por registrarte en el Marketplace. Ya podés buscar profesionales "
+        "o publicar tus servicios.\n"
+    )
+    hold = {"user_id": user["_id"], "hold_seconds": settings.OUTBOX_HOLD_SECONDS} if held else {}
+    return await enqueue_email(db, user["email"], "¡Bienvenido/a al Marketplace!", body, kind="welcome", **hold)
+
+
+async def release_email(db: AsyncIOMotorDatabase, message_id: ObjectId) -> None:
+    """Libera un email retenido para que el worker lo envíe ya."""
+    await db[OUTBOX_COLLECTION].update_one(
+        {"_id": message_id, "status": PENDING, "attempts": 0},
+        {"$set": {"next_attempt_at": datetime.utcnow()}},
+    )
+    _wakeup_event().set()
+
+
+async def cancel_email(db: AsyncIOMotorDatabase, message_id: ObjectId) -> None:
+    """Borra un email que todavía no se reclamó (por ejemplo, si el registro falló)."""
+    await db[OUTBOX_COLLECTION].delete_one({"_id": message_id, "status": PENDING})
+
+
+async def _drop_orphans(db: AsyncIOMotorDatabase, messages: List[dict]) -> List[dict]:
+    """Descarta los mensajes atados a un usuario que no existe (registro fallido)."""
+    user_ids = {message["user_id"] for message in messages if "user_id" in message}
+    if not user_ids:
+        return messages
+    existing = {doc["_id"] for doc in await db["users"].find({"_id": {"$in": list(user_ids)}}, {"_id": 1}).to_list(None)}
+    orphan_ids = [message["_id"] for message in messages if "user_id" in message and message["user_id"] not in existing]
+    if not orphan_ids:
+        return messages
+    logger.warning("Descartando %d emails de registros que no se completaron", len(orphan_ids))
+    await db[OUTBOX_COLLECTION].delete_many({"_id": {"$in": orphan_ids}, "claim_id": messages[0]["claim_id"]})
+    return [message for message in messages if message["_id"] not in orphan_ids]
+
+
+def retry_delay(attempts: int) -> float:
+    """Backoff exponencial con jitter para el intento número `attempts` (1, 2, ...)."""
+    delay = min(settings.OUTBOX_RETRY_MAX_SECONDS, settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+async def claim_batch(db: AsyncIOMotorDatabase, batch_size: int) -> List[dict]:
+    """
+    Reclama hasta `batch_size` mensajes listos para enviar (pendientes o con el lease
+    vencido) en tres round trips, sin importar el tamaño del lote.
+    """
+    now = datetime.utcnow()
+    ready = {"status": {"$in": [PENDING, SENDING]}, "next_attempt_at": {"$lte": now}}
+    candidates = await db[OUTBOX_COLLECTION].find(ready, {"_id": 1}).sort("next_attempt_at", 1).to_list(batch_size)
+    if not candidates:
+        return []
+
+    claim_id = ObjectId()
+    # Se repite la condición: si otro worker ganó algún mensaje, simplemente no lo tomamos
+    await db[OUTBOX_COLLECTION].update_many(
+        {**ready, "_id": {"$in": [doc["_id"] for doc in candidates]}},
+        {"$set": {
+            "status": SENDING,
+            "claim_id": claim_id,
+            "next_attempt_at": now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS),
+        }},
+    )
+    return await db[OUTBOX_COLLECTION].find({"claim_id": claim_id}).to_list(None)
+
+
+def _send_group(messages: List[dict]) -> List[tuple]:
+    """Corre en el pool SMTP: envía el grupo por una conexión y mide cada envío."""
+    started = time.perf_counter()
+    errors = email_service.send_messages([
+        email_service.build_message(message["to"], message["subject"], message["body"]) for message in messages
+    ])
+    latency = (time.perf_counter() - started) / max(len(messages), 1)
+    return [(message, error, latency) for message, error in zip(messages, errors)]
+
+
+async def send_batch(messages: List[dict]) -> List[tuple]:
+    """Reparte el lote en hasta OUTBOX_CONCURRENCY grupos y los envía en paralelo."""
+    if not messages:
+        return []
+    group_size = math.ceil(len(messages) / settings.OUTBOX_CONCURRENCY)
+    groups = [messages[i:i + group_size] for i in range(0, len(messages), group_size)]
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(*[loop.run_in_executor(_smtp_executor, _send_group, group) for group in groups])
+    return [item for group in results for item in group]
+
+
+async def record_results(db: AsyncIOMotorDatabase, results: List[tuple]) -> dict:
+    """Guarda el resultado de cada envío en un solo `bulk_write`."""
+    now = datetime.utcnow()
+    counts = {SENT: 0, PENDING: 0, DEAD: 0}
+    ops = []
+    for message, error, latency in results:
+        # El filtro por claim_id evita pisar un mensaje que otro worker reclamó al vencer el lease
+        where = {"_id": message["_id"], "claim_id": message["claim_id"]}
+        if error is None:
+            _send_latencies.append(latency)
+            counts[SENT] += 1
+            ops.append(UpdateOne(where, {
+                "$set": {"status": SENT, "sent_at": now},
+                "$inc": {"attempts": 1},
+                "$unset": {"claim_id": "", "next_attempt_at": ""},
+            }))
+            continue
+        attempts = message.get("attempts", 0) + 1
+        if attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            counts[DEAD] += 1
+            logger.warning("Email %s a %s descartado tras %d intentos: %s", message["_id"], message["to"], attempts, error)
+            update = {"$set": {"status": DEAD, "dead_at": now, "attempts": attempts, "last_error": error},
+                      "$unset": {"claim_id": "", "next_attempt_at": ""}}
+        else:
+            counts[PENDING] += 1
+            update = {"$set": {
+                "status": PENDING,
+                "attempts": attempts,
+                "last_error": error,
+                "next_attempt_at": now + timedelta(seconds=retry_delay(attempts)),
+            }, "$unset": {"claim_id": ""}}
+        ops.append(UpdateOne(where, update))
+    if ops:
+        await db[OUTBOX_COLLECTION].bulk_write(ops, ordered=False)
+    return counts
+
+
+async def process_batch(db: AsyncIOMotorDatabase, batch_size: Optional[int] = None) -> dict:
+    """Reclama, envía y registra un lote. Devuelve cuántos quedaron en cada estado."""
+    messages = await claim_batch(db, batch_size or settings.OUTBOX_BATCH_SIZE)
+    counts = await record_results(db, await send_batch(await _drop_orphans(db, messages)))
+    counts["claimed"] = len(messages)
+    return counts
+
+
+async def run_outbox_worker(db: AsyncIOMotorDatabase, poll_interval: Optional[float] = None):
+    """
+    Drena el outbox mientras la app está viva. Con lotes llenos sigue sin esperar;
+    si no hay trabajo duerme hasta el próximo poll o hasta que se encole un email.
+    """
+    poll_interval = poll_interval if poll_interval is not None else settings.OUTBOX_POLL_INTERVAL_SECONDS
+    wakeup = _wakeup_event()
+    while True:
+        wakeup.clear()
+        try:
+            counts = await process_batch(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Falló el procesamiento del outbox")
+            counts = {"claimed": 0}
+        if counts["claimed"] < settings.OUTBOX_BATCH_SIZE:
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+def _percentile(ordered: list, fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def outbox_stats(db: AsyncIOMotorDatabase) -> dict:
+    """Profundidad de la cola por estado, antigüedad del pendiente más viejo y latencia de envío."""
+    by_status = await db[OUTBOX_COLLECTION].aggregate([
+        {"$group": {"_id": "$status", "count": {"$sum": 1}, "oldest": {"$min": "$created_at"}}}
+    ]).to_list(None)
+    counts = {item["_id"]: item for item in by_status}
+    oldest_pending = counts.get(PENDING, {}).get("oldest")
+    latencies = sorted(_send_latencies)
+    return {
+        "pending": counts.get(PENDING, {}).get("count", 0),
+        "sending": counts.get(SENDING, {}).get("count", 0),
+        "sent": counts.get(SENT, {}).get("count", 0),
+        "dead": counts.get(DEAD, {}).get("count", 0),
+        "oldest_pending_age_seconds": (datetime.utcnow() - oldest_pending).total_seconds() if oldest_pending else 0.0,
+        "send_latency_ms": {
+            "count": len(latencies),
+            "p50": _percentile(latencies, 0.5) * 1000 if latencies else None,
+            "p95": _percentile(latencies, 0.95) * 1000 if latencies else None,
+        },
+    }
@@ -0,0 +1,34 @@
+# services/payment_service.py
+"""
+Pagos de trabajos. Por ahora solo se registra la intención de pago (estado
+`pending`); la integración con el procesador se apoya en que POST /payments exige
+`Idempotency-Key`, así un reintento nunca registra (ni cobra) dos veces.
+"""
+from datetime import datetime
+from typing import Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from schemas.payment_schema import PaymentIn, PaymentOut, PaymentStatus
+from utils.serialization import projection_for
+
+PAYMENT_PROJECTION = projection_for(PaymentOut)
+
+
+async def create_payment(db: AsyncIOMotorDatabase, payment_in: PaymentIn, payer_id: str) -> dict:
+    payment = {
+        "job_id": ObjectId(payment_in.job_id),
+        "payer_id": ObjectId(payer_id),
+        "amount": payment_in.amount,
+        "currency": payment_in.currency.upper(),
+        "status": PaymentStatus.PENDING.value,
+        "created_at": datetime.utcnow(),
+    }
+    result = await db["payments"].insert_one(payment)
+    payment["_id"] = result.inserted_id
+    return payment
+
+
+async def get_payment(db: AsyncIOMotorDatabase, payment_id: str) -> Optional[dict]:
+    return await db["payments"].find_one({"_id": ObjectId(payment_id)}, PAYMENT_PROJECTION)
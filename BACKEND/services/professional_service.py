@@ -1,43 +1,355 @@
 # services/professional_service.py
 # CORRECCIÓN: Inicializamos los campos de rating en inglés.
-from typing import List, Optional
+import asyncio
+from itertools import combinations
+from typing import Awaitable, List, Optional, Tuple
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument, UpdateOne
 
-from schemas.professional_schema import ProfessionalIn, ProfessionalUpdate
+from core.config import settings
+from services import admin_service, ranking_service
+from schemas.professional_schema import ProfessionalIn, ProfessionalUpdate, ProfessionalOut
+from utils.pagination import fetch_page
+from utils.serialization import projection_for
+from utils.text import normalize_text, tokenize, tokenize_many
 
-async def create_professional(db: AsyncIOMotorDatabase, professional_in: ProfessionalIn, user_id: str) -> dict:
+SEARCH_SOURCE_FIELDS = ("headline", "categories", "city")
+FACET_LIMIT = 20
+DEFAULT_NEAR_MAX_KM = 10
+RATING_STARS = (1, 2, 3, 4, 5)
+# Las lecturas traen solo los campos de ProfessionalOut (sin los campos derivados de búsqueda)
+PROFESSIONAL_PROJECTION = projection_for(ProfessionalOut)
+
+def _derived_search_fields(fields: dict) -> dict:
+    """
+    Campos normalizados que alimentan la búsqueda, calculados solo para las
+    fuentes presentes en `fields` (headline, categories, city).
+    `search_tokens` es la unión de los tokens de las tres fuentes.
+    """
+    derived = {}
+    if "headline" in fields:
+        derived["headline_tokens"] = tokenize(fields["headline"])
+    if "categories" in fields:
+        categories = fields["categories"] or []
+        derived["categories_norm"] = [normalize_text(c) for c in categories]
+        derived["category_tokens"] = tokenize_many(categories)
+    if "city" in fields:
+        derived["city_norm"] = normalize_text(fields["city"]) or None
+        derived["city_tokens"] = tokenize(fields["city"])
+    return derived
+
+def _search_tokens_expression() -> dict:
+    """Expresión de agregación que recalcula `search_tokens` desde los tokens por fuente."""
+    return {"$setUnion": [
+        {"$ifNull": ["$headline_tokens", []]},
+        {"$ifNull": ["$category_tokens", []]},
+        {"$ifNull": ["$city_tokens", []]},
+    ]}
+
+def version_increment() -> dict:
+    """
+    Expresión que incrementa `version`: la usan las escrituras que cambian lo que
+    devuelven GET /professionals/{id} o GET /reviews/{id} (ETag y caché de respuestas).
+    """
+    return {"$add": [{"$ifNull": ["$version", 0]}, 1]}
+
+def empty_rating_histogram() -> dict:
+    return {str(stars): 0 for stars in RATING_STARS}
+
+def _new_professional_document(professional_in: ProfessionalIn, user_id: str) -> dict:
     professional_dict = professional_in.model_dump()
     professional_dict["user_id"] = ObjectId(user_id)
     professional_dict["avg_rating"] = 0.0
     professional_dict["total_reviews"] = 0
-    
-    result = await db["professionals"].insert_one(professional_dict)
-    created_professional = await db["professionals"].find_one({"_id": result.inserted_id})
-    return created_professional
+    professional_dict["rating_sum"] = 0
+    professional_dict["bayes_score"] = ranking_service.bayes_score(0, 0)
+    professional_dict["rating_histogram"] = empty_rating_histogram()
+    professional_dict["version"] = 1
+    professional_dict.update(_derived_search_fields(professional_dict))
+    professional_dict["search_tokens"] = tokenize_many(
+        [professional_dict["headline"], *professional_dict["categories"], professional_dict["city"]]
+    )
+    return professional_dict
+
+async def create_professional(db: AsyncIOMotorDatabase, professional_in: ProfessionalIn, user_id: str) -> dict:
+    professional_dict = _new_professional_document(professional_in, user_id)
+
+    async with admin_service.pending_stats_write(db) as stats:
+        result = await db["professionals"].insert_one(professional_dict)
+        await stats.record(
+            professionals=1,
+            professionals_by_category=admin_service.category_delta([], professional_dict["categories"])
+        )
+    professional_dict["_id"] = result.inserted_id
+    return professional_dict
 
 # ... (el resto del archivo queda igual)
 async def get_all_professionals(db: AsyncIOMotorDatabase) -> List[dict]:
-    professionals_cursor = db["professionals"].find()
+    professionals_cursor = db["professionals"].find({}, PROFESSIONAL_PROJECTION)
     return await professionals_cursor.to_list(length=None)
 
-async def get_professional_by_id(db: AsyncIOMotorDatabase, professional_id: str) -> Optional[dict]:
-    return await db["professionals"].find_one({"_id": ObjectId(professional_id)})
+async def get_professionals_page(
+    db: AsyncIOMotorDatabase, limit: int, cursor: Optional[str] = None, skip: int = 0,
+    projection: Optional[dict] = PROFESSIONAL_PROJECTION
+) -> Tuple[List[dict], Optional[str]]:
+    """Página de profesionales ordenada por _id. Con `cursor` usa keyset; si no, `skip`."""
+    return await fetch_page(db["professionals"], {}, limit, cursor=cursor, skip=skip, projection=projection)
+
+async def get_professional_by_id(
+    db: AsyncIOMotorDatabase, professional_id: str, projection: Optional[dict] = PROFESSIONAL_PROJECTION
+) -> Optional[dict]:
+    return await db["professionals"].find_one({"_id": ObjectId(professional_id)}, projection)
     
-async def get_professional_by_user_id(db: AsyncIOMotorDatabase, user_id: str) -> Optional[dict]:
-    return await db["professionals"].find_one({"user_id": ObjectId(user_id)})
+async def get_professional_version(db: AsyncIOMotorDatabase, professional_id: str) -> Optional[int]:
+    """Versión actual del profesional (None si no existe). Lee solo ese campo."""
+    professional = await db["professionals"].find_one({"_id": ObjectId(professional_id)}, {"version": 1})
+    return None if professional is None else professional.get("version", 0)
+
+async def get_professional_by_user_id(
+    db: AsyncIOMotorDatabase, user_id: str, projection: Optional[dict] = PROFESSIONAL_PROJECTION
+) -> Optional[dict]:
+    return await db["professionals"].find_one({"user_id": ObjectId(user_id)}, projection)
 
 async def update_professional(db: AsyncIOMotorDatabase, professional_id: str, professional_update: ProfessionalUpdate) -> Optional[dict]:
     update_data = {k: v for k, v in professional_update.model_dump(exclude_unset=True).items() if v is not None}
     if not update_data:
         return None
 
-    await db["professionals"].update_one(
-        {"_id": ObjectId(professional_id)},
-        {"$set": update_data}
-    )
-    return await db["professionals"].find_one({"_id": ObjectId(professional_id)})
+    changes = {**update_data, **_derived_search_fields(update_data)}
+    pipeline = [{"$set": {**{k: {"$literal": v} for k, v in changes.items()}, "version": version_increment()}}]
+    touches_search = any(field in update_data for field in SEARCH_SOURCE_FIELDS)
+    if touches_search:
+        # Se recalcula en el servidor con los tokens que no cambiaron, sin leer el documento antes
+        pipeline.append({"$set": {"search_tokens": _search_tokens_expression()}})
+
+    # Una sola escritura: el documento anterior (BEFORE) trae las categorías viejas para
+    # el delta de estadísticas y con él armamos el resultado en memoria.
+    async with admin_service.pending_stats_write(db, tracked="categories" in update_data) as stats:
+        before = await db["professionals"].find_one_and_update(
+            {"_id": ObjectId(professional_id)}, pipeline, return_document=ReturnDocument.BEFORE
+        )
+        if before is None:
+            return None
+        if "categories" in update_data:
+            await stats.record(
+                professionals_by_category=admin_service.category_delta(before.get("categories"), update_data["categories"])
+            )
+
+    updated = {**before, **changes, "version": before.get("version", 0) + 1}
+    if touches_search:
+        sources = ("headline_tokens", "category_tokens", "city_tokens")
+        updated["search_tokens"] = list(dict.fromkeys(t for source in sources for t in updated.get(source) or []))
+        # Título, ciudad y categorías se muestran en los tableros de ranking
+        await ranking_service.refresh_professional(db, updated, before.get("categories_norm") or [])
+    return updated
 
 async def delete_professional(db: AsyncIOMotorDatabase, professional_id: str) -> bool:
-    result = await db["professionals"].delete_one({"_id": ObjectId(professional_id)})
-    return result.deleted_count > 0
\ No newline at end of file
+    async with admin_service.pending_stats_write(db) as stats:
+        deleted = await db["professionals"].find_one_and_delete(
+            {"_id": ObjectId(professional_id)}, projection={"categories": 1, "categories_norm": 1}
+        )
+        if deleted is None:
+            return False
+        await stats.record(
+            professionals=-1,
+            professionals_by_category=admin_service.category_delta(deleted.get("categories"), [])
+        )
+    # Los cuerpos cacheados de sus lecturas no se tocan: sin documento no hay versión
+    # contra la que leerlos, y vencen solos por TTL
+    await ranking_service.remove_professional(db, deleted["_id"], deleted.get("categories_norm") or [])
+    return True
+
+async def search_professionals(
+    db: AsyncIOMotorDatabase,
+    text: Optional[str] = None,
+    category: Optional[str] = None,
+    city: Optional[str] = None,
+    min_rating: Optional[float] = None,
+    skip: int = 0,
+    limit: int = 20,
+    near: Optional[Tuple[float, float]] = None,
+    max_km: float = DEFAULT_NEAR_MAX_KM,
+) -> dict:
+    """
+    Búsqueda de profesionales servida por índices sobre los campos normalizados.
+
+    - `text`: tokens contra `search_tokens` (headline, categorías y ciudad); ordena por
+      cantidad de tokens coincidentes (relevancia) y después por `avg_rating`. Solo
+      cuentan los primeros SEARCH_MAX_QUERY_TOKENS tokens de la consulta.
+    - `category` / `city`: igualdad sobre `categories_norm` / `city_norm`, sin importar
+      mayúsculas ni acentos.
+    - `near` (lat, lng): solo profesionales con `service_location` a menos de `max_km`
+      (y, si declararon `service_radius_km`, que lleguen hasta ahí), ordenados por
+      distancia con `$geoNear` sobre el índice 2dsphere. Cada resultado trae `distance_km`.
+    Devuelve `{"total", "total_capped", "results", "facets": {"categories", "cities"}}`.
+
+    La página de resultados es su propia consulta, servida en orden por los índices
+    (categoría / ciudad / tokens / calificación, más `_id`): lee solo lo que muestra.
+    Con `text` se recorre un nivel de relevancia por vez (ver `_text_page`).
+    El total y los conteos corren en paralelo sobre a lo sumo SEARCH_FACET_SCAN_LIMIT
+    coincidencias; si hay más, `total_capped` es True y los números son una cota.
+    """
+    match = {}
+    query_tokens = tokenize(text)[:settings.SEARCH_MAX_QUERY_TOKENS]
+    if category:
+        match["categories_norm"] = normalize_text(category)
+    if city:
+        match["city_norm"] = normalize_text(city)
+    if min_rating is not None:
+        match["avg_rating"] = {"$gte": min_rating}
+
+    if near is not None:
+        if query_tokens:
+            match["search_tokens"] = {"$in": query_tokens}
+        return await _search_near(db, match, near, max_km, skip, limit)
+
+    if query_tokens:
+        filter_stages = [{"$match": {**match, "search_tokens": {"$in": query_tokens}}}]
+        return await _run_search(db, filter_stages, _text_page(db, match, query_tokens, skip, limit))
+
+    results_pipeline = [
+        {"$match": match},
+        {"$sort": {"avg_rating": -1, "_id": 1}},
+        {"$skip": skip},
+        {"$limit": limit},
+        {"$project": PROFESSIONAL_PROJECTION},
+    ]
+    return await _run_search(db, [{"$match": match}], db["professionals"].aggregate(results_pipeline).to_list(length=None))
+
+def _relevance_tiers(match: dict, tokens: List[str]) -> List[dict]:
+    """
+    Un filtro por nivel de relevancia, del más alto al más bajo: el nivel `r` son los
+    profesionales con exactamente `r` de los tokens (tienen todos los de algún
+    subconjunto de `r` y ninguno de `r + 1`). Cada rama es un `$all`/`$in` que el
+    índice `search_tokens_avg_rating_id` sirve ya ordenado por calificación.
+    """
+    tiers = []
+    for size in range(len(tokens), 0, -1):
+        exclude = {"$nor": [{"search_tokens": {"$all": list(c)}} for c in combinations(tokens, size + 1)]}
+        if size == 1:
+            branches = [{"search_tokens": {"$in": tokens}}]
+        else:
+            branches = [{"search_tokens": {"$all": list(c)}} for c in combinations(tokens, size)]
+        branches = [{**match, **branch, **(exclude if size < len(tokens) else {})} for branch in branches]
+        tiers.append(branches[0] if len(branches) == 1 else {"$or": branches})
+    return tiers
+
+async def _text_page(db: AsyncIOMotorDatabase, match: dict, tokens: List[str], skip: int, limit: int) -> List[dict]:
+    """
+    Página de una búsqueda por texto ordenada por relevancia y después por
+    `avg_rating`. Recorre los niveles de relevancia en orden y corta al llenar la
+    página: lee a lo sumo `skip + limit` documentos más un conteo acotado por nivel
+    salteado, nunca todas las coincidencias.
+    """
+    results = []
+    for tier in _relevance_tiers(match, tokens):
+        if len(results) >= limit:
+            break
+        page = await db["professionals"].find(tier, PROFESSIONAL_PROJECTION).sort(
+            [("avg_rating", -1), ("_id", 1)]
+        ).skip(skip).limit(limit - len(results)).to_list(length=None)
+        if page:
+            results += page
+            skip = 0
+        elif skip:
+            # El nivel entero cae antes de la página: se descuenta lo que ocupa
+            skip -= await db["professionals"].count_documents(tier, limit=skip)
+    return results
+
+def _facets_pipeline(filter_stages: list) -> list:
+    """Total y conteos por categoría y ciudad sobre las primeras coincidencias (acotado)."""
+    return [
+        *filter_stages,
+        # Una de más para saber si el total quedó recortado
+        {"$limit": settings.SEARCH_FACET_SCAN_LIMIT + 1},
+        {"$facet": {
+            "total": [{"$count": "count"}],
+            "categories": [
+                {"$limit": settings.SEARCH_FACET_SCAN_LIMIT},
+                {"$unwind": "$categories"},
+                {"$group": {"_id": "$categories", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "_id": 1}},
+                {"$limit": FACET_LIMIT},
+            ],
+            "cities": [
+                {"$limit": settings.SEARCH_FACET_SCAN_LIMIT},
+                {"$match": {"city": {"$nin": [None, ""]}}},
+                {"$group": {"_id": "$city", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "_id": 1}},
+                {"$limit": FACET_LIMIT},
+            ],
+        }},
+    ]
+
+async def _search_near(
+    db: AsyncIOMotorDatabase, match: dict, near: Tuple[float, float], max_km: float, skip: int, limit: int
+) -> dict:
+    """
+    Modo `near` de search_professionals: $geoNear ya devuelve ordenado por distancia,
+    así que la página corta en skip + limit. Los conteos reciben el mismo $geoNear pero
+    leen a lo sumo SEARCH_FACET_SCAN_LIMIT profesionales (los más cercanos), no todos
+    los que estén dentro de `max_km`.
+    """
+    lat, lng = near
+    filter_stages = [
+        {"$geoNear": {
+            "near": {"type": "Point", "coordinates": [lng, lat]},
+            "key": "service_location",
+            "distanceField": "distance_m",
+            "maxDistance": max_km * 1000,
+            "spherical": True,
+            "query": match,
+        }},
+        # Quien declaró un radio de trabajo solo aparece si el punto buscado queda dentro
+        {"$match": {"$expr": {"$or": [
+            {"$eq": [{"$ifNull": ["$service_radius_km", None]}, None]},
+            {"$lte": ["$distance_m", {"$multiply": ["$service_radius_km", 1000]}]},
+        ]}}},
+    ]
+    results_pipeline = [
+        *filter_stages,
+        {"$skip": skip},
+        {"$limit": limit},
+        {"$set": {"distance_km": {"$divide": ["$distance_m", 1000]}}},
+        {"$project": {**PROFESSIONAL_PROJECTION, "distance_km": 1}},
+    ]
+    return await _run_search(db, filter_stages, db["professionals"].aggregate(results_pipeline).to_list(length=None))
+
+async def _run_search(db: AsyncIOMotorDatabase, filter_stages: list, results: Awaitable[List[dict]]) -> dict:
+    """Corre la página (`results`) y los conteos sobre `filter_stages` en paralelo."""
+    results, facets = await asyncio.gather(
+        results,
+        db["professionals"].aggregate(_facets_pipeline(filter_stages)).to_list(length=1),
+    )
+    facet = facets[0]
+    total = facet["total"][0]["count"] if facet["total"] else 0
+    return {
+        "total": min(total, settings.SEARCH_FACET_SCAN_LIMIT),
+        "total_capped": total > settings.SEARCH_FACET_SCAN_LIMIT,
+        "results": results,
+        "facets": {
+            "categories": [{"value": f["_id"], "count": f["count"]} for f in facet["categories"]],
+            "cities": [{"value": f["_id"], "count": f["count"]} for f in facet["cities"]],
+        },
+    }
+
+async def reindex_search_fields(db: AsyncIOMotorDatabase, batch_size: int = 1000) -> int:
+    """Completa los campos de búsqueda de los profesionales creados antes de tenerlos."""
+    updated = 0
+    cursor = db["professionals"].find(
+        {"search_tokens": {"$exists": False}},
+        {field: 1 for field in SEARCH_SOURCE_FIELDS},
+    ).batch_size(batch_size)
+    ops = []
+    async for doc in cursor:
+        fields = {field: doc.get(field) for field in SEARCH_SOURCE_FIELDS}
+        derived = _derived_search_fields(fields)
+        derived["search_tokens"] = tokenize_many([fields["headline"], *(fields["categories"] or []), fields["city"]])
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": derived}))
+        if len(ops) == batch_size:
+            updated += (await db["professionals"].bulk_write(ops, ordered=False)).modified_count
+            ops = []
+    if ops:
+        updated += (await db["professionals"].bulk_write(ops, ordered=False)).modified_count
+    return updated
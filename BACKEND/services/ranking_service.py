@@ -0,0 +1,318 @@
+# services/ranking_service.py
+"""
+Ranking de profesionales por categoría.
+
+El puntaje es un promedio bayesiano: cada profesional arranca con
+RANKING_PRIOR_WEIGHT reseñas "virtuales" de RANKING_PRIOR_MEAN estrellas, así
+que una sola reseña de 5 no le gana a 400 de 4,9:
+
+    bayes_score = (PRIOR_WEIGHT * PRIOR_MEAN + rating_sum) / (PRIOR_WEIGHT + total_reviews)
+
+`bayes_score` vive en el documento del profesional (lo actualiza add_review en la
+misma escritura que el rating) y la colección `leaderboards` materializa el top
+de cada categoría: un documento por categoría normalizada con `entries` ya
+ordenadas. GET /professionals/top lee un solo documento por _id.
+
+Cada escritura que cambia a un profesional llama a `refresh_professional`, que
+actualiza los tableros de sus categorías con un update por pipeline (atómico por
+tablero, sin leerlo antes). Cada tablero guarda LEADERBOARD_SIZE + LEADERBOARD_BUFFER
+entradas: mientras el profesional que cambió no quede último en un tablero truncado
+el orden guardado es exacto; si queda último (o el tablero se achica) se reconstruye
+esa categoría con una consulta sobre el índice (categories_norm, bayes_score).
+
+Sobre datos previos al ranking (profesionales sin `bayes_score`, tableros vacíos)
+hay que correr una vez `rebuild_leaderboards`: POST /admin/maintenance/rebuild-leaderboards
+o `python -m services.ranking_service`.
+"""
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from core.config import settings
+
+LEADERBOARDS_COLLECTION = "leaderboards"
+ENTRY_FIELDS = ("headline", "city", "avg_rating", "total_reviews", "bayes_score", "version")
+# Lo que hay que leer del profesional para armar su entrada y saber en qué tableros va
+RANKING_PROJECTION = {field: 1 for field in (*ENTRY_FIELDS, "categories_norm")}
+
+
+def capacity() -> int:
+    return settings.LEADERBOARD_SIZE + settings.LEADERBOARD_BUFFER
+
+
+def bayes_score(rating_sum: float, total_reviews: int) -> float:
+    weight = settings.RANKING_PRIOR_WEIGHT
+    return (weight * settings.RANKING_PRIOR_MEAN + rating_sum) / (weight + total_reviews)
+
+
+def bayes_score_expression() -> dict:
+    """La misma fórmula como expresión de agregación sobre `rating_sum` y `total_reviews`."""
+    weight = settings.RANKING_PRIOR_WEIGHT
+    return {"$divide": [
+        {"$add": [weight * settings.RANKING_PRIOR_MEAN, {"$ifNull": ["$rating_sum", 0]}]},
+        {"$add": [weight, {"$ifNull": ["$total_reviews", 0]}]},
+    ]}
+
+
+def is_ranked(professional: dict) -> bool:
+    return (professional.get("total_reviews") or 0) >= settings.RANKING_MIN_REVIEWS
+
+
+def leaderboard_entry(professional: dict) -> dict:
+    entry = {"professional_id": professional["_id"]}
+    entry.update({field: professional.get(field) for field in ENTRY_FIELDS})
+    entry["version"] = entry["version"] or 0
+    return entry
+
+
+def _ranked_entries(entries) -> dict:
+    """Ordena (puntaje desc, _id asc) y corta en la capacidad del tablero."""
+    return {"$slice": [
+        {"$sortArray": {"input": entries, "sortBy": {"bayes_score": -1, "professional_id": 1}}},
+        capacity(),
+    ]}
+
+
+def _next_generation() -> dict:
+    """Cada escritura incremental sube `generation`: las reconstrucciones escriben solo si no cambió."""
+    return {"$add": [{"$ifNull": ["$generation", 0]}, 1]}
+
+
+def _generation_filter(category: str, generation: int) -> dict:
+    """El tablero de `category` si sigue en `generation` (0 también cubre tableros sin el campo o que no existen)."""
+    return {"_id": category, "generation": generation if generation else {"$in": [0, None]}}
+
+
+def _upsert_entry_pipeline(entry: dict) -> list:
+    """
+    Reemplaza (o agrega) la entrada del profesional y reordena. Si el tablero ya
+    tiene una versión más nueva de ese profesional (dos escrituras que se cruzaron),
+    la entrada que llega se descarta.
+    """
+    others = {"$filter": {
+        "input": "$entries", "cond": {"$ne": ["$$this.professional_id", entry["professional_id"]]},
+    }}
+    current_version = {"$ifNull": [{"$max": {"$map": {
+        "input": {"$filter": {
+            "input": "$entries", "cond": {"$eq": ["$$this.professional_id", entry["professional_id"]]},
+        }},
+        "in": "$$this.version",
+    }}}, -1]}
+    return [
+        {"$set": {"entries": {"$ifNull": ["$entries", []]}}},
+        {"$set": {
+            "truncated": {"$or": [
+                {"$ifNull": ["$truncated", False]},
+                {"$gte": [{"$size": others}, capacity()]},
+            ]},
+            "entries": {"$cond": [
+                {"$gte": [entry["version"], current_version]},
+                _ranked_entries({"$concatArrays": [others, [{"$literal": entry}]]}),
+                "$entries",
+            ]},
+            "generation": _next_generation(),
+            "updated_at": datetime.utcnow(),
+        }},
+    ]
+
+
+def _remove_entry_pipeline(professional_id: ObjectId) -> list:
+    return [{"$set": {
+        "entries": {"$filter": {
+            "input": {"$ifNull": ["$entries", []]},
+            "cond": {"$ne": ["$$this.professional_id", professional_id]},
+        }},
+        "generation": _next_generation(),
+        "updated_at": datetime.utcnow(),
+    }}]
+
+
+def _needs_rebuild(board: Optional[dict], professional_id: ObjectId) -> bool:
+    """
+    En un tablero truncado (hay profesionales afuera) solo se puede confiar en el
+    orden si el que cambió no quedó último y no faltan entradas.
+    """
+    if board is None or not board.get("truncated"):
+        return False
+    entries = board.get("entries") or []
+    if len(entries) < capacity():
+        return True
+    return entries[-1]["professional_id"] == professional_id
+
+
+async def refresh_professional(
+    db: AsyncIOMotorDatabase, professional: dict, previous_categories: Iterable[str] = ()
+) -> None:
+    """
+    Actualiza los tableros después de una escritura sobre `professional` (documento
+    con RANKING_PROJECTION). `previous_categories` son las categorías normalizadas
+    que tenía antes, para sacarlo de las que ya no tiene.
+    """
+    professional_id = professional["_id"]
+    categories = set(professional.get("categories_norm") or [])
+    boards = db[LEADERBOARDS_COLLECTION]
+    to_rebuild = []
+
+    for category in set(previous_categories) - categories:
+        board = await boards.find_one_and_update(
+            {"_id": category}, _remove_entry_pipeline(professional_id), return_document=ReturnDocument.AFTER
+        )
+        if _needs_rebuild(board, professional_id):
+            to_rebuild.append(category)
+
+    if is_ranked(professional):
+        pipeline = _upsert_entry_pipeline(leaderboard_entry(professional))
+        for category in categories:
+            board = await boards.find_one_and_update(
+                {"_id": category}, pipeline, upsert=True, return_document=ReturnDocument.AFTER
+            )
+            if _needs_rebuild(board, professional_id):
+                to_rebuild.append(category)
+
+    for category in to_rebuild:
+        await rebuild_category(db, category)
+
+
+async def remove_professional(db: AsyncIOMotorDatabase, professional_id: ObjectId, categories: Iterable[str]) -> None:
+    """Saca al profesional (borrado) de los tableros de sus categorías."""
+    await refresh_professional(db, {"_id": professional_id, "categories_norm": []}, categories)
+
+
+async def rebuild_category(db: AsyncIOMotorDatabase, category: str, attempts: int = 3) -> dict:
+    """
+    Recalcula el tablero de una categoría desde `professionals` (lee capacity() + 1
+    documentos). La escritura está condicionada a la `generation` leída antes de la
+    consulta: si un refresh_professional tocó el tablero entre medio, su entrada
+    podría perderse, así que se vuelve a calcular (hasta `attempts` veces; si no,
+    queda el tablero incremental, que ya incluye esa escritura).
+    """
+    boards = db[LEADERBOARDS_COLLECTION]
+    board = None
+    for _ in range(attempts):
+        current = await boards.find_one({"_id": category}, {"generation": 1})
+        generation = (current or {}).get("generation", 0)
+        cursor = db["professionals"].find(
+            {"categories_norm": category, "total_reviews": {"$gte": settings.RANKING_MIN_REVIEWS}},
+            RANKING_PROJECTION,
+        ).sort([("bayes_score", -1), ("_id", 1)]).limit(capacity() + 1)
+        professionals = await cursor.to_list(length=capacity() + 1)
+        board = {
+            "entries": [leaderboard_entry(p) for p in professionals[:capacity()]],
+            "truncated": len(professionals) > capacity(),
+            "generation": generation + 1,
+            "updated_at": datetime.utcnow(),
+        }
+        try:
+            result = await boards.replace_one(_generation_filter(category, generation), board, upsert=True)
+        except DuplicateKeyError:
+            continue  # Otro escritor creó el tablero mientras tanto
+        if result.matched_count or result.upserted_id is not None:
+            return board
+    return board
+
+
+async def rebuild_leaderboards(db: AsyncIOMotorDatabase, batch_size: int = 1000) -> int:
+    """
+    Recalcula `bayes_score` de todos los profesionales (por si cambió el prior) y
+    reconstruye todos los tableros con una agregación. Devuelve cuántos tableros escribió.
+
+    Como en `rebuild_category`, cada tablero se escribe solo si su `generation` no
+    cambió desde antes de agregar, y cada escritura la sube. Las escrituras llevan
+    un `rebuild_id` propio: los tableros que no lo tienen al terminar el lote los
+    tocó un refresh_professional en el medio y se reconstruyen con `rebuild_category`.
+    """
+    await db["professionals"].update_many({}, [{"$set": {"bayes_score": bayes_score_expression()}}])
+    boards = db[LEADERBOARDS_COLLECTION]
+    generations = {board["_id"]: board.get("generation", 0) async for board in boards.find({}, {"generation": 1})}
+    pipeline = [
+        {"$match": {"total_reviews": {"$gte": settings.RANKING_MIN_REVIEWS}}},
+        {"$project": {**RANKING_PROJECTION, "professional_id": "$_id"}},
+        {"$unwind": "$categories_norm"},
+        {"$group": {
+            "_id": "$categories_norm",
+            "entries": {"$topN": {
+                "n": capacity() + 1,
+                "sortBy": {"bayes_score": -1, "professional_id": 1},
+                "output": {"professional_id": "$professional_id", **{f: {"$ifNull": [f"${f}", None]} for f in ENTRY_FIELDS}},
+            }},
+        }},
+    ]
+    rebuild_id = ObjectId()
+    now = datetime.utcnow()
+    written = 0
+    ops: List = []
+    categories: List[str] = []
+
+    def add_board(category: str, entries: list) -> None:
+        categories.append(category)
+        ops.append(UpdateOne(
+            _generation_filter(category, generations.get(category, 0)),
+            [{"$set": {
+                "entries": {"$literal": entries[:capacity()]},
+                "truncated": len(entries) > capacity(),
+                "generation": _next_generation(),
+                "rebuild_id": rebuild_id,
+                "updated_at": now,
+            }}],
+            upsert=True,
+        ))
+
+    async def flush():
+        nonlocal written, ops, categories
+        if not ops:
+            return
+        try:
+            await boards.bulk_write(ops, ordered=False)
+        except BulkWriteError as exc:
+            # Un tablero que no existía lo creó un refresh en el medio: el upsert choca por _id
+            if any(error.get("code") != 11000 for error in exc.details.get("writeErrors", [])):
+                raise
+        skipped = boards.find({"_id": {"$in": categories}, "rebuild_id": {"$ne": rebuild_id}}, {"_id": 1})
+        async for board in skipped:
+            await rebuild_category(db, board["_id"])
+        written += len(ops)
+        ops, categories = [], []
+
+    seen = set()
+    async for board in db["professionals"].aggregate(pipeline, allowDiskUse=True):
+        seen.add(board["_id"])
+        entries = board["entries"]
+        for entry in entries:
+            entry["version"] = entry["version"] or 0
+        add_board(board["_id"], entries)
+        if len(ops) >= batch_size:
+            await flush()
+    # Categorías que se quedaron sin profesionales rankeados
+    for category in generations:
+        if category not in seen:
+            add_board(category, [])
+            if len(ops) >= batch_size:
+                await flush()
+    await flush()
+    return written
+
+
+async def get_leaderboard(db: AsyncIOMotorDatabase, category: str, limit: int) -> List[dict]:
+    """Top `limit` de la categoría (ya normalizada): una lectura por _id."""
+    board = await db[LEADERBOARDS_COLLECTION].find_one(
+        {"_id": category}, {"entries": {"$slice": limit}}
+    )
+    return board["entries"] if board else []
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    from database import databaseMongo
+
+    async def _main():
+        database = databaseMongo.connect()
+        written = await rebuild_leaderboards(database)
+        print(f"Tableros reconstruidos: {written}")
+        databaseMongo.close()
+
+    asyncio.run(_main())
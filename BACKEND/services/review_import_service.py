@@ -0,0 +1,136 @@
+# services/review_import_service.py
+"""
+Importación masiva de reseñas históricas (migraciones de otros marketplaces).
+
+Lee NDJSON (una reseña por línea), inserta por chunks con `insert_many` y, al
+terminar cada chunk, recalcula el rating de los profesionales afectados: por lote,
+una lectura, una agregación agrupada y un `bulk_write` (ver `review_service.reconcile_ratings`).
+
+Formato de cada línea:
+    {"professional_id": "...", "client_id": "...", "rating": 5, "comment": "...",
+     "created_at": "2023-05-01T12:00:00"}      # created_at es opcional
+
+Uso:
+    python -m services.review_import_service reseñas.ndjson [--chunk-size 5000]
+"""
+import json
+import time
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+
+from schemas.review_schema import ReviewIn
+from services import ranking_service, review_service
+
+DEFAULT_CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 100
+
+
+def parse_review_line(line: str) -> dict:
+    """Valida una línea NDJSON y la convierte en el documento a insertar."""
+    raw = json.loads(line)
+    review_in = ReviewIn(**raw)
+    if not ObjectId.is_valid(review_in.professional_id) or not ObjectId.is_valid(raw.get("client_id", "")):
+        raise ValueError("professional_id o client_id inválido")
+    created_at = raw.get("created_at")
+    return {
+        "rating": review_in.rating,
+        "comment": review_in.comment,
+        "professional_id": ObjectId(review_in.professional_id),
+        "client_id": ObjectId(raw["client_id"]),
+        "created_at": datetime.fromisoformat(created_at) if created_at else datetime.utcnow(),
+    }
+
+
+async def _import_chunk(db: AsyncIOMotorDatabase, docs: List[dict]) -> int:
+    """Inserta el chunk y recalcula los ratings de sus profesionales. Devuelve los insertados."""
+    inserted = len(docs)
+    try:
+        await db["reviews"].insert_many(docs, ordered=False)
+    except BulkWriteError as exc:
+        inserted = exc.details.get("nInserted", 0)
+    affected = list({doc["professional_id"] for doc in docs})
+    await review_service.reconcile_ratings(db, professional_ids=affected, reset_missing=False)
+    return inserted
+
+
+async def import_reviews(
+    db: AsyncIOMotorDatabase,
+    lines: Iterable[str],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_progress: Optional[Callable[[int, float], None]] = None,
+) -> dict:
+    """
+    Importa las reseñas de `lines` (NDJSON). Las líneas inválidas se saltean y se
+    informan en `errors` (hasta MAX_REPORTED_ERRORS). Al final se reconstruyen
+    los tableros de ranking una sola vez.
+    """
+    started = time.perf_counter()
+    inserted = 0
+    invalid = 0
+    errors = []
+    chunk = []
+
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            chunk.append(parse_review_line(line))
+        except (ValueError, TypeError, ValidationError) as exc:
+            invalid += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"line": line_number, "error": str(exc)})
+            continue
+        if len(chunk) == chunk_size:
+            inserted += await _import_chunk(db, chunk)
+            chunk = []
+            if on_progress:
+                on_progress(inserted, time.perf_counter() - started)
+    if chunk:
+        inserted += await _import_chunk(db, chunk)
+    if inserted:
+        await ranking_service.rebuild_leaderboards(db)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "inserted": inserted,
+        "invalid": invalid,
+        "errors": errors,
+        "elapsed_seconds": elapsed,
+        "reviews_per_second": inserted / elapsed if elapsed else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+
+    from database import databaseMongo
+
+    parser = argparse.ArgumentParser(description="Importa reseñas desde un archivo NDJSON")
+    parser.add_argument("path")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    def report_progress(done: int, elapsed: float):
+        print(f"{done} reseñas importadas ({done / elapsed:.0f} reseñas/s)")
+
+    async def _main():
+        database = databaseMongo.connect()
+        try:
+            with open(args.path, encoding="utf-8") as source:
+                result = await import_reviews(database, source, args.chunk_size, on_progress=report_progress)
+        finally:
+            databaseMongo.close()
+        print(
+            f"Listo: {result['inserted']} insertadas, {result['invalid']} inválidas, "
+            f"{result['elapsed_seconds']:.1f}s, {result['reviews_per_second']:.0f} reseñas/s"
+        )
+        for error in result["errors"]:
+            print(f"  línea {error['line']}: {error['error']}")
+
+    asyncio.run(_main())
@@ -1,11 +1,54 @@
 # services/review_service.py
 # CORRECCIÓN: Actualizamos los campos de rating en inglés.
-from typing import List, Optional
+import asyncio
+import logging
+from typing import List, Optional, Tuple
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, ReturnDocument, UpdateOne
 from datetime import datetime
 
-from schemas.review_schema import ReviewIn
+from schemas.review_schema import ReviewIn, ReviewOut, ReviewSort
+from services import ranking_service
+from services.professional_service import RATING_STARS, empty_rating_histogram, version_increment
+from utils.pagination import fetch_page
+from utils.serialization import projection_for
+
+logger = logging.getLogger(__name__)
+
+REVIEW_PROJECTION = projection_for(ReviewOut)
+# Órdenes del listado de reseñas: cada uno tiene su índice (professional_id, campo, _id)
+REVIEW_SORTS = {
+    ReviewSort.RECENT: ("created_at", DESCENDING),
+    ReviewSort.OLDEST: ("created_at", ASCENDING),
+    ReviewSort.BEST: ("rating", DESCENDING),
+    ReviewSort.WORST: ("rating", ASCENDING),
+}
+
+def rating_increment_pipeline(rating: int) -> list:
+    """
+    Update por pipeline que suma una reseña al profesional de forma atómica:
+    incrementa `rating_sum`, `total_reviews` y `rating_histogram.<estrellas>` y deriva
+    `avg_rating` y `bayes_score` en la misma escritura.
+    Si el documento es anterior a `rating_sum`, parte de avg_rating * total_reviews.
+    """
+    bucket = f"rating_histogram.{rating}"
+    previous_sum = {"$ifNull": ["$rating_sum", {"$multiply": [
+        {"$ifNull": ["$avg_rating", 0]}, {"$ifNull": ["$total_reviews", 0]}
+    ]}]}
+    return [
+        {"$set": {
+            "rating_sum": {"$add": [previous_sum, rating]},
+            "total_reviews": {"$add": [{"$ifNull": ["$total_reviews", 0]}, 1]},
+            bucket: {"$add": [{"$ifNull": [f"${bucket}", 0]}, 1]},
+            # Cambia la lista de reseñas y el rating: nuevo ETag para ambos GET
+            "version": version_increment(),
+        }},
+        {"$set": {
+            "avg_rating": {"$divide": ["$rating_sum", "$total_reviews"]},
+            "bayes_score": ranking_service.bayes_score_expression(),
+        }},
+    ]
 
 async def add_review(db: AsyncIOMotorDatabase, review_in: ReviewIn, user_id: str) -> dict:
     review_dict = review_in.model_dump()
@@ -15,30 +58,127 @@ async def add_review(db: AsyncIOMotorDatabase, review_in: ReviewIn, user_id: str
     
     result = await db["reviews"].insert_one(review_dict)
     
-    professional_id = ObjectId(review_in.professional_id)
+    # O(1): no se vuelve a agregar sobre todas las reseñas del profesional. La misma
+    # escritura devuelve lo que necesitan los tableros de su categoría.
+    professional = await db["professionals"].find_one_and_update(
+        {"_id": review_dict["professional_id"]},
+        rating_increment_pipeline(review_in.rating),
+        projection=ranking_service.RANKING_PROJECTION,
+        return_document=ReturnDocument.AFTER,
+    )
+    if professional is not None:
+        await ranking_service.refresh_professional(db, professional)
+
+    review_dict["_id"] = result.inserted_id
+    return review_dict
+
+async def get_reviews_for_professional(
+    db: AsyncIOMotorDatabase,
+    professional_id: str,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    sort: ReviewSort = ReviewSort.RECENT,
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Una página de reseñas del profesional en el orden `sort` (ver REVIEW_SORTS),
+    por keyset sobre el índice del orden elegido. Devuelve (reseñas, próximo cursor).
+    """
+    sort_field, direction = REVIEW_SORTS[sort]
+    return await fetch_page(
+        db["reviews"], {"professional_id": ObjectId(professional_id)}, limit, cursor=cursor,
+        sort_field=sort_field, direction=direction, projection=REVIEW_PROJECTION,
+    )
+
+async def reconcile_ratings(
+    db: AsyncIOMotorDatabase,
+    professional_ids: Optional[List[ObjectId]] = None,
+    batch_size: int = 1000,
+    reset_missing: bool = True,
+) -> int:
+    """
+    Recalcula `rating_sum`, `total_reviews`, `avg_rating`, `bayes_score` y `rating_histogram` desde la colección `reviews`
+    y corrige los profesionales que se desviaron. Si no se pasan ids, revisa todos.
+    Con `reset_missing` también pone en cero a los que tienen contadores pero ya no
+    tienen reseñas. Solo escribe los documentos con diferencias; devuelve cuántos corrigió.
+
+    Va por lotes de `batch_size` profesionales: lee sus contadores y su `version`,
+    agrega sus reseñas y corrige con un `bulk_write` filtrado por esa `version`. Un
+    `add_review` que llega en el medio sube la versión, así que ese profesional no se
+    pisa con conteos viejos: queda para la próxima pasada.
+    """
+    query = {"_id": {"$in": professional_ids}} if professional_ids is not None else {}
+    cursor = db["professionals"].find(
+        query, {"version": 1, "rating_sum": 1, "total_reviews": 1, "rating_histogram": 1}
+    ).sort("_id", ASCENDING).batch_size(batch_size)
+
+    fixed = 0
+    batch = []
+    async for professional in cursor:
+        batch.append(professional)
+        if len(batch) >= batch_size:
+            fixed += await _reconcile_batch(db, batch, reset_missing)
+            batch = []
+    if batch:
+        fixed += await _reconcile_batch(db, batch, reset_missing)
+    return fixed
+
+async def _reconcile_batch(db: AsyncIOMotorDatabase, professionals: List[dict], reset_missing: bool) -> int:
+    """Una agregación agrupada sobre las reseñas del lote y un `bulk_write` con lo que difiere."""
     pipeline = [
-        {"$match": {"professional_id": professional_id}},
+        {"$match": {"professional_id": {"$in": [professional["_id"] for professional in professionals]}}},
         {"$group": {
             "_id": "$professional_id",
-            "avg_rating": {"$avg": "$rating"},
-            "count": {"$sum": 1}
-        }}
+            "rating_sum": {"$sum": "$rating"},
+            "count": {"$sum": 1},
+            **{f"stars_{stars}": {"$sum": {"$cond": [{"$eq": ["$rating", stars]}, 1, 0]}} for stars in RATING_STARS},
+        }},
     ]
-    
-    stats_cursor = db["reviews"].aggregate(pipeline)
-    stats = await stats_cursor.to_list(length=1)
-    
-    if stats:
-        avg_rating = stats[0]['avg_rating']
-        count = stats[0]['count']
-        await db["professionals"].update_one(
-            {"_id": professional_id},
-            {"$set": {"avg_rating": avg_rating, "total_reviews": count}}
-        )
-        
-    new_review = await db["reviews"].find_one({"_id": result.inserted_id})
-    return new_review
-
-async def get_reviews_for_professional(db: AsyncIOMotorDatabase, professional_id: str) -> List[dict]:
-    reviews_cursor = db["reviews"].find({"professional_id": ObjectId(professional_id)})
-    return await reviews_cursor.to_list(length=None)
\ No newline at end of file
+    totals = {stats["_id"]: stats async for stats in db["reviews"].aggregate(pipeline)}
+
+    ops = []
+    for professional in professionals:
+        stats = totals.get(professional["_id"])
+        if stats is not None:
+            histogram = {str(stars): stats[f"stars_{stars}"] for stars in RATING_STARS}
+            rating_sum, count = stats["rating_sum"], stats["count"]
+        elif reset_missing and professional.get("total_reviews"):
+            # Tiene contadores pero ya no tiene reseñas
+            histogram, rating_sum, count = empty_rating_histogram(), 0, 0
+        else:
+            continue
+        stored_histogram = professional.get("rating_histogram") or {}
+        if (
+            professional.get("rating_sum") == rating_sum
+            and professional.get("total_reviews") == count
+            and all(stored_histogram.get(stars) == value for stars, value in histogram.items())
+        ):
+            continue
+        ops.append(UpdateOne(
+            # Sin `version` (documentos viejos) el filtro None también coincide con el campo ausente
+            {"_id": professional["_id"], "version": professional.get("version")},
+            {"$set": {
+                "rating_sum": rating_sum,
+                "total_reviews": count,
+                "avg_rating": rating_sum / count if count else 0.0,
+                "bayes_score": ranking_service.bayes_score(rating_sum, count),
+                "rating_histogram": histogram,
+            }, "$inc": {"version": 1}},
+        ))
+    if not ops:
+        return 0
+    return (await db["professionals"].bulk_write(ops, ordered=False)).modified_count
+
+async def reconcile_ratings_periodically(db: AsyncIOMotorDatabase, interval_seconds: int):
+    """
+    Tarea de fondo que corre `reconcile_ratings` cada `interval_seconds`. Si corrigió
+    algo, reconstruye los tableros de ranking.
+    """
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            fixed = await reconcile_ratings(db)
+            if fixed:
+                logger.warning("Reconciliación de ratings: %s profesionales corregidos", fixed)
+                await ranking_service.rebuild_leaderboards(db)
+        except Exception:
+            logger.exception("Falló la reconciliación de ratings")
@@ -2,43 +2,92 @@
 from typing import List, Optional
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
 
-from schemas.user_schemas import UserIn, UserOut
-from utils.security import hash_password
+from core.config import settings
+from services import admin_service
+from schemas.user_schemas import UserIn, UserOut, UserUpdate
+from utils.cache import TTLCache
+from utils.security import hash_password_async
+from utils.serialization import projection_for, serialize_many
 
+# Por defecto las lecturas traen solo los campos de UserOut (nunca el hash de la contraseña).
+# El login pide explícitamente LOGIN_PROJECTION; `projection=None` trae el documento completo.
+USER_OUT_PROJECTION = projection_for(UserOut)
+LOGIN_PROJECTION = {"_id": 1, "password": 1}
 
-async def get_user_by_id(db: AsyncIOMotorDatabase, user_id: str) -> Optional[dict]:
+# Usuarios ya validados (UserOut) por id, usados por get_current_user.
+# Toda escritura sobre un usuario tiene que invalidar su entrada.
+principal_cache = TTLCache(
+    "principals",
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+async def get_user_by_id(
+    db: AsyncIOMotorDatabase, user_id: str, projection: Optional[dict] = USER_OUT_PROJECTION
+) -> Optional[dict]:
     """Busca un usuario por su ID."""
-    user = await db["users"].find_one({"_id": ObjectId(user_id)})
+    user = await db["users"].find_one({"_id": ObjectId(user_id)}, projection)
     return user
 
-async def get_user_by_email(db: AsyncIOMotorDatabase, email: str) -> Optional[dict]:
+async def get_user_by_email(
+    db: AsyncIOMotorDatabase, email: str, projection: Optional[dict] = USER_OUT_PROJECTION
+) -> Optional[dict]:
     """Busca un usuario por su email."""
-    user = await db["users"].find_one({"email": email})
+    user = await db["users"].find_one({"email": email}, projection)
     return user
 
-async def get_user_by_username(db: AsyncIOMotorDatabase, username: str) -> Optional[dict]:
+async def get_user_by_username(
+    db: AsyncIOMotorDatabase, username: str, projection: Optional[dict] = USER_OUT_PROJECTION
+) -> Optional[dict]:
     """Busca un usuario por su username."""
-    user = await db["users"].find_one({"username": username})
+    user = await db["users"].find_one({"username": username}, projection)
     return user
 
-async def get_all_users(db: AsyncIOMotorDatabase) -> List[UserOut]:
-    """Obtiene todos los usuarios de la base de datos."""
-    users_cursor = db["users"].find()
+async def get_all_users(db: AsyncIOMotorDatabase) -> List[dict]:
+    """Obtiene todos los usuarios de la base de datos, ya convertidos a la forma de UserOut."""
+    users_cursor = db["users"].find({}, USER_OUT_PROJECTION)
     users = await users_cursor.to_list(length=None)
-    return [UserOut(**user) for user in users]
+    return serialize_many(UserOut, users)
 
-async def create_user(db: AsyncIOMotorDatabase, user_in: UserIn) -> dict:
-    """Crea un nuevo usuario en la base de datos."""
-    hashed_password = hash_password(user_in.password)
+async def create_user(db: AsyncIOMotorDatabase, user_in: UserIn, user_id: Optional[ObjectId] = None) -> dict:
+    """Crea un nuevo usuario en la base de datos. `user_id` permite fijar el _id de antemano."""
+    hashed_password = await hash_password_async(user_in.password)
     user_dict = user_in.model_dump()
     user_dict["password"] = hashed_password
+    if user_id is not None:
+        user_dict["_id"] = user_id
     
-    result = await db["users"].insert_one(user_dict)
-    created_user = await db["users"].find_one({"_id": result.inserted_id})
-    return created_user
+    async with admin_service.pending_stats_write(db) as stats:
+        result = await db["users"].insert_one(user_dict)
+        await stats.record(users=1)
+    user_dict["_id"] = result.inserted_id
+    return user_dict
+
+async def update_user(db: AsyncIOMotorDatabase, user_id: str, user_update: UserUpdate) -> Optional[dict]:
+    """Actualiza los datos de un usuario e invalida su entrada en la caché de principals."""
+    update_data = {k: v for k, v in user_update.model_dump(exclude_unset=True).items() if v is not None}
+    if not update_data:
+        return None
+
+    updated_user = await db["users"].find_one_and_update(
+        {"_id": ObjectId(user_id)}, {"$set": update_data},
+        projection=USER_OUT_PROJECTION, return_document=ReturnDocument.AFTER
+    )
+    principal_cache.invalidate(str(user_id))
+    return updated_user
+
+async def update_password_hash(db: AsyncIOMotorDatabase, user_id: ObjectId, password_hash: str) -> None:
+    """Reemplaza el hash de la contraseña (por ejemplo, al cambiar el costo de bcrypt)."""
+    await db["users"].update_one({"_id": user_id}, {"$set": {"password": password_hash}})
+    principal_cache.invalidate(str(user_id))
 
 async def delete_user(db: AsyncIOMotorDatabase, user_id: str) -> bool:
     """Elimina un usuario por su ID."""
-    result = await db["users"].delete_one({"_id": ObjectId(user_id)})
+    async with admin_service.pending_stats_write(db) as stats:
+        result = await db["users"].delete_one({"_id": ObjectId(user_id)})
+        principal_cache.invalidate(str(user_id))
+        if result.deleted_count:
+            await stats.record(users=-1)
     return result.deleted_count > 0
\ No newline at end of file
@@ -4,6 +4,10 @@ import pytest
 import pytest_asyncio # <--- 1. AGREGAMOS ESTE IMPORT
 from httpx import AsyncClient
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from email import message_from_bytes
+import socketserver
+import threading
 import sys
 import os
 
@@ -13,6 +17,7 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 from main import app
+from core.config import settings
 from database.databaseMongo import get_db
 
 TEST_MONGO_URL = "mongodb://localhost:27017"
@@ -36,6 +41,108 @@ async def db():
     await client.drop_database(TEST_DB_NAME)
     client.close()
 
+class CommandCounter(monitoring.CommandListener):
+    """Registra (comando, colección) de cada comando que el cliente manda a Mongo."""
+
+    def __init__(self):
+        self.commands = []
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        collection = target if isinstance(target, str) else None
+        self.commands.append((event.command_name, collection))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def reset(self):
+        self.commands.clear()
+
+    def on(self, collection: str) -> list:
+        """Comandos dirigidos a `collection`."""
+        return [name for name, target in self.commands if target == collection]
+
+@pytest.fixture(scope="function")
+def command_counter():
+    return CommandCounter()
+
+@pytest_asyncio.fixture(scope="function")
+async def counted_db(command_counter):
+    """Como `db`, pero con un cliente que cuenta los comandos enviados."""
+    client = AsyncIOMotorClient(TEST_MONGO_URL, event_listeners=[command_counter])
+    db_instance = client[TEST_DB_NAME]
+    yield db_instance
+    await client.drop_database(TEST_DB_NAME)
+    client.close()
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Lo justo del protocolo SMTP para que smtplib pueda enviar."""
+
+    def reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.reply("220 stub ESMTP")
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip()
+            verb = command[:4].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250 stub")
+            elif verb == "MAIL":
+                recipients = []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                address = command.split(":", 1)[1].strip().strip("<>")
+                if address in self.server.rejected:
+                    self.reply("550 Destinatario rechazado")
+                else:
+                    recipients.append(address)
+                    self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 Terminar con <CR><LF>.<CR><LF>")
+                data = b""
+                while (chunk := self.rfile.readline()) not in (b".\r\n", b""):
+                    data += chunk
+                self.server.messages.append((recipients, message_from_bytes(data)))
+                self.reply("250 OK")
+            elif verb in ("RSET", "NOOP"):
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Chau")
+                return
+            else:
+                self.reply("502 No implementado")
+
+class StubSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _SMTPHandler)
+        self.messages = []       # (destinatarios, email.message.Message)
+        self.rejected = set()    # direcciones a las que responde 550
+
+@pytest.fixture(scope="function")
+def smtp_server(monkeypatch):
+    """Servidor SMTP local que guarda los mensajes recibidos; la config apunta a él."""
+    server = StubSMTPServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(settings, "SMTP_HOST", "127.0.0.1")
+    monkeypatch.setattr(settings, "SMTP_PORT", server.server_address[1])
+    monkeypatch.setattr(settings, "SMTP_USERNAME", None)
+    monkeypatch.setattr(settings, "SMTP_STARTTLS", False)
+    yield server
+    server.shutdown()
+    server.server_close()
+
 # 3. Y LO CAMBIAMOS ACÁ TAMBIÉN POR CONSISTENCIA
 @pytest_asyncio.fixture(scope="function")
 async def client(db):
@@ -5,8 +5,8 @@ from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from services import user_service, professional_service, job_service, admin_service
 from schemas.user_schemas import UserIn
-from schemas.professional_schema import ProfessionalIn
-from schemas.job_schema import JobIn, JobStatus
+from schemas.professional_schema import ProfessionalIn, ProfessionalUpdate
+from schemas.job_schema import JobIn, JobUpdate, JobStatus
 
 @pytest_asyncio.fixture
 async def seed_database(db: AsyncIOMotorDatabase):
@@ -42,6 +42,60 @@ async def test_get_dashboard_stats(db: AsyncIOMotorDatabase, seed_database):
     assert states.get(JobStatus.COMPLETED.value) == 1
     
     profs_by_cat = await admin_service.get_professionals_by_category(db)
-    # La categoría es una lista, la agregación puede ser más compleja, pero para este test simple, lo dejamos así.
-    # El test real debería comprobar la estructura de `profs_by_cat`
-    assert len(profs_by_cat) > 0
\ No newline at end of file
+    categories = {item["_id"]: item["count"] for item in profs_by_cat}
+    assert categories == {"Plomería": 1, "Gas": 1}
+
+@pytest.mark.asyncio
+async def test_materialized_stats_follow_writes(db: AsyncIOMotorDatabase, seed_database):
+    # La primera lectura reconstruye desde las colecciones (el seed tocó jobs por fuera del servicio)
+    stats = await admin_service.get_dashboard_stats(db)
+    assert stats["total_jobs"] == 3
+
+    user = await user_service.create_user(db, UserIn(username="u4", email="u4@a.com", password="123", firstName="u", lastName="4", role="professional"))
+    prof = await professional_service.create_professional(db, ProfessionalIn(headline="P3", bio="", categories=["Gas", "Electricidad"]), str(user["_id"]))
+    job = await job_service.create_job(db, JobIn(title="Trabajo Gas 2", description="", category="Gas", budget=1.0, professional_id=str(prof["_id"])), str(user["_id"]))
+    await job_service.update_job(db, str(job["_id"]), JobUpdate(status=JobStatus.CANCELLED))
+    await professional_service.update_professional(db, str(prof["_id"]), ProfessionalUpdate(categories=["Electricidad"]))
+
+    materialized = await admin_service.get_dashboard_stats(db)
+    live = admin_service.format_dashboard_stats(await admin_service.compute_live_stats(db))
+    assert materialized == live
+    categories = {item["_id"]: item["count"] for item in materialized["professionals_by_category"]}
+    assert categories == {"Plomería": 1, "Gas": 1, "Electricidad": 1}
+
+@pytest.mark.asyncio
+async def test_rebuild_does_not_drop_a_concurrent_delta(db: AsyncIOMotorDatabase, seed_database, monkeypatch):
+    await admin_service.rebuild_dashboard_stats(db)
+
+    # Mientras se cuenta, se registra un usuario (y su $inc) que el conteo no vio
+    original_compute = admin_service.compute_live_stats
+    armed = True
+
+    async def racing_compute(database):
+        nonlocal armed
+        stats = await original_compute(database)
+        if armed:
+            armed = False
+            await user_service.create_user(db, UserIn(username="u5", email="u5@a.com", password="123", firstName="u", lastName="5", role="client"))
+        return stats
+
+    monkeypatch.setattr(admin_service, "compute_live_stats", racing_compute)
+    await admin_service.rebuild_dashboard_stats(db)
+    monkeypatch.undo()
+
+    stored = await db[admin_service.STATS_COLLECTION].find_one({"_id": admin_service.DASHBOARD_STATS_ID})
+    assert stored["total_users"] == 4
+
+@pytest.mark.asyncio
+async def test_rebuild_waits_for_an_in_flight_write(db: AsyncIOMotorDatabase, seed_database):
+    await admin_service.rebuild_dashboard_stats(db)
+
+    # El insert ya está en la colección pero su $inc todavía no llegó: contar ahora lo sumaría dos veces
+    async with admin_service.pending_stats_write(db) as stats:
+        await db["users"].insert_one({"username": "u6", "email": "u6@a.com"})
+        await admin_service.rebuild_dashboard_stats(db)
+        await stats.record(users=1)
+
+    stored = await db[admin_service.STATS_COLLECTION].find_one({"_id": admin_service.DASHBOARD_STATS_ID})
+    assert stored["total_users"] == 4
+    assert not stored.get("pending")
@@ -0,0 +1,76 @@
+# tests/test_auth_service.py
+import hashlib
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from bson import ObjectId
+from jose import jwt
+
+from core.config import settings
+from schemas.user_schemas import UserOut
+from services import user_service
+from utils import auth_service
+
+
+def credentials_exception():
+    return HTTPException(status_code=401)
+
+
+def test_verified_token_is_cached_until_its_exp():
+    auth_service.token_cache.clear()
+    expire = datetime.utcnow() + timedelta(seconds=30)
+    token = jwt.encode({"user_id": "u1", "exp": expire}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+    assert auth_service.verify_access_token(token, credentials_exception()).id == "u1"
+    hits_before = auth_service.token_cache.hits
+    assert auth_service.verify_access_token(token, credentials_exception()).id == "u1"
+    assert auth_service.token_cache.hits == hits_before + 1
+
+    key = hashlib.sha256(token.encode()).hexdigest()
+    _, expires_at = auth_service.token_cache._data[key]
+    assert expires_at - time.monotonic() <= 30
+
+
+def test_rejected_token_is_negatively_cached():
+    auth_service.token_cache.clear()
+    bad_token = jwt.encode({"user_id": "u1"}, "otra-clave", algorithm=settings.ALGORITHM)
+
+    for _ in range(2):
+        with pytest.raises(HTTPException):
+            auth_service.verify_access_token(bad_token, credentials_exception())
+    assert auth_service.token_cache.hits >= 1
+
+
+@pytest.mark.asyncio
+async def test_principal_is_built_from_a_mongo_document(monkeypatch):
+    user_id = ObjectId()
+    document = {"_id": user_id, "username": "ana", "email": "ana@a.com", "first_name": "Ana",
+                "last_name": "Díaz", "role": "client"}
+
+    async def fake_get_user_by_id(db, user_id):
+        return document
+
+    monkeypatch.setattr(user_service, "get_user_by_id", fake_get_user_by_id)
+    user_service.principal_cache.clear()
+    token = auth_service.create_access_token({"user_id": str(user_id)})
+
+    principal = await auth_service.get_user_from_token(None, token)
+    assert principal.id == str(user_id)
+    assert user_service.principal_cache.get(str(user_id)) is principal
+
+
+@pytest.mark.asyncio
+async def test_require_admin_checks_the_configured_user_ids(monkeypatch):
+    user_id = str(ObjectId())
+    user = UserOut(_id=user_id, username="root", email="ana@a.com", firstName="Ana", lastName="Díaz", role="client")
+
+    # El username no da permisos: solo el id configurado
+    monkeypatch.setattr(settings, "ADMIN_USER_IDS", f"{ObjectId()}, root")
+    with pytest.raises(HTTPException) as exc:
+        await auth_service.require_admin(user)
+    assert exc.value.status_code == 403
+
+    monkeypatch.setattr(settings, "ADMIN_USER_IDS", f"{ObjectId()}, {user_id}")
+    assert await auth_service.require_admin(user) is user
@@ -0,0 +1,53 @@
+# tests/test_benchmark_report.py
+import random
+
+import httpx
+import pytest
+
+from benchmarks.load import LoadContext, ScenarioFailedError, run_scenario
+from benchmarks.report import find_regressions, percentile, summarize_scenario
+
+
+def test_summarize_scenario_percentiles_and_throughput():
+    latencies = [i / 1000 for i in range(1, 101)]  # 1..100 ms
+    summary = summarize_scenario(latencies, errors=2, elapsed=2.0)
+    assert summary["requests"] == 102
+    assert summary["throughput_rps"] == 50
+    assert summary["p50_ms"] == 51
+    assert summary["p99_ms"] == 100
+    assert percentile([], 0.5) == 0.0
+
+
+def test_find_regressions_respects_tolerance():
+    baseline = {"search": {"errors": 0, "throughput_rps": 100.0, "p50_ms": 5.0, "p95_ms": 10.0, "p99_ms": 20.0}}
+    within = {"search": {"errors": 0, "throughput_rps": 90.0, "p50_ms": 6.0, "p95_ms": 11.5, "p99_ms": 23.0}}
+    slower = {"search": {"errors": 1, "throughput_rps": 70.0, "p50_ms": 9.0, "p95_ms": 15.0, "p99_ms": 20.0}}
+
+    assert find_regressions(within, baseline, tolerance=0.2) == []
+    regressions = find_regressions(slower, baseline, tolerance=0.2)
+    assert len(regressions) == 3
+    assert any("p95_ms" in r for r in regressions)
+    assert any("throughput" in r for r in regressions)
+    # Escenarios nuevos (sin baseline) no son regresiones
+    assert find_regressions({"nuevo": slower["search"]}, baseline) == []
+
+
+@pytest.mark.asyncio
+async def test_run_scenario_fails_loudly_when_every_call_errors():
+    ctx = LoadContext(auth_headers={}, professional_ids=[], user_count=0, rng=random.Random(0))
+
+    async def broken(client, ctx):
+        return httpx.Response(500, text="Internal Server Error")
+
+    with pytest.raises(ScenarioFailedError, match="HTTP 500"):
+        await run_scenario(None, ctx, broken, requests=5, concurrency=2, warmup=0)
+
+    calls = 0
+
+    async def flaky(client, ctx):
+        nonlocal calls
+        calls += 1
+        return httpx.Response(500 if calls % 2 else 200)
+
+    summary = await run_scenario(None, ctx, flaky, requests=6, concurrency=2, warmup=0)
+    assert summary["errors"] == 3 and summary["requests"] == 6
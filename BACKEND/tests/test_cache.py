@@ -0,0 +1,29 @@
+# tests/test_cache.py
+import time
+
+from utils.cache import TTLCache, cache_stats
+
+
+def test_lru_eviction_and_counters():
+    cache = TTLCache("test_lru", maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1      # "a" pasa a ser el más reciente
+    cache.set("c", 3)               # se va "b"
+
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    stats = cache_stats()["test_lru"]
+    assert stats["hits"] == 2 and stats["misses"] == 1 and stats["evictions"] == 1
+
+
+def test_entries_expire(monkeypatch):
+    cache = TTLCache("test_ttl", maxsize=10, ttl=5)
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=60)
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 10)
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
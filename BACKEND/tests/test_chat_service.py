@@ -0,0 +1,83 @@
+# tests/test_chat_service.py
+import asyncio
+import base64
+import json
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from core.config import settings
+from schemas.chat_schema import ChatMessageIn
+from services import chat_service
+from services.chat_service import ChatHub, SlowConsumerError, Subscriber
+from utils.pagination import InvalidCursorError
+
+
+def _message(text: str) -> dict:
+    return {"_id": ObjectId(), "job_id": ObjectId(), "sender_id": ObjectId(), "text": text, "sent_at": datetime.utcnow()}
+
+
+def test_bucket_start_floors_to_the_configured_window(monkeypatch):
+    monkeypatch.setattr(settings, "CHAT_BUCKET_SECONDS", 3600)
+    assert chat_service.bucket_start(datetime(2024, 5, 1, 13, 59, 59)) == datetime(2024, 5, 1, 13, 0, 0)
+
+
+
+@pytest.mark.asyncio
+async def test_history_rejects_a_cursor_without_a_message_id():
+    for payload in (b'{"id": 5}', b'{"id": null}', b'{"id": "abc"}'):
+        cursor = base64.urlsafe_b64encode(payload).decode().rstrip("=")
+        with pytest.raises(InvalidCursorError):
+            await chat_service.get_history(None, str(ObjectId()), cursor=cursor)
+
+
+@pytest.mark.asyncio
+async def test_hub_fans_out_to_thousands_and_drops_slow_consumers():
+    hub = ChatHub()
+    readers = [Subscriber(f"user_{n}", queue_size=8) for n in range(3000)]
+    slow = Subscriber("slow", queue_size=2)
+    for subscriber in (*readers, slow):
+        hub.subscribe("job", subscriber)
+    hub.subscribe("otro", Subscriber("ajeno", queue_size=8))
+
+    async def drain(subscriber: Subscriber, expected: int) -> list:
+        return [json.loads(await subscriber.next_payload())["text"] for _ in range(expected)]
+
+    # Los lectores vacían su cola entre mensaje y mensaje; el lento nunca lee
+    received = [[] for _ in readers]
+    for n in range(5):
+        assert hub.publish("job", _message(f"m{n}")) == len(readers) + (1 if n < 2 else 0)
+        batches = await asyncio.gather(*[drain(r, 1) for r in readers])
+        for bucket, batch in zip(received, batches):
+            bucket.extend(batch)
+
+    assert all(texts == ["m0", "m1", "m2", "m3", "m4"] for texts in received)
+    with pytest.raises(SlowConsumerError):
+        await slow.next_payload()
+    stats = hub.stats()
+    assert stats["dropped_connections"] == 1
+    assert stats["connections"] == len(readers) + 1
+
+
+@pytest.mark.asyncio
+async def test_messages_are_bucketed_and_paginated(db: AsyncIOMotorDatabase, monkeypatch):
+    monkeypatch.setattr(settings, "CHAT_BUCKET_MAX_MESSAGES", 4)
+    job_id, sender_id = str(ObjectId()), str(ObjectId())
+    sent = []
+    for n in range(10):
+        message = await chat_service.post_message(db, job_id, sender_id, ChatMessageIn(text=f"m{n}"))
+        sent.append(message["_id"])
+
+    # 10 mensajes en buckets de 4: tres documentos
+    assert await db[chat_service.BUCKETS_COLLECTION].count_documents({"job_id": ObjectId(job_id)}) == 3
+
+    pages, cursor = [], None
+    while True:
+        page, cursor = await chat_service.get_history(db, job_id, limit=3, cursor=cursor)
+        pages.append([m["_id"] for m in page])
+        if cursor is None:
+            break
+    assert [len(page) for page in pages] == [3, 3, 3, 1]
+    assert [message_id for page in pages for message_id in page] == sent[::-1]
@@ -0,0 +1,77 @@
+# tests/test_database.py
+from types import SimpleNamespace
+
+import pytest
+
+from core.config import settings
+from database import databaseMongo
+
+
+def test_client_options_come_from_settings(monkeypatch):
+    monkeypatch.setattr(settings, "MONGO_MAX_POOL_SIZE", 50)
+    monkeypatch.setattr(settings, "MONGO_MAX_IDLE_TIME_MS", 60000)
+    monkeypatch.setattr(settings, "MONGO_COMPRESSORS", "zlib")
+    monkeypatch.setattr(settings, "MONGO_SOCKET_TIMEOUT_MS", None)
+
+    options = databaseMongo.client_options()
+
+    assert options["maxPoolSize"] == 50
+    assert options["maxIdleTimeMS"] == 60000
+    assert options["compressors"] == "zlib"
+    assert "socketTimeoutMS" not in options
+
+
+def test_write_concern_accepts_numbers_and_tags(monkeypatch):
+    monkeypatch.setattr(settings, "MONGO_WRITE_CONCERN_J", None)
+    monkeypatch.setattr(settings, "MONGO_WRITE_CONCERN_W", "1")
+    assert databaseMongo._write_concern().document == {"w": 1}
+    monkeypatch.setattr(settings, "MONGO_WRITE_CONCERN_W", "majority")
+    assert databaseMongo._write_concern().document == {"w": "majority"}
+    monkeypatch.setattr(settings, "MONGO_WRITE_CONCERN_W", None)
+    assert databaseMongo._write_concern() is None
+
+
+def test_pool_monitor_tracks_checkouts(monkeypatch):
+    monkeypatch.setattr(settings, "MONGO_MAX_POOL_SIZE", 4)
+    monitor = databaseMongo.PoolMonitor()
+    for _ in range(2):
+        monitor.connection_created(None)
+        monitor.connection_check_out_started(None)
+        monitor.connection_checked_out(SimpleNamespace(duration=0.010))
+    monitor.connection_check_out_started(None)
+
+    stats = monitor.snapshot()
+    assert stats["open_connections"] == 2
+    assert stats["checked_out"] == 2
+    assert stats["waiting"] == 1
+    assert stats["saturation"] == 0.5
+    assert stats["checkout_wait_ms"]["max"] == pytest.approx(10)
+
+    monitor.connection_checked_in(None)
+    assert monitor.snapshot()["checked_out"] == 1
+
+
+@pytest.mark.asyncio
+async def test_connect_warmup_and_close(monkeypatch):
+    monkeypatch.setattr(settings, "DATABASE_URL", "mongodb://localhost:27017")
+    monkeypatch.setattr(settings, "DB_NAME", "test_db_profesionales")
+    databaseMongo.close()
+
+    db = databaseMongo.connect()
+    try:
+        assert db.name == "test_db_profesionales"
+        assert await databaseMongo.get_db() is db
+        assert await databaseMongo.warmup(3) >= 1
+    finally:
+        databaseMongo.close()
+    with pytest.raises(RuntimeError):
+        await databaseMongo.get_db()
+
+
+@pytest.mark.asyncio
+async def test_health_db_reports_pool(client):
+    response = await client.get("/health/db")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ok"
+    assert {"open_connections", "checked_out", "waiting", "saturation", "checkout_wait_ms"} <= body["pool"].keys()
@@ -0,0 +1,42 @@
+# tests/test_export_service.py
+import json
+import pytest
+from datetime import datetime
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from services import export_service
+
+
+async def collect(stream) -> bytes:
+    return b"".join([chunk async for chunk in stream])
+
+
+@pytest.mark.asyncio
+async def test_export_reviews_ndjson_with_resume(db: AsyncIOMotorDatabase):
+    prof_id = ObjectId()
+    await db["reviews"].insert_many([
+        {"professional_id": prof_id, "client_id": ObjectId(), "rating": r, "comment": "", "created_at": datetime.utcnow()}
+        for r in [1, 2, 3, 4, 5]
+    ])
+
+    body = await collect(export_service.export_stream(db, "reviews", {"professional_id": prof_id}, "ndjson"))
+    rows = [json.loads(line) for line in body.decode().splitlines()]
+    assert [row["rating"] for row in rows] == [1, 2, 3, 4, 5]
+
+    resume_after = ObjectId(rows[1]["_id"])
+    body = await collect(export_service.export_stream(db, "reviews", {}, "ndjson", resume_after=resume_after))
+    assert [json.loads(line)["rating"] for line in body.decode().splitlines()] == [3, 4, 5]
+
+
+@pytest.mark.asyncio
+async def test_export_streams_in_batches(db: AsyncIOMotorDatabase):
+    await db["jobs"].insert_many([{"title": f"Trabajo {i}", "status": "posted"} for i in range(25)])
+
+    batches = [batch async for batch in export_service.iter_documents(db, "jobs", {}, batch_size=10)]
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+
+    body = await collect(export_service.export_stream(db, "jobs", {"status": "posted"}, "csv"))
+    lines = body.decode().splitlines()
+    assert lines[0].split(",") == export_service.EXPORT_FIELDS["jobs"]
+    assert len(lines) == 26
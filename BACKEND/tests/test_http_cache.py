@@ -0,0 +1,108 @@
+# tests/test_http_cache.py
+import pytest
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from starlette.requests import Request
+
+from schemas.professional_schema import ProfessionalIn, ProfessionalUpdate
+from schemas.review_schema import ReviewIn
+from schemas.user_schemas import UserIn
+from services import professional_service, review_service, user_service
+from utils import http_cache
+from utils.auth_service import create_access_token
+
+
+def _request(if_none_match: str = None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def test_etag_matches_lists_wildcards_and_weak_tags():
+    etag = http_cache.make_etag("professional", "abc", 3)
+    assert http_cache.etag_matches(etag, etag)
+    assert http_cache.etag_matches(f'"otro", W/{etag}', etag)
+    assert http_cache.etag_matches("*", etag)
+    assert not http_cache.etag_matches(http_cache.make_etag("professional", "abc", 2), etag)
+    assert not http_cache.etag_matches(None, etag)
+
+
+@pytest.mark.asyncio
+async def test_conditional_response_uses_cache_and_skips_the_body():
+    http_cache.response_cache.clear()
+    loads = []
+
+    async def load_content():
+        loads.append(1)
+        return {"id": "abc"}
+
+    first = await http_cache.conditional_json_response(_request(), "professional", "abc", 1, load_content)
+    second = await http_cache.conditional_json_response(_request(), "professional", "abc", 1, load_content)
+    assert first.status_code == second.status_code == 200
+    assert first.body == second.body
+    assert len(loads) == 1
+
+    etag = first.headers["etag"]
+    not_modified = await http_cache.conditional_json_response(_request(etag), "professional", "abc", 1, load_content)
+    assert not_modified.status_code == 304
+    assert not_modified.body == b""
+
+    # Otra versión: otra clave de caché, se vuelve a cargar
+    await http_cache.conditional_json_response(_request(etag), "professional", "abc", 2, load_content)
+    assert len(loads) == 2
+
+
+
+
+@pytest.mark.asyncio
+async def test_variants_have_their_own_etag_and_cached_headers():
+    http_cache.response_cache.clear()
+
+    async def load_page():
+        return [{"id": "r1"}], {"X-Next-Cursor": "abc"}
+
+    first = await http_cache.conditional_json_response(_request(), "reviews", "p1", 1, load_page, variant="recent:20:")
+    other = await http_cache.conditional_json_response(_request(), "reviews", "p1", 1, load_page, variant="best:20:")
+    assert first.headers["etag"] != other.headers["etag"]
+
+    async def fail():
+        raise AssertionError("debería salir de la caché")
+
+    cached = await http_cache.conditional_json_response(_request(), "reviews", "p1", 1, fail, variant="recent:20:")
+    assert cached.body == first.body
+    assert cached.headers["x-next-cursor"] == "abc"
+@pytest.mark.asyncio
+async def test_writes_bump_the_professional_version(db: AsyncIOMotorDatabase):
+    user = await user_service.create_user(db, UserIn(username="ver", email="ver@test.com", password="123", firstName="V", lastName="Er", role="professional"))
+    prof = await professional_service.create_professional(db, ProfessionalIn(headline="Gasista", bio="", categories=["Gas"]), str(user["_id"]))
+    prof_id = str(prof["_id"])
+    assert await professional_service.get_professional_version(db, prof_id) == 1
+
+    updated = await professional_service.update_professional(db, prof_id, ProfessionalUpdate(bio="Nueva bio"))
+    assert updated["version"] == 2
+    assert await professional_service.get_professional_version(db, prof_id) == 2
+
+    await review_service.add_review(db, ReviewIn(professional_id=prof_id, rating=5, comment=""), str(user["_id"]))
+    assert await professional_service.get_professional_version(db, prof_id) == 3
+
+    await professional_service.delete_professional(db, prof_id)
+    assert await professional_service.get_professional_version(db, prof_id) is None
+
+
+@pytest.mark.asyncio
+async def test_endpoints_answer_304_until_a_review_changes_the_version(client, db: AsyncIOMotorDatabase):
+    user = await user_service.create_user(db, UserIn(username="etag", email="etag@test.com", password="123", firstName="E", lastName="Tag", role="client"))
+    prof = await professional_service.create_professional(db, ProfessionalIn(headline="Pintor", bio="", categories=["Pintura"]), str(user["_id"]))
+    headers = {"Authorization": f"Bearer {create_access_token({'user_id': str(user['_id'])})}"}
+
+    for path in (f"/professionals/{prof['_id']}", f"/reviews/{prof['_id']}"):
+        response = await client.get(path, headers=headers)
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+
+        cached = await client.get(path, headers={**headers, "If-None-Match": etag})
+        assert cached.status_code == 304
+
+    await client.post("/reviews/", json={"professional_id": str(prof["_id"]), "rating": 4, "comment": "Bien"}, headers=headers)
+    fresh = await client.get(f"/reviews/{prof['_id']}", headers={**headers, "If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["etag"] != etag
+    assert len(fresh.json()) == 1
@@ -0,0 +1,101 @@
+# tests/test_idempotency.py
+import asyncio
+
+import pytest
+from fastapi import HTTPException, Request
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from utils import idempotency
+from utils.serialization import FastJSONResponse
+
+
+def _request(body: bytes, path: str = "/jobs/") -> Request:
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return Request({"type": "http", "method": "POST", "path": path, "headers": [], "query_string": b""}, receive)
+
+
+@pytest.fixture(autouse=True)
+def _clear_replay_cache():
+    idempotency.replay_cache.clear()
+    yield
+    idempotency.replay_cache.clear()
+
+
+def test_replay_marks_the_response_and_rejects_another_body():
+    stored = {"fingerprint": "abc", "response": {"status_code": 201, "headers": {"content-type": "application/json"}, "body": b'{"ok":true}'}}
+    response = idempotency._replay(stored, "abc")
+    assert response.status_code == 201
+    assert response.body == b'{"ok":true}'
+    assert response.headers[idempotency.REPLAYED_HEADER] == "true"
+
+    with pytest.raises(HTTPException) as exc:
+        idempotency._replay(stored, "otro")
+    assert exc.value.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_execute_once(db: AsyncIOMotorDatabase):
+    calls = 0
+
+    async def execute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return FastJSONResponse({"call": calls}, status_code=201)
+
+    responses = await asyncio.gather(*[
+        idempotency.run(_request(b'{"a":1}'), db, "clave-1", "user", execute) for _ in range(5)
+    ])
+    assert calls == 1
+    assert {r.body for r in responses} == {b'{"call":1}'}
+    assert sum(idempotency.REPLAYED_HEADER in r.headers for r in responses) == 4
+
+    # Otro proceso (sin la caché en memoria) la repite desde Mongo
+    idempotency.replay_cache.clear()
+    replayed = await idempotency.run(_request(b'{"a":1}'), db, "clave-1", "user", execute)
+    assert calls == 1
+    assert replayed.status_code == 201
+    assert replayed.headers[idempotency.REPLAYED_HEADER] == "true"
+
+    # La clave es por usuario y no se puede reusar con otro cuerpo
+    await idempotency.run(_request(b'{"a":1}'), db, "clave-1", "otro-user", execute)
+    assert calls == 2
+    with pytest.raises(HTTPException) as exc:
+        await idempotency.run(_request(b'{"a":2}'), db, "clave-1", "user", execute)
+    assert exc.value.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_failures_release_the_key(db: AsyncIOMotorDatabase):
+    attempts = 0
+
+    async def execute():
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise RuntimeError("Mongo se cayó")
+        return FastJSONResponse({"attempt": attempts}, status_code=201)
+
+    with pytest.raises(RuntimeError):
+        await idempotency.run(_request(b"{}"), db, "clave-2", "user", execute)
+    response = await idempotency.run(_request(b"{}"), db, "clave-2", "user", execute)
+    assert response.body == b'{"attempt":2}'
+    assert idempotency.REPLAYED_HEADER not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_slow_request_does_not_overwrite_a_takeover(db: AsyncIOMotorDatabase):
+    async def execute():
+        # Mientras corre, la reserva venció y otro proceso tomó la clave
+        await db[idempotency.IDEMPOTENCY_COLLECTION].update_many({}, {"$set": {"claim_id": "otro-proceso"}})
+        return FastJSONResponse({"slow": True}, status_code=201)
+
+    response = await idempotency.run(_request(b"{}"), db, "clave-3", "user", execute)
+
+    assert response.status_code == 201
+    stored = await db[idempotency.IDEMPOTENCY_COLLECTION].find_one({})
+    assert stored["status"] == idempotency.IN_PROGRESS
+    assert stored["claim_id"] == "otro-proceso"
+    assert idempotency.replay_cache.get(stored["_id"]) is None
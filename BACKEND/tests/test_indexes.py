@@ -0,0 +1,102 @@
+# tests/test_indexes.py
+import pytest
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from bson import ObjectId
+
+from database.indexes import ensure_indexes, check_indexes, INDEXES
+from services import user_service, professional_service
+from schemas.user_schemas import UserIn
+from schemas.professional_schema import ProfessionalIn
+
+
+def winning_stages(explain: dict) -> set:
+    """Junta todos los 'stage' de los planes ganadores de un explain (find o aggregate)."""
+    stages = set()
+
+    def walk(node, in_winning=False):
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key == "rejectedPlans":
+                    continue
+                if key == "stage" and in_winning:
+                    stages.add(value)
+                walk(value, in_winning or key == "winningPlan")
+        elif isinstance(node, list):
+            for item in node:
+                walk(item, in_winning)
+
+    walk(explain)
+    return stages
+
+
+async def seed(db: AsyncIOMotorDatabase):
+    await ensure_indexes(db)
+    user = await user_service.create_user(db, UserIn(username="idx", email="idx@a.com", password="123", firstName="I", lastName="X", role="professional"))
+    await professional_service.create_professional(db, ProfessionalIn(headline="Idx", bio="", categories=["Gas"]), str(user["_id"]))
+
+
+@pytest.mark.asyncio
+async def test_service_queries_use_indexes(db: AsyncIOMotorDatabase):
+    await seed(db)
+    some_id = ObjectId()
+    queries = [
+        ("users", {"username": "idx"}),                  # get_user_by_username
+        ("users", {"email": "idx@a.com"}),               # get_user_by_email
+        ("professionals", {"user_id": some_id}),         # get_professional_by_user_id
+        ("reviews", {"professional_id": some_id}),       # get_reviews_for_professional
+        ("jobs", {"client_id": some_id}),
+        ("jobs", {"professional_id": some_id}),
+        ("jobs", {"status": "posted"}),
+    ]
+    for collection, query in queries:
+        explain = await db[collection].find(query).explain()
+        stages = winning_stages(explain)
+        assert "IXSCAN" in stages, f"{collection} {query}: {stages}"
+        assert "COLLSCAN" not in stages, f"{collection} {query}: {stages}"
+
+    # El $match de add_review
+    explain = await db.command(
+        "explain",
+        {"aggregate": "reviews", "pipeline": [{"$match": {"professional_id": some_id}}], "cursor": {}},
+        verbosity="queryPlanner",
+    )
+    stages = winning_stages(explain)
+    assert "IXSCAN" in stages and "COLLSCAN" not in stages
+
+    # La página de search_professionals sale en orden del índice, sin ordenar en memoria
+    # (incluidos los niveles de relevancia de una búsqueda por texto)
+    tiers = professional_service._relevance_tiers({}, ["gas", "plomero", "mendoza"])
+    for match in ({}, {"avg_rating": {"$gte": 4}}, {"categories_norm": "gas"}, {"search_tokens": {"$in": ["gas", "plomero"]}}, *tiers):
+        explain = await db.command(
+            "explain",
+            {"aggregate": "professionals", "pipeline": [
+                {"$match": match}, {"$sort": {"avg_rating": -1, "_id": 1}}, {"$limit": 20},
+            ], "cursor": {}},
+            verbosity="queryPlanner",
+        )
+        stages = winning_stages(explain)
+        assert "IXSCAN" in stages and "COLLSCAN" not in stages and "SORT" not in stages, f"{match}: {stages}"
+
+    # El modo `near` de search_professionals
+    explain = await db.command(
+        "explain",
+        {"aggregate": "professionals", "pipeline": [{"$geoNear": {
+            "near": {"type": "Point", "coordinates": [-68.84, -32.89]}, "key": "service_location",
+            "distanceField": "distance_m", "maxDistance": 10_000, "spherical": True,
+            "query": {"categories_norm": "gas"},
+        }}], "cursor": {}},
+        verbosity="queryPlanner",
+    )
+    stages = winning_stages(explain)
+    assert "GEO_NEAR_2DSPHERE" in stages and "COLLSCAN" not in stages
+
+
+@pytest.mark.asyncio
+async def test_check_indexes_reports_missing(db: AsyncIOMotorDatabase):
+    await db["users"].insert_one({"username": "x"})
+    report = await check_indexes(db)
+    assert "email_unique" in report["users"]["missing"]
+
+    await ensure_indexes(db)
+    report = await check_indexes(db)
+    assert all(not report[collection]["missing"] for collection in INDEXES)
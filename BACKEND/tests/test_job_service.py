@@ -1,13 +1,16 @@
 # tests/test_job_service.py
+import asyncio
+
 import pytest
 import pytest_asyncio
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
+from pydantic import ValidationError
 
-from services import user_service, professional_service, job_service
+from services import admin_service, user_service, professional_service, job_service
 from schemas.user_schemas import UserIn
 from schemas.professional_schema import ProfessionalIn
-from schemas.job_schema import JobIn, JobUpdate, JobStatus
+from schemas.job_schema import JobIn, JobUpdate, JobStatus, JobTransition, JobBulkUpdateItem
 
 @pytest_asyncio.fixture
 async def setup_users_and_prof(db: AsyncIOMotorDatabase):
@@ -57,4 +60,125 @@ async def test_update_job_status(db: AsyncIOMotorDatabase, setup_users_and_prof)
     updated_job = await job_service.update_job(db, job_id, update_data)
 
     assert updated_job is not None
-    assert updated_job["status"] == JobStatus.COMPLETED
\ No newline at end of file
+    assert updated_job["status"] == JobStatus.COMPLETED
+
+@pytest.mark.asyncio
+async def test_get_jobs_page_with_cursor(db: AsyncIOMotorDatabase, setup_users_and_prof):
+    data = setup_users_and_prof
+    client_id = str(data["client"]["_id"])
+    prof_id = str(data["professional"]["_id"])
+    for i in range(5):
+        await job_service.create_job(db, JobIn(title=f"Trabajo número {i}", description="", category="Electricidad", budget=1.0, professional_id=prof_id), client_id)
+
+    seen = []
+    cursor = None
+    while True:
+        page, cursor = await job_service.get_jobs_page(db, limit=2, cursor=cursor)
+        seen.extend(job["_id"] for job in page)
+        if cursor is None:
+            break
+
+    assert len(seen) == 5
+    assert seen == sorted(seen)
+
+    # El modo skip sigue funcionando como antes
+    page, _ = await job_service.get_jobs_page(db, limit=2, skip=4)
+    assert [job["_id"] for job in page] == seen[4:]
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_and_update_jobs(counted_db: AsyncIOMotorDatabase, command_counter):
+    db = counted_db
+    client_user = await user_service.create_user(db, UserIn(username="bulk", email="bulk@a.com", password="123", firstName="Bulk", lastName="Client", role="client"))
+    client_id = str(client_user["_id"])
+    prof_id = str(ObjectId())
+
+    jobs_in = [
+        JobIn(title=f"Trabajo masivo {i}", description="", category="Gas", budget=1.0, professional_id=prof_id)
+        for i in range(3)
+    ]
+    jobs_in.append(JobIn(title="Trabajo inválido", description="", category="Gas", budget=1.0, professional_id="no-es-un-id"))
+
+    command_counter.reset()
+    result = await job_service.create_jobs_bulk(db, jobs_in, client_id)
+    assert command_counter.on("jobs") == ["insert"]
+    assert result["ok_count"] == 3 and result["error_count"] == 1
+    assert [item["ok"] for item in result["items"]] == [True, True, True, False]
+    assert await db["jobs"].count_documents({}) == 3
+
+    ids = [item["id"] for item in result["items"] if item["ok"]]
+    updates = [JobBulkUpdateItem(id=job_id, title="Trabajo masivo editado") for job_id in ids]
+
+    command_counter.reset()
+    result = await job_service.update_jobs_bulk(db, updates, client_id)
+    assert command_counter.on("jobs") == ["update"]
+    assert result["ok_count"] == 3
+    assert result["matched_count"] == 3
+    assert await db["jobs"].count_documents({"title": "Trabajo masivo editado"}) == 3
+
+    # Un id inexistente y uno de otro cliente fallan por ítem; solo entonces se lee `jobs`
+    updates = [
+        JobBulkUpdateItem(id=ids[0], budget=5.0),
+        JobBulkUpdateItem(id=str(ObjectId()), budget=5.0),
+    ]
+    command_counter.reset()
+    result = await job_service.update_jobs_bulk(db, updates, client_id)
+    assert command_counter.on("jobs") == ["update", "find"]
+    assert [item["ok"] for item in result["items"]] == [True, False]
+    result = await job_service.update_jobs_bulk(db, updates[:1], str(ObjectId()))
+    assert result["items"][0]["ok"] is False
+    assert await db["jobs"].count_documents({"budget": 5.0}) == 1
+
+    # El estado no se edita por lote: pasa por las transiciones
+    with pytest.raises(ValidationError):
+        JobBulkUpdateItem(id=ids[0], status=JobStatus.COMPLETED)
+
+
+def test_transition_table_never_leaves_a_final_state():
+    final = {JobStatus.COMPLETED, JobStatus.CANCELLED}
+    for transition in job_service.JOB_TRANSITIONS.values():
+        assert not final.intersection(transition.sources)
+        assert transition.target not in transition.sources
+
+
+@pytest.mark.asyncio
+async def test_competing_transitions_apply_once(db: AsyncIOMotorDatabase, setup_users_and_prof):
+    data = setup_users_and_prof
+    client_id = str(data["client"]["_id"])
+    prof_id = str(data["professional"]["_id"])
+    prof_user_id = str(data["professional"]["user_id"])
+    job = await job_service.create_job(db, JobIn(title="Pintar el living", description="", category="Pintura", budget=1.0, professional_id=prof_id), client_id)
+    job_id = str(job["_id"])
+
+    async def attempt(action: JobTransition, user_id: str, professional_id=None):
+        try:
+            return await job_service.transition_job(db, job_id, action, user_id, professional_id)
+        except job_service.InvalidTransitionError as exc:
+            return exc
+
+    # Diez aceptaciones simultáneas: una sola se aplica, el resto ve el estado ya cambiado
+    results = await asyncio.gather(*[attempt(JobTransition.ACCEPT, prof_user_id, prof_id) for _ in range(10)])
+    applied = [r for r in results if isinstance(r, dict)]
+    assert len(applied) == 1 and applied[0]["status"] == JobStatus.ACCEPTED.value
+    assert all(r.current_status == JobStatus.ACCEPTED.value for r in results if not isinstance(r, dict))
+
+    # El profesional empieza mientras el cliente cancela: gana uno solo
+    results = await asyncio.gather(*[
+        attempt(JobTransition.START if n % 2 else JobTransition.CANCEL, prof_user_id if n % 2 else client_id, prof_id if n % 2 else None)
+        for n in range(10)
+    ])
+    applied = [r for r in results if isinstance(r, dict)]
+    assert len(applied) == 1
+    stored = await db["jobs"].find_one({"_id": job["_id"]})
+    assert stored["status"] == applied[0]["status"]
+
+    # Los contadores del dashboard reflejan una sola transición por paso
+    stats = await db[admin_service.STATS_COLLECTION].find_one({"_id": admin_service.DASHBOARD_STATS_ID})
+    assert stats["jobs_by_state"][stored["status"]] == 1
+    assert stats["jobs_by_state"][JobStatus.ACCEPTED.value] == 0
+
+    # Sin participar del trabajo (o si no existe) es None, no un conflicto
+    assert await job_service.transition_job(db, job_id, JobTransition.CANCEL, str(ObjectId())) is None
+    assert await job_service.transition_job(db, str(ObjectId()), JobTransition.CANCEL, client_id) is None
+    # El cliente no puede aceptar
+    assert await job_service.transition_job(db, job_id, JobTransition.ACCEPT, client_id) is None
@@ -0,0 +1,70 @@
+# tests/test_metrics.py
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from utils import metrics
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram("test_latency_seconds", "Prueba.", ("route",), buckets=(0.1, 1.0))
+    metrics._registry.remove(histogram)
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5, "/a")
+
+    lines = histogram.render()
+    assert '# TYPE test_latency_seconds histogram' in lines
+    assert 'test_latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{route="/a",le="1.0"} 2' in lines
+    assert 'test_latency_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'test_latency_seconds_count{route="/a"} 3' in lines
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(metrics.MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: str):
+        return {"id": item_id}
+
+    return app
+
+
+@pytest.mark.asyncio
+async def test_middleware_labels_requests_by_route_template():
+    before = metrics.http_requests_total.value("GET", "/items/{item_id}", "200")
+    async with AsyncClient(transport=ASGITransport(app=_app()), base_url="http://test") as client:
+        await client.get("/items/1")
+        await client.get("/items/2")
+        await client.get("/no-existe")
+
+    assert metrics.http_requests_total.value("GET", "/items/{item_id}", "200") == before + 2
+    assert metrics.http_requests_total.value("GET", metrics.UNMATCHED_ROUTE, "404") >= 1
+    assert metrics.http_requests_in_flight.value("GET") == 0
+    assert 'route="/items/{item_id}"' in metrics.render_metrics()
+
+
+@pytest.mark.asyncio
+async def test_mongo_commands_are_attributed_to_the_route():
+    mongo = AsyncIOMotorClient("mongodb://localhost:27017", event_listeners=[metrics.mongo_command_metrics])
+    db = mongo["test_db_profesionales"]
+    app = _app()
+
+    @app.get("/n-plus-one")
+    async def n_plus_one():
+        for _ in range(3):
+            await db["jobs"].find_one({})
+        return {}
+
+    try:
+        before = metrics.mongo_commands_total.value("/n-plus-one", "jobs", "find", "success")
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            await client.get("/n-plus-one")
+        assert metrics.mongo_commands_total.value("/n-plus-one", "jobs", "find", "success") == before + 3
+        assert metrics.http_request_mongo_commands.count("GET", "/n-plus-one") == 1
+    finally:
+        await mongo.drop_database("test_db_profesionales")
+        mongo.close()
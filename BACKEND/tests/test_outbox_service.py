@@ -0,0 +1,115 @@
+# tests/test_outbox_service.py
+import pytest
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from core.config import settings
+from services import outbox_service
+from utils import email_service
+
+
+def test_send_messages_reports_each_recipient(smtp_server):
+    smtp_server.rejected.add("rechazado@juani.com")
+    messages = [
+        email_service.build_message("uno@juani.com", "Hola", "Primer mensaje"),
+        email_service.build_message("rechazado@juani.com", "Hola", "No llega"),
+        email_service.build_message("dos@juani.com", "Hola", "Segundo mensaje"),
+    ]
+
+    errors = email_service.send_messages(messages)
+
+    assert errors[0] is None and errors[2] is None
+    assert errors[1] is not None
+    assert [recipients for recipients, _ in smtp_server.messages] == [["uno@juani.com"], ["dos@juani.com"]]
+
+
+def test_send_messages_without_server_fails_every_message(monkeypatch):
+    monkeypatch.setattr(settings, "SMTP_HOST", "127.0.0.1")
+    monkeypatch.setattr(settings, "SMTP_PORT", 1)
+    errors = email_service.send_messages([email_service.build_message("a@juani.com", "x", "y")] * 2)
+    assert len(errors) == 2 and all(errors)
+
+
+@pytest.mark.asyncio
+async def test_outbox_delivers_pending_emails(db: AsyncIOMotorDatabase, smtp_server):
+    user = {"email": "nuevo@juani.com", "first_name": "Juan"}
+    message_id = await outbox_service.enqueue_welcome_email(db, user)
+
+    counts = await outbox_service.process_batch(db)
+
+    assert counts["claimed"] == 1 and counts["sent"] == 1
+    recipients, message = smtp_server.messages[0]
+    assert recipients == ["nuevo@juani.com"]
+    assert "Juan" in message.get_payload()
+    stored = await db[outbox_service.OUTBOX_COLLECTION].find_one({"_id": message_id})
+    assert stored["status"] == outbox_service.SENT
+    assert "claim_id" not in stored
+
+    # Ya enviado: un segundo lote no lo vuelve a tomar
+    assert (await outbox_service.process_batch(db))["claimed"] == 0
+    stats = await outbox_service.outbox_stats(db)
+    assert stats["sent"] == 1 and stats["pending"] == 0
+    assert stats["send_latency_ms"]["count"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_outbox_retries_and_dead_letters(db: AsyncIOMotorDatabase, smtp_server, monkeypatch):
+    monkeypatch.setattr(settings, "OUTBOX_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(settings, "OUTBOX_RETRY_BASE_SECONDS", 0)
+    smtp_server.rejected.add("rebota@juani.com")
+    message_id = await outbox_service.enqueue_email(db, "rebota@juani.com", "Hola", "No llega")
+
+    first = await outbox_service.process_batch(db)
+    assert first["pending"] == 1
+    stored = await db[outbox_service.OUTBOX_COLLECTION].find_one({"_id": message_id})
+    assert stored["status"] == outbox_service.PENDING
+    assert stored["attempts"] == 1
+    assert stored["last_error"]
+
+    second = await outbox_service.process_batch(db)
+    assert second["dead"] == 1
+    stored = await db[outbox_service.OUTBOX_COLLECTION].find_one({"_id": message_id})
+    assert stored["status"] == outbox_service.DEAD
+    assert stored["attempts"] == 2
+    assert (await outbox_service.outbox_stats(db))["dead"] == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_reclaimed(db: AsyncIOMotorDatabase, smtp_server, monkeypatch):
+    await outbox_service.enqueue_email(db, "lease@juani.com", "Hola", "Reintento")
+
+    # Un worker reclama el lote y "muere" sin registrar el resultado
+    monkeypatch.setattr(settings, "OUTBOX_LEASE_SECONDS", -1)
+    assert len(await outbox_service.claim_batch(db, 10)) == 1
+
+    counts = await outbox_service.process_batch(db)
+    assert counts["sent"] == 1
+    assert smtp_server.messages[0][0] == ["lease@juani.com"]
+
+
+@pytest.mark.asyncio
+async def test_held_welcome_email_waits_for_the_user(db: AsyncIOMotorDatabase, smtp_server):
+    user = {"_id": ObjectId(), "email": "retenido@juani.com", "first_name": "Ana"}
+    message_id = await outbox_service.enqueue_welcome_email(db, user, held=True)
+
+    # Retenido: el worker no lo toma hasta que se libere
+    assert (await outbox_service.process_batch(db))["claimed"] == 0
+
+    await db["users"].insert_one({"_id": user["_id"], "email": user["email"]})
+    await outbox_service.release_email(db, message_id)
+    assert (await outbox_service.process_batch(db))["sent"] == 1
+    assert smtp_server.messages[0][0] == ["retenido@juani.com"]
+
+
+@pytest.mark.asyncio
+async def test_held_email_without_user_is_dropped(db: AsyncIOMotorDatabase, smtp_server, monkeypatch):
+    # El registro falló y tampoco pudo cancelar: vence la retención y el usuario no existe
+    monkeypatch.setattr(settings, "OUTBOX_HOLD_SECONDS", -1)
+    user = {"_id": ObjectId(), "email": "huerfano@juani.com", "first_name": "Ana"}
+    message_id = await outbox_service.enqueue_welcome_email(db, user, held=True)
+
+    counts = await outbox_service.process_batch(db)
+
+    assert counts["claimed"] == 1 and counts["sent"] == 0
+    assert smtp_server.messages == []
+    assert await db[outbox_service.OUTBOX_COLLECTION].find_one({"_id": message_id}) is None
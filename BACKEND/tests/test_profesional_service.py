@@ -1,9 +1,11 @@
 # tests/test_professional_service.py
 import pytest
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from core.config import settings
 from services import user_service, professional_service
 from schemas.user_schemas import UserIn
-from schemas.professional_schema import ProfessionalIn, ProfessionalUpdate
+from database.indexes import ensure_indexes
+from schemas.professional_schema import GeoPoint, ProfessionalIn, ProfessionalUpdate
 
 @pytest.fixture
 async def setup_user(db: AsyncIOMotorDatabase):
@@ -52,4 +54,102 @@ async def test_update_professional(db: AsyncIOMotorDatabase, setup_user):
     
     assert updated_prof is not None
     assert updated_prof["bio"] == "El mejor gasista, matriculado y con garantía."
-    assert updated_prof["headline"] == "Gasista Matriculado"
\ No newline at end of file
+    assert updated_prof["headline"] == "Gasista Matriculado"
+
+@pytest.mark.asyncio
+async def test_search_professionals_normalized(db: AsyncIOMotorDatabase, setup_user, monkeypatch):
+    user = await setup_user
+    await professional_service.create_professional(
+        db,
+        ProfessionalIn(headline="Plomero matriculado", bio="", categories=["Plomería", "Gas"], city="San Martín"),
+        str(user["_id"])
+    )
+    other = await professional_service.create_professional(
+        db,
+        ProfessionalIn(headline="Electricista", bio="", categories=["Electricidad"], city="Mendoza"),
+        str(user["_id"])
+    )
+    await db["professionals"].update_one({"_id": other["_id"]}, {"$set": {"avg_rating": 4.5}})
+
+    result = await professional_service.search_professionals(db, text="PLOMERIA", city="san martin")
+    assert result["total"] == 1
+    assert result["results"][0]["headline"] == "Plomero matriculado"
+    assert {f["value"] for f in result["facets"]["categories"]} == {"Plomería", "Gas"}
+
+    result = await professional_service.search_professionals(db, min_rating=4.0)
+    assert [p["_id"] for p in result["results"]] == [other["_id"]]
+    assert result["total_capped"] is False
+
+    # Con más coincidencias que el tope, el total es una cota y lo dice
+    monkeypatch.setattr(settings, "SEARCH_FACET_SCAN_LIMIT", 1)
+    result = await professional_service.search_professionals(db)
+    assert len(result["results"]) == 2
+    assert result["total"] == 1 and result["total_capped"] is True
+    monkeypatch.undo()
+
+    # Al actualizar el título se recalculan los tokens sin perder los de categorías y ciudad
+    await professional_service.update_professional(db, str(other["_id"]), ProfessionalUpdate(headline="Gasista"))
+    result = await professional_service.search_professionals(db, text="gasista mendoza electricidad")
+    assert result["total"] == 1
+
+@pytest.mark.asyncio
+async def test_search_professionals_relevance_before_rating(db: AsyncIOMotorDatabase, setup_user):
+    user = await setup_user
+
+    async def create(headline, city, rating):
+        professional = await professional_service.create_professional(
+            db, ProfessionalIn(headline=headline, bio="", categories=["Gas"], city=city), str(user["_id"])
+        )
+        await db["professionals"].update_one({"_id": professional["_id"]}, {"$set": {"avg_rating": rating}})
+        return professional["_id"]
+
+    solo_titulo = await create("Gasista", "San Juan", 5.0)
+    completo = await create("Gasista", "Mendoza", 2.0)
+    solo_ciudad = await create("Electricista", "Mendoza", 4.0)
+
+    # El que coincide con todos los tokens va primero aunque tenga peor calificación
+    result = await professional_service.search_professionals(db, text="gasista mendoza")
+    assert [p["_id"] for p in result["results"]] == [completo, solo_titulo, solo_ciudad]
+    assert result["total"] == 3
+
+    # La paginación atraviesa los niveles de relevancia
+    pages = [
+        (await professional_service.search_professionals(db, text="gasista mendoza", skip=skip, limit=1))["results"]
+        for skip in range(4)
+    ]
+    assert [[p["_id"] for p in page] for page in pages] == [[completo], [solo_titulo], [solo_ciudad], []]
+
+@pytest.mark.asyncio
+async def test_search_professionals_near(db: AsyncIOMotorDatabase, setup_user, monkeypatch):
+    user = await setup_user
+    await ensure_indexes(db)
+
+    async def create(headline, lat, lng, categories=("Gas",), radius_km=None):
+        professional = await professional_service.create_professional(db, ProfessionalIn(
+            headline=headline, bio="", categories=list(categories),
+            service_location=GeoPoint(coordinates=(lng, lat)), service_radius_km=radius_km,
+        ), str(user["_id"]))
+        return professional["_id"]
+
+    # Distancias aproximadas desde el centro de Mendoza (-32.8895, -68.8458)
+    godoy_cruz = await create("Godoy Cruz", -32.9287, -68.8449)          # ~4,4 km
+    centro = await create("Centro", -32.8890, -68.8450)                  # ~0,1 km
+    await create("Maipú con radio corto", -32.9833, -68.7833, radius_km=2)  # ~12 km, no llega
+    await create("San Rafael", -34.6177, -68.3301)                       # ~195 km
+    await create("Electricista", -32.8900, -68.8460, categories=["Electricidad"])
+
+    result = await professional_service.search_professionals(
+        db, category="gas", near=(-32.8895, -68.8458), max_km=20
+    )
+    assert [p["_id"] for p in result["results"]] == [centro, godoy_cruz]
+    assert result["total"] == 2
+    assert result["results"][0]["distance_km"] < result["results"][1]["distance_km"] < 5
+
+    # Los conteos solo leen los más cercanos: con tope 1 el total queda recortado
+    monkeypatch.setattr(settings, "SEARCH_FACET_SCAN_LIMIT", 1)
+    result = await professional_service.search_professionals(
+        db, category="gas", near=(-32.8895, -68.8458), max_km=20
+    )
+    assert [p["_id"] for p in result["results"]] == [centro, godoy_cruz]
+    assert result["total"] == 1 and result["total_capped"] is True
+    assert result["facets"]["categories"] == [{"value": "Gas", "count": 1}]
@@ -0,0 +1,126 @@
+# tests/test_ranking_service.py
+import pytest
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorCursor, AsyncIOMotorDatabase
+
+from core.config import settings
+from schemas.professional_schema import ProfessionalIn, ProfessionalUpdate
+from schemas.review_schema import ReviewIn
+from schemas.user_schemas import UserIn
+from services import professional_service, ranking_service, review_service, user_service
+
+
+def test_bayes_score_needs_volume_to_beat_the_prior():
+    one_perfect = ranking_service.bayes_score(5, 1)
+    many_great = ranking_service.bayes_score(4.9 * 400, 400)
+    assert many_great > one_perfect
+    assert ranking_service.bayes_score(0, 0) == settings.RANKING_PRIOR_MEAN
+
+
+@pytest.fixture
+def small_boards(monkeypatch):
+    # 2 servidos + 1 de margen: obliga a truncar y reconstruir con pocos profesionales
+    monkeypatch.setattr(settings, "LEADERBOARD_SIZE", 2)
+    monkeypatch.setattr(settings, "LEADERBOARD_BUFFER", 1)
+
+
+@pytest.mark.asyncio
+async def test_leaderboard_follows_reviews_and_updates(db: AsyncIOMotorDatabase, small_boards):
+    client = await user_service.create_user(db, UserIn(username="rk", email="rk@a.com", password="123", firstName="R", lastName="K", role="client"))
+    client_id = str(client["_id"])
+    pros = []
+    for n in range(4):
+        pro = await professional_service.create_professional(
+            db, ProfessionalIn(headline=f"Electricista {n}", bio="", categories=["Electricidad"]), client_id
+        )
+        pros.append(str(pro["_id"]))
+
+    async def review(pro, rating, times=1):
+        for _ in range(times):
+            await review_service.add_review(db, ReviewIn(professional_id=pro, rating=rating, comment=""), client_id)
+
+    async def board_ids():
+        return [str(e["professional_id"]) for e in await ranking_service.get_leaderboard(db, "electricidad", 10)]
+
+    await review(pros[0], 5)             # una sola reseña perfecta
+    await review(pros[1], 5, times=20)   # muchas reseñas muy buenas
+    await review(pros[2], 4, times=5)
+    await review(pros[3], 3, times=5)
+    assert await board_ids() == [pros[1], pros[0], pros[2]]
+
+    # pros[1] se hunde por debajo de pros[3], que estaba afuera: se reconstruye la categoría
+    await review(pros[1], 1, times=60)
+    incremental = await board_ids()
+    rebuilt = await ranking_service.rebuild_category(db, "electricidad")
+    assert incremental == [str(e["professional_id"]) for e in rebuilt["entries"]] == [pros[0], pros[2], pros[3]]
+
+    # Cambiar de categoría lo saca del tablero viejo y lo pone en el nuevo
+    await professional_service.update_professional(db, pros[0], ProfessionalUpdate(categories=["Gas"]))
+    assert pros[0] not in await board_ids()
+    assert [str(e["professional_id"]) for e in await ranking_service.get_leaderboard(db, "gas", 10)] == [pros[0]]
+
+    await professional_service.delete_professional(db, pros[2])
+    assert pros[2] not in await board_ids()
+
+
+@pytest.mark.asyncio
+async def test_rebuild_category_keeps_a_concurrent_refresh(db: AsyncIOMotorDatabase, monkeypatch):
+    client = await user_service.create_user(db, UserIn(username="rc", email="rc@a.com", password="123", firstName="R", lastName="C", role="client"))
+    client_id = str(client["_id"])
+    pros = []
+    for n in range(2):
+        pro = await professional_service.create_professional(
+            db, ProfessionalIn(headline=f"Gasista {n}", bio="", categories=["Gas"]), client_id
+        )
+        pros.append(str(pro["_id"]))
+    await review_service.add_review(db, ReviewIn(professional_id=pros[0], rating=5, comment=""), client_id)
+
+    # Entre la lectura de `professionals` y la escritura del tablero llega una reseña de pros[1]
+    original_to_list = AsyncIOMotorCursor.to_list
+    armed = True
+
+    async def racing_to_list(self, *args, **kwargs):
+        nonlocal armed
+        docs = await original_to_list(self, *args, **kwargs)
+        if armed:
+            armed = False
+            await review_service.add_review(db, ReviewIn(professional_id=pros[1], rating=5, comment=""), client_id)
+        return docs
+
+    monkeypatch.setattr(AsyncIOMotorCursor, "to_list", racing_to_list)
+    board = await ranking_service.rebuild_category(db, "gas")
+    monkeypatch.undo()
+
+    stored = await ranking_service.get_leaderboard(db, "gas", 10)
+    assert {str(e["professional_id"]) for e in stored} == set(pros)
+    assert stored == board["entries"]
+
+
+@pytest.mark.asyncio
+async def test_rebuild_leaderboards_keeps_a_concurrent_refresh(db: AsyncIOMotorDatabase, monkeypatch):
+    client = await user_service.create_user(db, UserIn(username="rl", email="rl@a.com", password="123", firstName="R", lastName="L", role="client"))
+    client_id = str(client["_id"])
+    pros = []
+    for n in range(2):
+        pro = await professional_service.create_professional(
+            db, ProfessionalIn(headline=f"Gasista {n}", bio="", categories=["Gas"]), client_id
+        )
+        pros.append(str(pro["_id"]))
+    await review_service.add_review(db, ReviewIn(professional_id=pros[0], rating=5, comment=""), client_id)
+
+    # Entre la agregación y la escritura de los tableros llega una reseña de pros[1]
+    original_bulk_write = AsyncIOMotorCollection.bulk_write
+    armed = True
+
+    async def racing_bulk_write(self, *args, **kwargs):
+        nonlocal armed
+        if armed:
+            armed = False
+            await review_service.add_review(db, ReviewIn(professional_id=pros[1], rating=5, comment=""), client_id)
+        return await original_bulk_write(self, *args, **kwargs)
+
+    monkeypatch.setattr(AsyncIOMotorCollection, "bulk_write", racing_bulk_write)
+    await ranking_service.rebuild_leaderboards(db)
+    monkeypatch.undo()
+
+    stored = await ranking_service.get_leaderboard(db, "gas", 10)
+    assert {str(e["professional_id"]) for e in stored} == set(pros)
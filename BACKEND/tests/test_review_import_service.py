@@ -0,0 +1,35 @@
+# tests/test_review_import_service.py
+import json
+import pytest
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from services import review_import_service
+
+
+@pytest.mark.asyncio
+async def test_import_reviews_recomputes_ratings_per_chunk(db: AsyncIOMotorDatabase):
+    prof_a, prof_b = ObjectId(), ObjectId()
+    await db["professionals"].insert_many([
+        {"_id": prof_a, "avg_rating": 0.0, "total_reviews": 0, "rating_sum": 0},
+        {"_id": prof_b, "avg_rating": 0.0, "total_reviews": 0, "rating_sum": 0},
+    ])
+    client_id = str(ObjectId())
+    lines = [
+        json.dumps({"professional_id": str(prof), "client_id": client_id, "rating": rating, "comment": ""})
+        for prof, rating in [(prof_a, 5), (prof_a, 3), (prof_b, 4), (prof_a, 4), (prof_b, 2)]
+    ]
+    lines.insert(2, json.dumps({"professional_id": str(prof_a), "client_id": client_id, "rating": 9, "comment": ""}))
+    lines.insert(3, "no es json")
+
+    result = await review_import_service.import_reviews(db, lines, chunk_size=2)
+
+    assert result["inserted"] == 5
+    assert result["invalid"] == 2
+    assert [error["line"] for error in result["errors"]] == [3, 4]
+    assert result["reviews_per_second"] > 0
+
+    a = await db["professionals"].find_one({"_id": prof_a})
+    b = await db["professionals"].find_one({"_id": prof_b})
+    assert (a["total_reviews"], a["avg_rating"]) == (3, 4.0)
+    assert (b["total_reviews"], b["avg_rating"]) == (2, 3.0)
@@ -1,11 +1,12 @@
 # tests/test_review_service.py
+import asyncio
 import pytest
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
 
 from services import user_service, professional_service, review_service
 from schemas.user_schemas import UserIn
 from schemas.professional_schema import ProfessionalIn
-from schemas.review_schema import ReviewIn
+from schemas.review_schema import ReviewIn, ReviewSort
 
 @pytest.fixture
 async def setup_data(db: AsyncIOMotorDatabase):
@@ -39,4 +40,102 @@ async def test_add_review_and_update_average(db: AsyncIOMotorDatabase, setup_dat
 
     prof = await professional_service.get_professional_by_id(db, prof_id)
     assert prof["avg_rating"] == 4.0  # (5+3)/2
-    assert prof["total_reviews"] == 2
\ No newline at end of file
+    assert prof["total_reviews"] == 2
+
+@pytest.mark.asyncio
+async def test_concurrent_reviews_keep_rating_consistent(db: AsyncIOMotorDatabase, setup_data):
+    data = await setup_data
+    client_id = str(data["client"]["_id"])
+    prof_id = str(data["professional_profile"]["_id"])
+
+    ratings = [1, 2, 3, 4, 5] * 10
+    await asyncio.gather(*[
+        review_service.add_review(db, ReviewIn(professional_id=prof_id, rating=r, comment=""), client_id)
+        for r in ratings
+    ])
+
+    # rating_sum no es parte de ProfessionalOut: pedimos el documento completo
+    prof = await professional_service.get_professional_by_id(db, prof_id, projection=None)
+    assert prof["total_reviews"] == len(ratings)
+    assert prof["rating_sum"] == sum(ratings)
+    assert prof["avg_rating"] == sum(ratings) / len(ratings)
+    assert prof["rating_histogram"] == {"1": 10, "2": 10, "3": 10, "4": 10, "5": 10}
+
+@pytest.mark.asyncio
+async def test_reconcile_ratings_fixes_drift(db: AsyncIOMotorDatabase, setup_data):
+    data = await setup_data
+    client_id = str(data["client"]["_id"])
+    prof_id = str(data["professional_profile"]["_id"])
+    await review_service.add_review(db, ReviewIn(professional_id=prof_id, rating=4, comment=""), client_id)
+    await review_service.add_review(db, ReviewIn(professional_id=prof_id, rating=2, comment=""), client_id)
+
+    await db["professionals"].update_one(
+        {"_id": data["professional_profile"]["_id"]},
+        {"$set": {"rating_sum": 100, "total_reviews": 7, "avg_rating": 1.0}, "$unset": {"rating_histogram": ""}}
+    )
+
+    fixed = await review_service.reconcile_ratings(db)
+    assert fixed == 1
+
+    prof = await professional_service.get_professional_by_id(db, prof_id)
+    assert prof["total_reviews"] == 2
+    assert prof["avg_rating"] == 3.0
+    assert prof["rating_histogram"] == {"1": 0, "2": 1, "3": 0, "4": 1, "5": 0}
+
+    # Si no hay desvíos no se escribe nada
+    assert await review_service.reconcile_ratings(db) == 0
+
+@pytest.mark.asyncio
+async def test_reconcile_ratings_skips_a_concurrent_review(db: AsyncIOMotorDatabase, setup_data, monkeypatch):
+    data = await setup_data
+    client_id = str(data["client"]["_id"])
+    prof_id = str(data["professional_profile"]["_id"])
+    await review_service.add_review(db, ReviewIn(professional_id=prof_id, rating=4, comment=""), client_id)
+    await db["professionals"].update_one({"_id": data["professional_profile"]["_id"]}, {"$set": {"total_reviews": 7}})
+
+    # Entre la agregación y el bulk_write llega otra reseña: los conteos calculados ya son viejos
+    original_bulk_write = AsyncIOMotorCollection.bulk_write
+    armed = True
+
+    async def racing_bulk_write(self, *args, **kwargs):
+        nonlocal armed
+        if armed:
+            armed = False
+            await review_service.add_review(db, ReviewIn(professional_id=prof_id, rating=2, comment=""), client_id)
+        return await original_bulk_write(self, *args, **kwargs)
+
+    monkeypatch.setattr(AsyncIOMotorCollection, "bulk_write", racing_bulk_write)
+    assert await review_service.reconcile_ratings(db) == 0
+    monkeypatch.undo()
+
+    # No se pisó el incremento; la próxima pasada corrige con ambas reseñas
+    prof = await professional_service.get_professional_by_id(db, prof_id)
+    assert prof["total_reviews"] == 8
+    assert await review_service.reconcile_ratings(db) == 1
+    prof = await professional_service.get_professional_by_id(db, prof_id)
+    assert prof["total_reviews"] == 2 and prof["avg_rating"] == 3.0
+
+@pytest.mark.asyncio
+async def test_reviews_are_paginated_by_cursor_in_each_order(db: AsyncIOMotorDatabase, setup_data):
+    data = await setup_data
+    client_id = str(data["client"]["_id"])
+    prof_id = str(data["professional_profile"]["_id"])
+    for rating in [3, 5, 1, 4, 5, 2, 3]:
+        await review_service.add_review(db, ReviewIn(professional_id=prof_id, rating=rating, comment=""), client_id)
+
+    async def collect(sort):
+        ids, ratings, cursor = [], [], None
+        while True:
+            page, cursor = await review_service.get_reviews_for_professional(db, prof_id, limit=3, cursor=cursor, sort=sort)
+            ids += [r["_id"] for r in page]
+            ratings += [r["rating"] for r in page]
+            if cursor is None:
+                return ids, ratings
+
+    recent, _ = await collect(ReviewSort.RECENT)
+    oldest, _ = await collect(ReviewSort.OLDEST)
+    assert len(recent) == 7 and recent == oldest[::-1]
+
+    best_ids, best = await collect(ReviewSort.BEST)
+    assert best == [5, 5, 4, 3, 3, 2, 1]
+    assert len(set(best_ids)) == 7
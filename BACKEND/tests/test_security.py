@@ -0,0 +1,42 @@
+# tests/test_security.py
+import asyncio
+import pytest
+from passlib.context import CryptContext
+
+from core.config import settings
+from utils import security
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_async():
+    hashed = await security.hash_password_async("secreto")
+    assert await security.verify_password_async("secreto", hashed)
+    assert not await security.verify_password_async("otro", hashed)
+    assert security.pending_hash_operations() == 0
+
+
+@pytest.mark.asyncio
+async def test_verify_and_update_rehashes_when_cost_changes():
+    old_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4)
+    old_hash = old_context.hash("secreto")
+
+    is_valid, new_hash = await security.verify_and_update_password_async("secreto", old_hash)
+    assert is_valid
+    assert new_hash is not None
+    assert f"${settings.BCRYPT_ROUNDS:02d}$" in new_hash
+
+    is_valid, again = await security.verify_and_update_password_async("secreto", new_hash)
+    assert is_valid and again is None
+
+
+@pytest.mark.asyncio
+async def test_hash_pool_rejects_when_queue_is_full(monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", 1)
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_QUEUE", 0)
+
+    results = await asyncio.gather(
+        security.hash_password_async("a"),
+        security.hash_password_async("b"),
+        return_exceptions=True,
+    )
+    assert sum(isinstance(r, security.PasswordHasherBusyError) for r in results) == 1
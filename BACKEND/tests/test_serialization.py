@@ -0,0 +1,118 @@
+# tests/test_serialization.py
+from datetime import datetime
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+from schemas.job_schema import JobCard, JobOut
+from schemas.professional_schema import ProfessionalOut
+from schemas.review_schema import ReviewOut
+from schemas.user_schemas import UserOut
+from utils.serialization import FastJSONResponse, projection_for, serialize, serialize_many
+
+
+def _expected(model, doc):
+    """Lo que produce FastAPI validando contra el response_model (con los ids ya como str)."""
+    as_strings = {k: str(v) if isinstance(v, ObjectId) else v for k, v in doc.items()}
+    return jsonable_encoder(model.model_validate(as_strings), by_alias=True)
+
+
+def test_job_matches_response_model_output():
+    job = {
+        "_id": ObjectId(),
+        "title": "Arreglar la canilla",
+        "description": "Pierde agua",
+        "category": "Plomería",
+        "budget": 1500.0,
+        "client_id": ObjectId(),
+        "professional_id": ObjectId(),
+        "status": "posted",
+        "created_at": datetime(2024, 5, 1, 12, 30),
+        "campo_interno": "no se expone",
+    }
+    assert serialize(JobOut, job) == _expected(JobOut, job)
+
+
+def test_review_matches_response_model_output():
+    review = {
+        "_id": ObjectId(),
+        "rating": 4,
+        "comment": "Muy bien",
+        "client_id": ObjectId(),
+        "professional_id": ObjectId(),
+        "created_at": datetime(2024, 5, 1),
+    }
+    assert serialize_many(ReviewOut, [review]) == [_expected(ReviewOut, review)]
+
+
+def test_professional_defaults_are_applied():
+    professional = {
+        "_id": ObjectId(),
+        "user_id": ObjectId(),
+        "headline": "Electricista matriculado",
+        "bio": "",
+        "categories": ["Electricidad"],
+    }
+    assert serialize(ProfessionalOut, professional) == _expected(ProfessionalOut, professional)
+
+
+def test_user_uses_aliases_and_never_leaks_the_password():
+    user = {
+        "_id": ObjectId(),
+        "username": "juani",
+        "email": "juani@example.com",
+        "first_name": "Juan",
+        "last_name": "Sarmiento",
+        "role": "client",
+        "hashed_password": "$2b$12$...",
+    }
+    result = serialize(UserOut, user)
+    assert result == _expected(UserOut, user)
+    assert "hashed_password" not in result
+    assert result["firstName"] == "Juan"
+
+
+def test_fast_json_response_renders_serialized_documents():
+    job_id = ObjectId()
+    response = FastJSONResponse([{"_id": str(job_id), "title": "Pintura"}])
+    assert response.body.replace(b" ", b"") == f'[{{"_id":"{job_id}","title":"Pintura"}}]'.encode()
+
+
+def _apply_projection(doc, projection):
+    """Lo que devolvería Mongo para `projection` (solo campos de primer nivel)."""
+    return {k: v for k, v in doc.items() if k in projection or k == "_id"}
+
+
+def test_projected_documents_stay_compatible_with_schemas():
+    full_docs = {
+        UserOut: {
+            "_id": ObjectId(), "username": "juani", "email": "juani@example.com",
+            "first_name": "Juan", "last_name": "Sarmiento", "role": "client", "password": "$2b$12$...",
+        },
+        JobOut: {
+            "_id": ObjectId(), "title": "Arreglar la canilla", "description": "x" * 2000, "category": "Plomería",
+            "budget": 10.0, "client_id": ObjectId(), "professional_id": ObjectId(),
+            "status": "posted", "created_at": datetime(2024, 5, 1),
+        },
+        ProfessionalOut: {
+            "_id": ObjectId(), "user_id": ObjectId(), "headline": "Gasista", "bio": "", "categories": ["Gas"],
+            "city": "Mendoza", "avg_rating": 4.5, "total_reviews": 2, "rating_sum": 9,
+            "search_tokens": ["gasista", "gas", "mendoza"], "categories_norm": ["gas"],
+        },
+        ReviewOut: {
+            "_id": ObjectId(), "rating": 5, "comment": "", "client_id": ObjectId(),
+            "professional_id": ObjectId(), "created_at": datetime(2024, 5, 1),
+        },
+    }
+    for model, doc in full_docs.items():
+        projected = _apply_projection(doc, projection_for(model))
+        assert serialize(model, projected) == serialize(model, doc)
+        assert _expected(model, projected) == _expected(model, doc)
+
+
+def test_projections_leave_out_secrets_and_heavy_fields():
+    assert "password" not in projection_for(UserOut)
+    assert "search_tokens" not in projection_for(ProfessionalOut)
+    assert "description" in projection_for(JobOut)
+    assert "description" not in projection_for(JobCard)
+    assert projection_for(JobOut, "extra") == {**projection_for(JobOut), "extra": 1}
@@ -1,11 +1,14 @@
 # tests/test_user_service.py
 import pytest
+from fastapi import HTTPException
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
 
 from services import user_service
-from schemas.user_schemas import UserIn
+from schemas.user_schemas import UserIn, UserOut
+from utils.auth_service import create_access_token, get_current_user
 from utils.security import verify_password
+from utils.serialization import serialize
 
 @pytest.mark.asyncio
 async def test_create_user(db: AsyncIOMotorDatabase):
@@ -77,4 +80,47 @@ async def test_delete_user(db: AsyncIOMotorDatabase):
     assert deleted is True
     
     found_user = await user_service.get_user_by_id(db, user_id)
-    assert found_user is None
\ No newline at end of file
+    assert found_user is None
+
+@pytest.mark.asyncio
+async def test_delete_user_invalidates_principal_cache(db: AsyncIOMotorDatabase):
+    user_data = UserIn(
+        username="cached",
+        email="cached@me.com",
+        password="password123",
+        firstName="Cached",
+        lastName="User",
+        role="client"
+    )
+    created_user = await user_service.create_user(db, user_data)
+    user_id = str(created_user["_id"])
+    token = create_access_token({"user_id": user_id})
+
+    principal = await get_current_user(db=db, token=token)
+    assert principal.id == user_id
+    assert user_service.principal_cache.get(user_id) is not None
+
+    await user_service.delete_user(db, user_id)
+    assert user_service.principal_cache.get(user_id) is None
+    with pytest.raises(HTTPException):
+        await get_current_user(db=db, token=token)
+
+@pytest.mark.asyncio
+async def test_user_reads_skip_the_password_hash(db: AsyncIOMotorDatabase):
+    user_data = UserIn(
+        username="projected",
+        email="projected@me.com",
+        password="password123",
+        firstName="Pro",
+        lastName="Jected",
+        role="client"
+    )
+    created_user = await user_service.create_user(db, user_data)
+
+    found_user = await user_service.get_user_by_id(db, str(created_user["_id"]))
+    assert "password" not in found_user
+    assert serialize(UserOut, found_user)["_id"] == str(created_user["_id"])
+
+    # El login pide el hash explícitamente
+    login_user = await user_service.get_user_by_username(db, "projected", projection=user_service.LOGIN_PROJECTION)
+    assert verify_password("password123", login_user["password"])
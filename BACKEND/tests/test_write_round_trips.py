@@ -0,0 +1,65 @@
+# tests/test_write_round_trips.py
+import pytest
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from services import user_service, professional_service, job_service, review_service
+from schemas.user_schemas import UserIn
+from schemas.professional_schema import ProfessionalIn, ProfessionalUpdate
+from schemas.job_schema import JobIn, JobUpdate, JobStatus
+from schemas.review_schema import ReviewIn
+
+# Cada escritura manda un único comando a su colección. El único extra permitido son
+# las estadísticas materializadas del dashboard (colección `stats`: la marca de
+# escritura en curso y el $inc).
+
+
+def assert_single_write(command_counter, collection: str, command: str):
+    assert command_counter.on(collection) == [command]
+    assert set(target for _, target in command_counter.commands) <= {collection, "stats"}
+
+
+@pytest.mark.asyncio
+async def test_service_writes_issue_one_command(counted_db: AsyncIOMotorDatabase, command_counter):
+    db = counted_db
+
+    command_counter.reset()
+    user = await user_service.create_user(db, UserIn(username="rt", email="rt@a.com", password="123", firstName="R", lastName="T", role="professional"))
+    assert_single_write(command_counter, "users", "insert")
+    assert user["email"] == "rt@a.com"
+
+    command_counter.reset()
+    prof = await professional_service.create_professional(db, ProfessionalIn(headline="Gasista", bio="", categories=["Gas"]), str(user["_id"]))
+    assert_single_write(command_counter, "professionals", "insert")
+
+    command_counter.reset()
+    updated_prof = await professional_service.update_professional(db, str(prof["_id"]), ProfessionalUpdate(categories=["Gas", "Agua"]))
+    assert_single_write(command_counter, "professionals", "findAndModify")
+    assert updated_prof["categories"] == ["Gas", "Agua"]
+    assert set(updated_prof["search_tokens"]) == {"gasista", "gas", "agua"}
+
+    command_counter.reset()
+    job = await job_service.create_job(db, JobIn(title="Revisar caldera", description="", category="Gas", budget=10.0, professional_id=str(prof["_id"])), str(user["_id"]))
+    assert_single_write(command_counter, "jobs", "insert")
+
+    command_counter.reset()
+    updated_job = await job_service.update_job(db, str(job["_id"]), JobUpdate(status=JobStatus.ACCEPTED, budget=20.0))
+    assert_single_write(command_counter, "jobs", "findAndModify")
+    assert updated_job["status"] == JobStatus.ACCEPTED
+    assert updated_job["budget"] == 20.0
+
+    # El documento devuelto coincide con lo que quedó guardado
+    stored = await db["jobs"].find_one({"_id": job["_id"]})
+    assert stored == updated_job
+
+
+@pytest.mark.asyncio
+async def test_add_review_issues_one_command_per_collection(counted_db: AsyncIOMotorDatabase, command_counter):
+    db = counted_db
+    user = await user_service.create_user(db, UserIn(username="rv", email="rv@a.com", password="123", firstName="R", lastName="V", role="client"))
+    prof = await professional_service.create_professional(db, ProfessionalIn(headline="Plomero", bio="", categories=[]), str(user["_id"]))
+
+    command_counter.reset()
+    review = await review_service.add_review(db, ReviewIn(professional_id=str(prof["_id"]), rating=5, comment="ok"), str(user["_id"]))
+    assert command_counter.on("reviews") == ["insert"]
+    assert command_counter.on("professionals") == ["findAndModify"]
+    assert review["rating"] == 5 and "_id" in review
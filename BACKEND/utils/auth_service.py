@@ -1,4 +1,6 @@
 # utils/auth_service.py
+import hashlib
+import time
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from fastapi import Depends, HTTPException, status
@@ -10,9 +12,20 @@ from schemas.token_schema import TokenData
 from schemas.user_schemas import UserOut
 from database.databaseMongo import get_db
 from services import user_service
+from utils.cache import TTLCache
+from utils.serialization import serialize
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
+# Tokens ya verificados, por digest del token: user_id si fue válido o _REJECTED si no.
+token_cache = TTLCache(
+    "verified_tokens",
+    maxsize=settings.TOKEN_CACHE_SIZE,
+    ttl=settings.TOKEN_CACHE_MAX_TTL_SECONDS,
+)
+_REJECTED = object()
+_NOT_CACHED = object()
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -21,26 +34,67 @@ def create_access_token(data: dict):
     return encoded_jwt
 
 def verify_access_token(token: str, credentials_exception):
+    cache_key = hashlib.sha256(token.encode()).hexdigest()
+    cached = token_cache.get(cache_key, _NOT_CACHED)
+    if cached is _REJECTED:
+        raise credentials_exception
+    if cached is not _NOT_CACHED:
+        return TokenData(id=cached)
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: str = payload.get("user_id")
-        if user_id is None:
-            raise credentials_exception
-        return TokenData(id=user_id)
     except JWTError:
+        token_cache.set(cache_key, _REJECTED, ttl=settings.TOKEN_CACHE_NEGATIVE_TTL_SECONDS)
         raise credentials_exception
+    user_id: str = payload.get("user_id")
+    if user_id is None:
+        token_cache.set(cache_key, _REJECTED, ttl=settings.TOKEN_CACHE_NEGATIVE_TTL_SECONDS)
+        raise credentials_exception
+
+    # La entrada nunca sobrevive al vencimiento del propio token
+    ttl = token_cache.ttl
+    if payload.get("exp") is not None:
+        ttl = min(ttl, payload["exp"] - time.time())
+    token_cache.set(cache_key, user_id, ttl=ttl)
+    return TokenData(id=user_id)
 
 async def get_current_user(
     db: AsyncIOMotorDatabase = Depends(get_db),
     token: str = Depends(oauth2_scheme)
 ) -> UserOut:
+    return await get_user_from_token(db, token)
+
+async def require_admin(current_user: UserOut = Depends(get_current_user)) -> UserOut:
+    """
+    Dependencia de las rutas de mantenimiento de /admin: el id del usuario tiene que
+    estar en ADMIN_USER_IDS. Se usa el id y no el username porque el id no se puede
+    elegir ni cambiar desde /users.
+    """
+    admins = {user_id.strip() for user_id in settings.ADMIN_USER_IDS.split(",") if user_id.strip()}
+    if current_user.id not in admins:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Se requieren permisos de administrador")
+    return current_user
+
+async def get_user_from_token(db: AsyncIOMotorDatabase, token: str) -> UserOut:
+    """
+    Valida el JWT y devuelve el usuario (con las cachés de tokens y de principals).
+    Fuera de las dependencias HTTP la usan los WebSockets, que reciben el token por query.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="No se pudieron validar las credenciales",
         headers={"WWW-Authenticate": "Bearer"},
     )
     token_data = verify_access_token(token, credentials_exception)
+
+    principal = user_service.principal_cache.get(token_data.id)
+    if principal is not None:
+        return principal
+
     user = await user_service.get_user_by_id(db, user_id=token_data.id)
     if user is None:
         raise credentials_exception
-    return UserOut(**user)
\ No newline at end of file
+    # El _id de la base es ObjectId y UserOut.id es str: se convierte antes de validar
+    principal = UserOut(**serialize(UserOut, user))
+    user_service.principal_cache.set(token_data.id, principal)
+    return principal
\ No newline at end of file
@@ -0,0 +1,67 @@
+# utils/email_service.py
+"""
+Envío de emails por SMTP con la librería estándar.
+
+`smtplib` es bloqueante: estas funciones se llaman desde el pool de threads
+propio del worker del outbox (ver `services/outbox_service.py`), nunca desde el
+event loop ni desde el threadpool compartido de Starlette.
+"""
+import smtplib
+from email.message import EmailMessage
+from typing import List, Optional
+
+from core.config import settings
+
+
+def build_message(to: str, subject: str, body: str, sender: Optional[str] = None) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = sender or settings.EMAIL_FROM
+    message["To"] = to
+    message["Subject"] = subject
+    message.set_content(body)
+    return message
+
+
+def _connect() -> smtplib.SMTP:
+    smtp = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT_SECONDS)
+    if settings.SMTP_STARTTLS:
+        smtp.starttls()
+    if settings.SMTP_USERNAME:
+        smtp.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD or "")
+    return smtp
+
+
+def send_messages(messages: List[EmailMessage]) -> List[Optional[str]]:
+    """
+    Envía los mensajes por una única conexión SMTP.
+
+    Devuelve, en el mismo orden, `None` por cada mensaje enviado o el error como
+    texto. Si la conexión se cae, el mensaje en curso y los que faltan fallan.
+    """
+    try:
+        smtp = _connect()
+    except (smtplib.SMTPException, OSError) as exc:
+        return [f"No se pudo conectar al servidor SMTP: {exc}"] * len(messages)
+
+    results: List[Optional[str]] = []
+    try:
+        for index, message in enumerate(messages):
+            try:
+                smtp.send_message(message)
+                results.append(None)
+            except smtplib.SMTPServerDisconnected as exc:
+                results.extend([f"Conexión SMTP perdida: {exc}"] * (len(messages) - index))
+                break
+            except smtplib.SMTPException as exc:
+                # Rechazo de este mensaje; la conexión sigue sirviendo para los demás
+                results.append(str(exc))
+            except OSError as exc:
+                # SMTPException hereda de OSError: los errores de socket se atajan después
+                results.extend([f"Conexión SMTP perdida: {exc}"] * (len(messages) - index))
+                break
+    finally:
+        try:
+            smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            smtp.close()
+    return results
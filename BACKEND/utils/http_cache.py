@@ -0,0 +1,88 @@
+# utils/http_cache.py
+"""
+Caché HTTP condicional para lecturas públicas versionadas.
+
+Los documentos cacheables llevan un contador `version` que incrementa cada
+escritura que cambia la respuesta. Con él:
+
+- el ETag es fuerte y determinístico: `"<recurso>-<id>-<version>"`;
+- un `If-None-Match` que coincide se responde 304 sin cargar el cuerpo;
+- `response_cache` guarda los cuerpos ya serializados por (recurso, id, versión,
+  variante), así que una versión nueva nunca sirve un cuerpo viejo. La variante
+  distingue respuestas del mismo recurso con distintos parámetros (orden, página). Con
+  RESPONSE_CACHE_SIZE = 0 queda desactivada. Sus contadores están en /admin/caches.
+"""
+import hashlib
+from typing import Awaitable, Callable, Optional
+
+from fastapi import Request, Response, status
+
+from core.config import settings
+from utils.cache import TTLCache
+from utils.serialization import FastJSONResponse
+
+response_cache = TTLCache(
+    "responses",
+    maxsize=settings.RESPONSE_CACHE_SIZE,
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+)
+
+# Los clientes tienen que revalidar siempre: el ETag es lo que evita transferir el cuerpo
+CACHE_CONTROL = "no-cache"
+
+
+def make_etag(resource: str, resource_id: str, version: int, variant: str = "") -> str:
+    if variant:
+        digest = hashlib.blake2b(variant.encode(), digest_size=8).hexdigest()
+        return f'"{resource}-{resource_id}-{version}-{digest}"'
+    return f'"{resource}-{resource_id}-{version}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparación débil de If-None-Match (RFC 9110): acepta `*`, listas y prefijo W/."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def invalidate(resource: str, resource_id: str, version: int, variant: str = "") -> None:
+    response_cache.invalidate((resource, resource_id, version, variant))
+
+
+async def conditional_json_response(
+    request: Request,
+    resource: str,
+    resource_id: str,
+    version: int,
+    load_content: Callable[[], Awaitable[object]],
+    variant: str = "",
+) -> Response:
+    """
+    Responde 304 si el cliente ya tiene `version`; si no, sirve el cuerpo desde la
+    caché o lo arma con `load_content` (que ya devuelve contenido serializable).
+    Si `load_content` devuelve una tupla `(contenido, headers)`, esos headers (por
+    ejemplo el cursor de la página siguiente) se cachean junto con el cuerpo.
+
+    `load_content` corre después de leer la versión: en una carrera el cuerpo puede
+    ser más nuevo que el ETag, nunca más viejo.
+    """
+    etag = make_etag(resource, resource_id, version, variant)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    key = (resource, resource_id, version, variant)
+    cached = response_cache.get(key)
+    if cached is None:
+        content = await load_content()
+        extra_headers = {}
+        if isinstance(content, tuple):
+            content, extra_headers = content
+        cached = (FastJSONResponse(content).body, extra_headers)
+        response_cache.set(key, cached)
+    body, extra_headers = cached
+    return Response(content=body, media_type="application/json", headers={**extra_headers, **headers})
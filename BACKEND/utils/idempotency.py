@@ -0,0 +1,245 @@
+# utils/idempotency.py
+"""
+Reintentos seguros de POST con el header `Idempotency-Key`.
+
+La primera ejecución con una clave guarda su respuesta (status, headers y cuerpo)
+en la colección `idempotency_keys`, que vence por índice TTL a las
+IDEMPOTENCY_TTL_SECONDS. Un reintento con la misma clave recibe esa respuesta tal
+cual, con `Idempotent-Replayed: true`, sin pasar por los servicios.
+
+- `replay_cache` (en memoria) evita ir a Mongo para los reintentos que caen en el
+  mismo proceso.
+- Un duplicado concurrente en el mismo proceso espera a la ejecución en curso. En
+  otro proceso, el insert del documento "en curso" choca por _id y ese proceso
+  espera hasta IDEMPOTENCY_WAIT_SECONDS a que termine; si no, responde 409.
+- La clave queda atada al usuario, a la ruta y al cuerpo: reusarla con otro cuerpo
+  es un 422.
+- Las respuestas 4xx (HTTPException) también se guardan: el reintento obtiene el
+  mismo error. Los 5xx y las excepciones no: se libera la clave para reintentar.
+- Cada reserva lleva un `claim_id` propio (uno nuevo al tomar una clave colgada).
+  Guardar la respuesta o liberar la clave solo toca el documento si el `claim_id`
+  sigue siendo el nuestro, así un request lento no pisa al que tomó su clave.
+
+Uso desde un endpoint:
+
+    async def execute():
+        ...
+        return FastJSONResponse(..., status_code=201)
+
+    return await idempotency.run(request, db, idempotency_key, current_user.id, execute)
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.responses import JSONResponse
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from core.config import settings
+from utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+IDEMPOTENCY_COLLECTION = "idempotency_keys"
+MAX_KEY_LENGTH = 255
+IN_PROGRESS = "in_progress"
+DONE = "done"
+# Intentos para guardar la respuesta una vez que `execute` ya escribió
+_SAVE_ATTEMPTS = 3
+# Headers que se recalculan al responder y no se guardan
+_SKIPPED_HEADERS = {"content-length", "date", "server"}
+
+replay_cache = TTLCache(
+    "idempotency",
+    maxsize=settings.IDEMPOTENCY_CACHE_SIZE,
+    ttl=settings.IDEMPOTENCY_CACHE_TTL_SECONDS,
+)
+_in_flight: Dict[str, asyncio.Future] = {}
+
+
+class _Released(Exception):
+    """La ejecución original falló y liberó la clave: el que esperaba la reintenta."""
+
+
+def _storage_key(request: Request, principal: str, key: str) -> str:
+    return hashlib.sha256(f"{principal}|{request.method}|{request.url.path}|{key}".encode()).hexdigest()
+
+
+async def _fingerprint(request: Request) -> str:
+    return hashlib.sha256(await request.body()).hexdigest()
+
+
+def _stored_response(response: Response) -> dict:
+    headers = {k: v for k, v in response.headers.items() if k.lower() not in _SKIPPED_HEADERS}
+    return {"status_code": response.status_code, "headers": headers, "body": bytes(response.body)}
+
+
+def _replay(stored: dict, fingerprint: str) -> Response:
+    if stored["fingerprint"] != fingerprint:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"La {IDEMPOTENCY_HEADER} ya se usó con otro cuerpo",
+        )
+    response = stored["response"]
+    return Response(
+        content=response["body"],
+        status_code=response["status_code"],
+        headers={**response["headers"], REPLAYED_HEADER: "true"},
+    )
+
+
+async def _claim(db: AsyncIOMotorDatabase, storage_key: str, fingerprint: str, claim_id: ObjectId) -> Optional[dict]:
+    """
+    Reserva la clave con `claim_id`. Devuelve None si la reservó este request, o el
+    documento terminado si ya había una respuesta guardada (esperando si estaba en curso).
+    """
+    collection = db[IDEMPOTENCY_COLLECTION]
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    delay = 0.05
+    while True:
+        now = datetime.utcnow()
+        try:
+            await collection.insert_one(
+                {"_id": storage_key, "status": IN_PROGRESS, "claim_id": claim_id, "fingerprint": fingerprint, "created_at": now}
+            )
+            return None
+        except DuplicateKeyError:
+            pass
+        existing = await collection.find_one({"_id": storage_key})
+        if existing is None:
+            continue  # Se liberó entre el insert y la lectura
+        if existing["status"] == DONE:
+            return existing
+        # En curso en otro proceso: si quedó colgado (el proceso murió) se toma la clave
+        stale_before = now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS)
+        taken = await collection.find_one_and_update(
+            {"_id": storage_key, "status": IN_PROGRESS, "created_at": {"$lt": stale_before}},
+            {"$set": {"claim_id": claim_id, "created_at": now, "fingerprint": fingerprint}},
+        )
+        if taken is not None:
+            return None
+        if time.monotonic() >= deadline:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Hay un request en curso con la misma Idempotency-Key",
+                headers={"Retry-After": "1"},
+            )
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 0.5)
+
+
+async def _release(db: AsyncIOMotorDatabase, storage_key: str, claim_id: ObjectId) -> None:
+    await db[IDEMPOTENCY_COLLECTION].delete_one({"_id": storage_key, "status": IN_PROGRESS, "claim_id": claim_id})
+
+
+async def _save(db: AsyncIOMotorDatabase, storage_key: str, claim_id: ObjectId, response: dict) -> bool:
+    """
+    Guarda la respuesta si la clave sigue reservada por `claim_id`. Devuelve False
+    si otro request la tomó (esta ejecución tardó más que IDEMPOTENCY_LOCK_SECONDS).
+    El write ya ocurrió, así que un error se reintenta; si sigue fallando se libera
+    la clave en lugar de dejarla en curso hasta que venza el lock.
+    """
+    for attempt in range(_SAVE_ATTEMPTS):
+        try:
+            result = await db[IDEMPOTENCY_COLLECTION].update_one(
+                {"_id": storage_key, "status": IN_PROGRESS, "claim_id": claim_id},
+                {"$set": {"status": DONE, "response": response, "completed_at": datetime.utcnow()}},
+            )
+            return result.matched_count == 1
+        except PyMongoError:
+            if attempt == _SAVE_ATTEMPTS - 1:
+                logger.exception("No se pudo guardar la respuesta de la clave %s", storage_key)
+    try:
+        await _release(db, storage_key, claim_id)
+    except PyMongoError:
+        logger.exception("No se pudo liberar la clave %s", storage_key)
+    return False
+
+
+async def _execute(execute: Callable[[], Awaitable[Response]]) -> Response:
+    """Corre el endpoint; los HTTPException 4xx se vuelven respuestas para poder guardarlas."""
+    try:
+        return await execute()
+    except HTTPException as exc:
+        if exc.status_code >= 500:
+            raise
+        return JSONResponse({"detail": exc.detail}, status_code=exc.status_code, headers=exc.headers)
+
+
+async def run(
+    request: Request,
+    db: AsyncIOMotorDatabase,
+    key: Optional[str],
+    principal: str,
+    execute: Callable[[], Awaitable[Response]],
+) -> Response:
+    """
+    Ejecuta `execute` una sola vez por (`principal`, ruta, `key`) y repite su
+    respuesta en los reintentos. Sin `key` simplemente ejecuta.
+    """
+    if key is None:
+        return await execute()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{IDEMPOTENCY_HEADER} debe tener entre 1 y {MAX_KEY_LENGTH} caracteres",
+        )
+
+    storage_key = _storage_key(request, principal, key)
+    fingerprint = await _fingerprint(request)
+    while True:
+        stored = replay_cache.get(storage_key)
+        if stored is not None:
+            return _replay(stored, fingerprint)
+
+        running = _in_flight.get(storage_key)
+        if running is None:
+            break
+        try:
+            return _replay(await asyncio.shield(running), fingerprint)
+        except _Released:
+            continue
+
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[storage_key] = future
+    claim_id = ObjectId()
+    try:
+        stored = await _claim(db, storage_key, fingerprint, claim_id)
+        if stored is not None:
+            replay_cache.set(storage_key, stored)
+            future.set_result(stored)
+            return _replay(stored, fingerprint)
+
+        try:
+            response = await _execute(execute)
+        except BaseException:
+            await _release(db, storage_key, claim_id)
+            raise
+        if response.status_code >= 500:
+            await _release(db, storage_key, claim_id)
+            future.set_exception(_Released())
+            return response
+
+        stored = {"fingerprint": fingerprint, "response": _stored_response(response)}
+        if await _save(db, storage_key, claim_id, stored["response"]):
+            replay_cache.set(storage_key, stored)
+        else:
+            logger.warning("La clave %s no quedó guardada para esta ejecución; no se cachea su respuesta", storage_key)
+        # Los duplicados de este proceso que esperaban reciben la misma respuesta
+        future.set_result(stored)
+        return response
+    finally:
+        _in_flight.pop(storage_key, None)
+        if not future.done():
+            future.set_exception(_Released())
+        # Si nadie esperaba, se da por leída la excepción para que asyncio no la reporte
+        if not future.cancelled():
+            future.exception()
@@ -0,0 +1,248 @@
+# utils/metrics.py
+"""
+Métricas en formato de texto de Prometheus, sin dependencias externas.
+
+- `MetricsMiddleware` (ASGI) mide cada request: latencia y tamaño de respuesta
+  por ruta (la plantilla, por ejemplo `/jobs/{job_id}`), requests en curso y
+  cantidad de comandos de Mongo por request.
+- `MongoCommandMetrics` (CommandListener de pymongo) cuenta y mide cada comando
+  por colección y nombre de comando, atribuyéndolo a la ruta del request en
+  curso. Motor ejecuta los comandos en threads que copian el contexto, así que
+  el `ContextVar` del request llega al listener.
+- `render_metrics()` arma el texto que sirve `/metrics`.
+
+Un número alto en `http_request_mongo_commands` para una ruta es la señal de un
+patrón N+1; `mongo_command_duration_seconds` muestra las agregaciones lentas.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+UNMATCHED_ROUTE = "unmatched"
+NO_REQUEST = "none"
+
+_registry: List["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_number(v)}" for labels, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [conteos por bucket (sin acumular), suma, cantidad]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, *labels: str) -> int:
+        entry = self._values.get(labels)
+        return entry[2] if entry else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((labels, (list(e[0]), e[1], e[2])) for labels, e in self._values.items())
+        lines = []
+        for labels, (bucket_counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), bucket_counts):
+                cumulative += bucket_count
+                le = f'le="{_format_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_number(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+http_requests_total = Counter(
+    "http_requests_total", "Requests atendidos.", ("method", "route", "status"))
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds", "Latencia de los requests.", ("method", "route"))
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight", "Requests en curso.", ("method",))
+http_response_size_bytes = Histogram(
+    "http_response_size_bytes", "Tamaño del cuerpo de las respuestas.", ("method", "route"), buckets=SIZE_BUCKETS)
+http_request_mongo_commands = Histogram(
+    "http_request_mongo_commands", "Comandos de Mongo por request.", ("method", "route"), buckets=COUNT_BUCKETS)
+mongo_commands_total = Counter(
+    "mongo_commands_total", "Comandos enviados a Mongo.", ("route", "collection", "command", "outcome"))
+mongo_command_duration_seconds = Histogram(
+    "mongo_command_duration_seconds", "Duración de los comandos de Mongo.", ("route", "collection", "command"))
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class _RequestContext:
+    __slots__ = ("scope", "mongo_commands")
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.mongo_commands = 0
+
+    @property
+    def route(self) -> str:
+        return route_label(self.scope)
+
+
+_current_request: ContextVar[Optional[_RequestContext]] = ContextVar("metrics_request", default=None)
+
+
+def route_label(scope: dict) -> str:
+    """Plantilla de la ruta que atendió el request (Starlette la deja en el scope al rutear)."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Middleware ASGI: latencia, tamaño de respuesta, requests en curso y comandos de Mongo por ruta."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        context = _RequestContext(scope)
+        token = _current_request.set(context)
+        status_code = 500
+        body_size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, body_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                body_size += len(message.get("body", b""))
+            await send(message)
+
+        http_requests_in_flight.inc(method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_requests_in_flight.dec(method)
+            route = context.route
+            http_requests_total.inc(method, route, str(status_code))
+            http_request_duration_seconds.observe(elapsed, method, route)
+            http_response_size_bytes.observe(body_size, method, route)
+            http_request_mongo_commands.observe(context.mongo_commands, method, route)
+            _current_request.reset(token)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Cuenta y mide los comandos de Mongo, atribuidos a la ruta del request en curso."""
+
+    def __init__(self):
+        self._pending: Dict[Tuple[int, int], tuple] = {}
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        collection = target if isinstance(target, str) else ""
+        context = _current_request.get()
+        if context is not None:
+            context.mongo_commands += 1
+        route = context.route if context is not None else NO_REQUEST
+        self._pending[(event.request_id, event.operation_id)] = (route, collection, event.command_name)
+
+    def _finish(self, event, outcome: str):
+        labels = self._pending.pop((event.request_id, event.operation_id), None)
+        if labels is None:
+            return
+        mongo_commands_total.inc(*labels, outcome)
+        mongo_command_duration_seconds.observe(event.duration_micros / 1_000_000, *labels)
+
+    def succeeded(self, event):
+        self._finish(event, "success")
+
+    def failed(self, event):
+        self._finish(event, "failure")
+
+
+mongo_command_metrics = MongoCommandMetrics()
@@ -0,0 +1,96 @@
+# utils/pagination.py
+"""
+Paginación por keyset (cursor opaco).
+
+El cursor codifica el último (clave de orden, _id) de la página anterior. La
+siguiente página se pide con un filtro "después de este punto" sobre un índice,
+así que cuesta lo mismo sea la página 1 o la 10.000 (a diferencia de `.skip()`).
+"""
+import base64
+from typing import Any, List, Optional, Tuple
+
+from bson import json_util
+from pymongo import ASCENDING, DESCENDING
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursorError(ValueError):
+    """El cursor recibido no se pudo decodificar."""
+
+
+def encode_cursor(doc: dict, sort_field: str = "_id") -> str:
+    """Arma el cursor a partir del último documento de la página."""
+    payload = {"id": doc["_id"]}
+    if sort_field != "_id":
+        payload["k"] = doc.get(sort_field)
+    raw = json_util.dumps(payload).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_field: str = "_id") -> Tuple[Any, Any]:
+    """Devuelve (valor de la clave de orden, _id) del cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json_util.loads(base64.urlsafe_b64decode(padded.encode()))
+        last_id = payload["id"]
+        last_key = payload["k"] if sort_field != "_id" else last_id
+    except Exception as exc:
+        raise InvalidCursorError("Cursor de paginación inválido") from exc
+    return last_key, last_id
+
+
+def keyset_filter(cursor: Optional[str], sort_field: str = "_id", direction: int = ASCENDING) -> dict:
+    """Filtro que selecciona los documentos posteriores al cursor según el orden dado."""
+    if not cursor:
+        return {}
+    last_key, last_id = decode_cursor(cursor, sort_field)
+    op = "$gt" if direction == ASCENDING else "$lt"
+    if sort_field == "_id":
+        return {"_id": {op: last_id}}
+    return {"$or": [
+        {sort_field: {op: last_key}},
+        {sort_field: last_key, "_id": {op: last_id}},
+    ]}
+
+
+def keyset_sort(sort_field: str = "_id", direction: int = ASCENDING) -> List[Tuple[str, int]]:
+    """Orden total que acompaña a `keyset_filter` (el _id desempata)."""
+    if sort_field == "_id":
+        return [("_id", direction)]
+    return [(sort_field, direction), ("_id", direction)]
+
+
+async def fetch_page(
+    collection,
+    query: dict,
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    sort_field: str = "_id",
+    direction: int = ASCENDING,
+    projection: Optional[dict] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Trae una página de `collection`.
+
+    Si viene `cursor` se usa keyset; si no, se respeta `skip` como modo de compatibilidad.
+    Pide `limit + 1` documentos para saber si hay página siguiente sin un `count` extra.
+    Devuelve (documentos, próximo cursor o None si no hay más).
+    """
+    page_query = dict(query)
+    after = keyset_filter(cursor, sort_field, direction)
+    if after:
+        page_query = {"$and": [query, after]} if query else after
+
+    mongo_cursor = collection.find(page_query, projection).sort(keyset_sort(sort_field, direction))
+    if skip and not cursor:
+        mongo_cursor = mongo_cursor.skip(skip)
+    docs = await mongo_cursor.limit(limit + 1).to_list(length=limit + 1)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1], sort_field)
+    return docs, next_cursor
+
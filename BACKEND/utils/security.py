@@ -1,9 +1,68 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from core.config import settings
+
+# Fijamos el costo como mínimo y máximo: cualquier hash con otro costo "necesita update"
+# y se rehashea de forma transparente en el próximo login (ver verify_and_update_password_async).
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+
+# bcrypt libera el GIL mientras calcula, así que un pool de threads propio alcanza para
+# sacar el trabajo del event loop sin competir con el threadpool compartido de Starlette.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash",
+)
+_pending_operations = 0
+
+
+class PasswordHasherBusyError(RuntimeError):
+    """La cola del pool de hashing está llena; el cliente debería reintentar más tarde."""
+
 
 def hash_password(password: str):
     return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str):
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+async def _run_in_hash_pool(fn, *args):
+    """
+    Ejecuta `fn` en el pool de hashing. Si ya hay más operaciones en curso o esperando
+    que `PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_QUEUE`, falla rápido en vez de encolar.
+    """
+    global _pending_operations
+    if _pending_operations >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_QUEUE:
+        raise PasswordHasherBusyError("Demasiadas operaciones de contraseña en curso")
+    _pending_operations += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, functools.partial(fn, *args))
+    finally:
+        _pending_operations -= 1
+
+
+def pending_hash_operations() -> int:
+    return _pending_operations
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_hash_pool(pwd_context.hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_in_hash_pool(pwd_context.verify, plain_password, hashed_password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verifica y, si el hash usa otro costo que el configurado, devuelve el nuevo hash a guardar."""
+    return await _run_in_hash_pool(pwd_context.verify_and_update, plain_password, hashed_password)
@@ -0,0 +1,151 @@
+# utils/serialization.py
+"""
+Serialización rápida de documentos de Mongo hacia los esquemas de salida.
+
+`build_converter(Model)` arma una sola vez, por esquema, la lista de campos con su
+conversión (ObjectId -> str, datetime -> ISO, Enum -> valor, listas y modelos
+anidados) y devuelve una función que transforma un documento en un dict listo
+para JSON, con las mismas claves que produciría FastAPI (alias incluidos).
+
+Está pensado para salida confiable de la base: no valida, solo convierte. Los
+endpoints lo usan junto con `FastJSONResponse` para evitar validar cada documento
+contra el `response_model`.
+
+`projection_for(Model)` deriva del mismo esquema la proyección de Mongo, para que
+las lecturas traigan solo los campos que la respuesta va a usar.
+"""
+import json
+import types
+from datetime import date, datetime
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Type, Union, get_args, get_origin
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic_core import PydanticUndefined
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional: sin él se usa json de la librería estándar
+    orjson = None
+
+_MISSING = object()
+
+
+def _convert_any(value: Any) -> Any:
+    """Conversión genérica para campos sin un tipo más específico."""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, list):
+        return [_convert_any(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _convert_any(v) for k, v in value.items()}
+    return value
+
+
+def _to_str(value: Any) -> Any:
+    return str(value) if isinstance(value, ObjectId) else value
+
+
+def _to_iso(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, (datetime, date)) else value
+
+
+def _enum_value(value: Any) -> Any:
+    return value.value if isinstance(value, Enum) else value
+
+
+def _converter_for(annotation: Any) -> Callable[[Any], Any]:
+    origin = get_origin(annotation)
+    if origin is Union or origin is types.UnionType:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) != 1:
+            return _convert_any
+        inner = _converter_for(args[0])
+        return lambda value: None if value is None else inner(value)
+    if origin in (list, tuple, set, frozenset):
+        args = get_args(annotation)
+        inner = _converter_for(args[0]) if args else _convert_any
+        return lambda value: None if value is None else [inner(item) for item in value]
+    if annotation is str:
+        return _to_str
+    if annotation in (datetime, date):
+        return _to_iso
+    if isinstance(annotation, type) and issubclass(annotation, Enum):
+        return _enum_value
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        nested = build_converter(annotation)
+        return lambda value: None if value is None else nested(value)
+    return _convert_any
+
+
+def _source_keys(name: str, field) -> tuple:
+    # En la base el campo puede estar guardado por alias (`_id`) o por nombre (`first_name`)
+    return tuple(dict.fromkeys([field.alias or name, name]))
+
+
+@lru_cache(maxsize=None)
+def _projected_fields(model: Type[BaseModel]) -> tuple:
+    keys = []
+    for name, field in model.model_fields.items():
+        keys.extend(_source_keys(name, field))
+    return tuple(dict.fromkeys(keys))
+
+
+def projection_for(model: Type[BaseModel], *extra_fields: str) -> Dict[str, int]:
+    """Proyección de Mongo con los campos que necesita `model` (más `extra_fields`)."""
+    return {key: 1 for key in (*_projected_fields(model), *extra_fields)}
+
+
+@lru_cache(maxsize=None)
+def build_converter(model: Type[BaseModel]) -> Callable[[dict], dict]:
+    """Convertidor precompilado de documentos de Mongo para `model`."""
+    fields = []
+    for name, field in model.model_fields.items():
+        output_key = field.alias or name
+        source_keys = _source_keys(name, field)
+        if field.default_factory is not None:
+            default = field.default_factory
+        elif field.default is not PydanticUndefined:
+            default_value = _convert_any(field.default)
+            default = lambda default_value=default_value: default_value
+        else:
+            default = lambda: None
+        fields.append((output_key, source_keys, _converter_for(field.annotation), default))
+
+    def convert(doc: dict) -> dict:
+        out = {}
+        for output_key, source_keys, converter, default in fields:
+            value = _MISSING
+            for key in source_keys:
+                value = doc.get(key, _MISSING)
+                if value is not _MISSING:
+                    break
+            out[output_key] = default() if value is _MISSING else converter(value)
+        return out
+
+    return convert
+
+
+def serialize(model: Type[BaseModel], doc: dict) -> dict:
+    return build_converter(model)(doc)
+
+
+def serialize_many(model: Type[BaseModel], docs: Iterable[dict]) -> List[dict]:
+    convert = build_converter(model)
+    return [convert(doc) for doc in docs]
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse que usa orjson si está instalado. Espera contenido ya serializable."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content)
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
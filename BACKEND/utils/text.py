@@ -0,0 +1,35 @@
+# utils/text.py
+"""Normalización de texto para búsquedas: minúsculas, sin acentos y tokenizado."""
+import re
+import unicodedata
+from typing import Iterable, List, Optional
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+MIN_TOKEN_LENGTH = 2
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """'Plomería  Gral.' -> 'plomeria  gral.' (sin acentos ni mayúsculas)."""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text)
+    folded = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return folded.casefold().strip()
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Tokens únicos (en orden de aparición) del texto normalizado."""
+    seen = []
+    for token in _TOKEN_RE.findall(normalize_text(text)):
+        if len(token) >= MIN_TOKEN_LENGTH and token not in seen:
+            seen.append(token)
+    return seen
+
+
+def tokenize_many(texts: Iterable[Optional[str]]) -> List[str]:
+    tokens = []
+    for text in texts:
+        for token in tokenize(text):
+            if token not in tokens:
+                tokens.append(token)
+    return tokens